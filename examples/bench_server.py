@@ -0,0 +1,27 @@
+"""
+Local HTTP server shared by the benchmark scripts in this directory.
+"""
+
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_server(page_for: Callable[[str], bytes]) -> ThreadingHTTPServer:
+    """Serve ``page_for(path)`` as HTML for every GET on a free localhost port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = page_for(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark the BrowserPool instance reset strategies.
+
+For each strategy, a pooled browser instance repeatedly loads a local page that
+writes cookies, localStorage, IndexedDB and Cache Storage, is released (reset)
+and is checked for leftover state. Prints the average reset time and whether
+any state survived the reset.
+
+Usage:
+    python examples/benchmark_pool_reset.py [--rounds 20] [--headful]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_server import start_server
+from playwright.async_api import async_playwright
+
+from web_eval_agent.browser.browser_pool import (
+    RESET_STRATEGIES,
+    BrowserInstance,
+    BrowserInstanceConfig,
+)
+
+PAGE = b"""<!doctype html>
+<html><body>
+<script>
+  document.cookie = "bench=1; path=/";
+  localStorage.setItem("bench", "1");
+  sessionStorage.setItem("bench", "1");
+  const req = indexedDB.open("bench", 1);
+  req.onupgradeneeded = () => req.result.createObjectStore("items");
+  req.onsuccess = () => {
+    const tx = req.result.transaction("items", "readwrite");
+    tx.objectStore("items").put("1", "bench");
+    tx.oncomplete = () => caches.open("bench")
+      .then(cache => cache.put("/cached", new Response("1")))
+      .then(() => { document.title = "ready"; });
+  };
+</script>
+</body></html>
+"""
+BLANK_PAGE = b"<!doctype html><title>blank</title>"
+
+# Evaluated after a reset on a blank page of the same origin
+LEFTOVER_STATE_JS = """async () => {
+  const leftovers = [];
+  if (document.cookie.includes("bench=")) leftovers.push("cookies");
+  if (localStorage.getItem("bench")) leftovers.push("localStorage");
+  const dbs = indexedDB.databases ? await indexedDB.databases() : [];
+  if (dbs.some(db => db.name === "bench")) leftovers.push("indexedDB");
+  if (await caches.has("bench")) leftovers.push("cacheStorage");
+  return leftovers;
+}"""
+
+
+async def benchmark_strategy(playwright, strategy: str, origin: str, rounds: int, headless: bool):
+    """Time ``rounds`` resets with one strategy and collect leftover state."""
+    instance = BrowserInstance(f"bench-{strategy}", BrowserInstanceConfig(headless=headless),
+                               reset_strategy=strategy)
+    await instance.initialize(playwright)
+
+    durations = []
+    leftovers = set()
+    try:
+        for _ in range(rounds):
+            await instance.acquire()
+            await instance.page.goto(f"{origin}/")
+            await instance.page.wait_for_function("document.title === 'ready'")
+
+            start = time.perf_counter()
+            await instance.release()
+            durations.append(time.perf_counter() - start)
+
+            await instance.acquire()
+            await instance.page.goto(f"{origin}/blank")
+            leftovers.update(await instance.page.evaluate(LEFTOVER_STATE_JS))
+            await instance.release()
+    finally:
+        await instance._cleanup()
+
+    return durations, sorted(leftovers)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark BrowserPool reset strategies")
+    parser.add_argument("--rounds", type=int, default=20, help="Resets per strategy (default: 20)")
+    parser.add_argument("--headful", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    server = start_server(lambda path: PAGE if path == "/" else BLANK_PAGE)
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"🧪 Benchmarking {len(RESET_STRATEGIES)} reset strategies, {args.rounds} rounds each")
+    print(f"{'strategy':<18} {'mean':>9} {'median':>9} {'p95':>9}  leftover state")
+    print("-" * 70)
+
+    playwright = await async_playwright().start()
+    try:
+        for strategy in RESET_STRATEGIES:
+            durations, leftovers = await benchmark_strategy(
+                playwright, strategy, origin, args.rounds, not args.headful
+            )
+            durations_ms = sorted(d * 1000 for d in durations)
+            p95 = durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))]
+            print(f"{strategy:<18} {statistics.mean(durations_ms):>7.1f}ms "
+                  f"{statistics.median(durations_ms):>7.1f}ms {p95:>7.1f}ms  "
+                  f"{', '.join(leftovers) or 'none'}")
+    finally:
+        await playwright.stop()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark browser start-up from a pre-baked profile template.
+
+Compares launch-to-first-paint latency of a regular Playwright launch (fresh
+profile every time) with a launch from a clone of a profile template. Each
+round starts a browser, opens a page on a local server and waits for its
+first paint.
+
+Usage:
+    python examples/benchmark_profile_template.py [--rounds 10] [--template DIR]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_server import start_server
+from playwright.async_api import async_playwright
+
+from web_eval_agent.browser.browser_pool import CHROMIUM_ARGS
+from web_eval_agent.browser.profile_template import (
+    build_profile_template,
+    clone_profile,
+    launch_from_template,
+)
+
+PAGE = b"""<!doctype html>
+<html><head><title>bench</title></head>
+<body style="background:#fafafa"><h1>First paint</h1></body></html>
+"""
+
+FIRST_PAINT_JS = """() => new Promise(resolve => {
+  const done = () => performance.getEntriesByType("paint").length > 0;
+  if (done()) return resolve();
+  new PerformanceObserver(() => done() && resolve()).observe({type: "paint", buffered: true});
+})"""
+
+
+async def first_paint(browser, url: str):
+    """Open ``url`` in a new context and wait until it has painted."""
+    context = await browser.new_context()
+    page = await context.new_page()
+    await page.goto(url)
+    await page.evaluate(FIRST_PAINT_JS)
+    await context.close()
+
+
+async def time_cold_launch(playwright, url: str, headless: bool) -> float:
+    start = time.perf_counter()
+    browser = await playwright.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
+    try:
+        await first_paint(browser, url)
+        return time.perf_counter() - start
+    finally:
+        await browser.close()
+
+
+async def time_template_launch(playwright, template_dir: str, url: str, headless: bool) -> float:
+    start = time.perf_counter()
+    template_browser = await launch_from_template(
+        playwright, template_dir, headless=headless, args=CHROMIUM_ARGS
+    )
+    try:
+        await first_paint(template_browser.browser, url)
+        return time.perf_counter() - start
+    finally:
+        await template_browser.close()
+
+
+def time_clone(template_dir: str) -> float:
+    start = time.perf_counter()
+    profile_dir = clone_profile(template_dir)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    return elapsed
+
+
+def report(name: str, durations):
+    durations_ms = sorted(d * 1000 for d in durations)
+    p95 = durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))]
+    print(f"{name:<22} {statistics.mean(durations_ms):>8.1f}ms {statistics.median(durations_ms):>8.1f}ms "
+          f"{p95:>8.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark launches from a profile template")
+    parser.add_argument("--rounds", type=int, default=10, help="Launches per mode (default: 10)")
+    parser.add_argument("--template", help="Existing template directory (default: build a temporary one)")
+    parser.add_argument("--state", help="Storage state JSON to bake into a temporary template")
+    parser.add_argument("--headful", action="store_true", help="Show the browser windows")
+    args = parser.parse_args()
+
+    server = start_server(lambda path: PAGE)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    headless = not args.headful
+
+    playwright = await async_playwright().start()
+    temp_root = None
+    try:
+        template_dir = args.template
+        if template_dir is None:
+            temp_root = tempfile.mkdtemp(prefix="web-eval-bench-")
+            template_dir = os.path.join(temp_root, "template")
+            start = time.perf_counter()
+            await build_profile_template(playwright, template_dir, state_file=args.state)
+            print(f"🧱 Built profile template in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        # One untimed launch each so disk caches are warm for both modes
+        await time_cold_launch(playwright, url, headless)
+        await time_template_launch(playwright, template_dir, url, headless)
+
+        print(f"🧪 Launch to first paint, {args.rounds} rounds each")
+        print(f"{'mode':<22} {'mean':>10} {'median':>10} {'p95':>10}")
+        print("-" * 56)
+        report("fresh profile", [await time_cold_launch(playwright, url, headless)
+                                 for _ in range(args.rounds)])
+        report("template clone", [await time_template_launch(playwright, template_dir, url, headless)
+                                  for _ in range(args.rounds)])
+        report("  (clone only)", [time_clone(template_dir) for _ in range(args.rounds)])
+    finally:
+        await playwright.stop()
+        server.shutdown()
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,6 @@
 """Browser automation and management functionality."""
 
-from .browser_utils import BrowserUtils
-from .browser_manager import BrowserManager
+from .browser_manager import PlaywrightBrowserManager
 from .browser_pool import BrowserPool
 
-__all__ = ["BrowserUtils", "BrowserManager", "BrowserPool"]
-
+__all__ = ["PlaywrightBrowserManager", "BrowserPool"]
@@ -6,7 +6,8 @@ from typing import Dict, Optional
 
 # Import log server functions
 # We will add send_browser_view later
-from .log_server import start_log_server, open_log_dashboard, send_log, send_browser_view
+from ..utils.log_server import start_log_server, open_log_dashboard, send_log, has_viewers
+from .screencast import ScreencastStreamer
 
 class PlaywrightBrowserManager:
     # Class variable to hold the singleton instance
@@ -33,6 +34,7 @@ class PlaywrightBrowserManager:
         self.browser = None
         self.page = None
         self.cdp_session = None # Added for CDP
+        self.screencast: ScreencastStreamer | None = None
         self.screencast_task_running = False # Added for screencast state
         self.console_logs = []
         self.network_requests = []
@@ -75,11 +77,9 @@ class PlaywrightBrowserManager:
     async def close(self) -> None:
         """Close the browser and Playwright instance."""
         # Stop screencast if running
-        if self.cdp_session and self.screencast_task_running:
-            try:
-                await self.cdp_session.send("Page.stopScreencast")
-            except Exception:
-                pass
+        if self.screencast and self.screencast_task_running:
+            await self.screencast.stop()
+            self.screencast = None
             self.screencast_task_running = False
 
         # Detach CDP session if exists
@@ -132,18 +132,17 @@ class PlaywrightBrowserManager:
     def _on_page_error(self, message):
         asyncio.create_task(self._handle_console_message(message))
     
-    async def open_url(self, url: str) -> str:
+    async def open_url(self, url: str, screencast_profile: str | None = None) -> str:
         """Open a URL in the browser and start monitoring console and network.
-        The browser will stay open for user interaction."""
+        The browser will stay open for user interaction; its view is streamed
+        to the dashboard using ``screencast_profile`` (see SCREENCAST_PROFILES)."""
         if not self.is_initialized:
             await self.initialize()
 
         # Stop screencast and close previous page/session if they exist
-        if self.cdp_session and self.screencast_task_running:
-            try:
-                await self.cdp_session.send("Page.stopScreencast")
-            except Exception:
-                pass
+        if self.screencast and self.screencast_task_running:
+            await self.screencast.stop()
+            self.screencast = None
             self.screencast_task_running = False
         if self.cdp_session:
              try:
@@ -181,15 +180,11 @@ class PlaywrightBrowserManager:
         # --- Start CDP Screencast ---
         try:
             self.cdp_session = await self.page.context.new_cdp_session(self.page)
-            # Listen for screencast frames using a non-async wrapper function
-            self.cdp_session.on("Page.screencastFrame", self._handle_screencast_frame)
-            # Start the screencast
-            await self.cdp_session.send("Page.startScreencast", {
-                "format": "png",  # jpeg is generally smaller than png
-                "quality": 100,     # Adjust quality vs size (0-100)
-                "maxWidth": 1920,  # Optional: limit width
-                "maxHeight": 1080   # Optional: limit height
-            })
+            # Stream frames to the dashboard, paced by its acknowledgements
+            self.screencast = ScreencastStreamer(
+                self.cdp_session, screencast_profile, browser=self.browser
+            )
+            await self.screencast.start()
             self.screencast_task_running = True
             send_log("CDP screencast started.", "📹", log_type='status')
         except Exception as e:
@@ -214,6 +209,8 @@ class PlaywrightBrowserManager:
             "timestamp": asyncio.get_event_loop().time()
         }
         self.console_logs.append(log_entry)
+        if not has_viewers():
+            return
         try:
             send_log(f"CONSOLE [{log_entry['type']}]: {log_entry['text']}", "🖥️", log_type='console')
         except Exception:
@@ -230,6 +227,8 @@ class PlaywrightBrowserManager:
             "id": id(request)
         }
         self.network_requests.append(request_entry)
+        if not has_viewers():
+            return
         try:
             send_log(f"NET REQ [{request_entry['method']}]: {request_entry['url']}", "➡️", log_type='network')
         except Exception:
@@ -262,42 +261,6 @@ class PlaywrightBrowserManager:
              except Exception:
                  pass
 
-    # --- CDP Screencast Handling ---
-    async def _handle_screencast_frame(self, params: Dict) -> None:
-        """Handle incoming screencast frames from CDP."""
-        if not self.cdp_session:
-            return # Session closed or not initialized
-
-        image_data = params.get('data')
-        session_id = params.get('sessionId')
-
-        if image_data and session_id:
-            # Format as data URL
-            image_data_url = f"data:image/jpeg;base64,{image_data}"
-
-            # Send to frontend via SocketIO
-            try:
-                # Use asyncio.create_task to avoid blocking the CDP event handler
-                asyncio.create_task(send_browser_view(image_data_url))
-            except Exception:
-                pass
-
-            # IMPORTANT: Acknowledge the frame back to the browser
-            try:
-                await self.cdp_session.send("Page.screencastFrameAck", {"sessionId": session_id})
-            except Exception as e:
-                # If acknowledging fails, the stream might stop
-                # For now, just handle the error. If the session is closed, this will likely fail.
-                if "Target closed" in str(e) or "Session closed" in str(e) or "Connection closed" in str(e):
-                    self.screencast_task_running = False # Mark as stopped
-                    if self.cdp_session:
-                        try:
-                            await self.cdp_session.detach()
-                        except Exception:
-                            pass
-                        self.cdp_session = None
-
-
     # --- Input Handling ---
     async def handle_browser_input(self, event_type: str, details: Dict) -> None:
         """Handles input events received from the frontend via log_server."""
@@ -318,8 +281,7 @@ class PlaywrightBrowserManager:
             if event_type == 'click':
                 # CDP expects separate press and release events for a click
                 button = details.get('button', 'left')
-                x = details.get('x', 0)
-                y = details.get('y', 0)
+                x, y = self.screencast.to_page_coordinates(details.get('x', 0), details.get('y', 0))
                 click_count = details.get('clickCount', 1)
                 # Modifiers might be needed for complex interactions, but start simple
                 modifiers = 0 # TODO: Map ctrlKey, shiftKey etc. if needed
@@ -404,8 +366,7 @@ class PlaywrightBrowserManager:
 
             elif event_type == 'scroll':
                 # Use dispatchMouseEvent with type 'mouseWheel'
-                x = details.get('x', 0)
-                y = details.get('y', 0)
+                x, y = self.screencast.to_page_coordinates(details.get('x', 0), details.get('y', 0))
                 delta_x = details.get('deltaX', 0)
                 delta_y = details.get('deltaY', 0)
                 
@@ -6,19 +6,29 @@ Provides browser instance pooling, lifecycle management, and cleanup.
 """
 
 import asyncio
-import uuid
+import json
+import os
 import time
-import weakref
-from typing import Dict, List, Optional, Set
+import uuid
+from collections import deque
+from collections.abc import Callable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from enum import Enum
-from contextlib import asynccontextmanager
+from typing import Any
 
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-from browser_use.browser.browser import Browser as BrowserUseBrowser, BrowserConfig
-from browser_use.browser.context import BrowserContext as BrowserUseContext
+from browser_use.browser.browser import Browser as BrowserUseBrowser
+from browser_use.browser.browser import BrowserConfig
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
 
-from .logging_config import get_logger, StructuredLogger
+from ..utils.logging_config import get_logger
+from .pool_metrics import PoolMetrics, render_prometheus
+from .profile_template import (
+    TemplateBrowser,
+    apply_storage_state,
+    launch_from_template,
+    template_storage_state,
+)
 
 
 class InstanceStatus(Enum):
@@ -30,154 +40,450 @@ class InstanceStatus(Enum):
     CLEANUP = "cleanup"
 
 
-@dataclass
+@dataclass(frozen=True)
 class BrowserInstanceConfig:
-    """Configuration for browser instances."""
+    """Configuration for browser instances.
+
+    Frozen so it can key the pool's buckets of available instances.
+    """
     headless: bool = True
     viewport_width: int = 1920
     viewport_height: int = 1080
-    user_agent: Optional[str] = None
+    user_agent: str | None = None
     timeout: int = 30000
     slow_mo: int = 0
     devtools: bool = False
-    
+    # Pre-baked user-data-dir cloned for each browser process (see profile_template)
+    profile_template: str | None = None
+    # Playwright storage state (login cookies/localStorage) loaded into every
+    # context; defaults to the state baked into profile_template
+    storage_state: str | None = None
+
+    @property
+    def context_storage_state(self) -> str | None:
+        """Storage state file new contexts start from, if any."""
+        if self.storage_state:
+            return self.storage_state
+        if self.profile_template:
+            return template_storage_state(self.profile_template)
+        return None
+
     def to_browser_config(self) -> BrowserConfig:
         """Convert to browser-use BrowserConfig."""
         return BrowserConfig(
             headless=self.headless,
             disable_security=True,  # For testing purposes
-            chrome_instance_path=None,
-            user_data_dir=None
+            chrome_instance_path=None
+        )
+
+
+# How an instance is cleaned between uses:
+#   navigate          (default) clear cookies and local/session storage, then load
+#                     about:blank
+#   clear_storage     clear all storage (IndexedDB, cache, service workers, ...) of
+#                     every origin the instance visited via CDP, plus cookies and
+#                     permissions
+#   recreate_context  discard the BrowserContext and open a fresh one
+RESET_STRATEGIES = ("navigate", "clear_storage", "recreate_context")
+
+# Chromium flags used for every pooled browser process
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding'
+]
+
+
+async def launch_browser(playwright_instance,
+                         config: BrowserInstanceConfig) -> tuple[Browser, TemplateBrowser | None]:
+    """Launch a browser process for ``config``.
+
+    With a profile template the process runs on a clone of it and is returned
+    alongside the Playwright Browser so the caller can stop it and remove the
+    clone; otherwise Playwright launches a regular browser.
+    """
+    args = CHROMIUM_ARGS + (['--auto-open-devtools-for-tabs'] if config.devtools else [])
+    if config.profile_template:
+        template_browser = await launch_from_template(
+            playwright_instance, config.profile_template,
+            headless=config.headless, args=args, slow_mo=config.slow_mo
+        )
+        return template_browser.browser, template_browser
+
+    browser = await playwright_instance.chromium.launch(
+        headless=config.headless,
+        args=args,
+        slow_mo=config.slow_mo
+    )
+    return browser, None
+
+
+def attach_browser_use(browser: Browser, config: BrowserInstanceConfig) -> BrowserUseBrowser:
+    """browser-use Browser driving an already launched Playwright browser.
+
+    browser-use's constructor takes no browser; one set on ``playwright_browser``
+    is used as is instead of launching its own.
+    """
+    browser_use_browser = BrowserUseBrowser(config=config.to_browser_config())
+    browser_use_browser.playwright_browser = browser
+    return browser_use_browser
+
+
+async def sample_browser_rss_mb(browser: Browser) -> float | None:
+    """Resident memory of a Chromium browser and all its child processes, in MB.
+
+    Process ids come from CDP ``SystemInfo.getProcessInfo``; RSS is read from
+    /proc, so this returns None on platforms without it.
+    """
+    session = await browser.new_browser_cdp_session()
+    try:
+        info = await session.send("SystemInfo.getProcessInfo")
+    finally:
+        await session.detach()
+
+    page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    total_bytes = 0
+    found = False
+    for process in info.get("processInfo", []):
+        try:
+            with open(f"/proc/{process['id']}/statm") as f:
+                total_bytes += int(f.read().split()[1]) * page_size
+            found = True
+        except (OSError, ValueError, IndexError, KeyError):
+            continue
+    return total_bytes / (1024 * 1024) if found else None
+
+
+class SharedBrowser:
+    """
+    A Chromium process hosting the isolated contexts of several pool instances.
+    """
+
+    def __init__(self, browser_id: str, config: BrowserInstanceConfig):
+        self.browser_id = browser_id
+        self.config = config
+        self.context_count = 0  # Instances using (or being created on) this process
+        self.retiring = False  # Over its memory limit; no new contexts are placed on it
+        self.rss_mb: float | None = None
+
+        # Set once launch() has finished; instances reserving a slot while the
+        # process is still starting wait on it
+        self.launched = asyncio.Event()
+        self.launch_error: BaseException | None = None
+
+        self.playwright_browser: Browser | None = None
+        self.template_browser: TemplateBrowser | None = None
+        self.browser_use_browser: BrowserUseBrowser | None = None
+        self.logger = get_logger(f"shared-browser-{browser_id}")
+
+    async def launch(self, playwright_instance):
+        """Launch the browser process."""
+        self.logger.info(f"Launching shared browser process {self.browser_id}")
+        try:
+            self.playwright_browser, self.template_browser = await launch_browser(
+                playwright_instance, self.config
+            )
+            self.browser_use_browser = attach_browser_use(self.playwright_browser, self.config)
+        except BaseException as e:
+            self.launch_error = e
+            raise
+        finally:
+            self.launched.set()
+
+    async def wait_launched(self):
+        """Wait for a launch started by another instance.
+
+        Raises:
+            RuntimeError: If that launch failed
+        """
+        await self.launched.wait()
+        if self.launch_error is not None:
+            raise RuntimeError(
+                f"Shared browser {self.browser_id} failed to launch: {self.launch_error}"
+            ) from self.launch_error
+
+    def can_host(self, config: BrowserInstanceConfig, contexts_per_browser: int) -> bool:
+        """Whether a new context for ``config`` may be placed on this process."""
+        if self.retiring or self.launch_error is not None or not self.matches(config):
+            return False
+        if self.context_count >= contexts_per_browser:
+            return False
+        # Still starting, or up and connected
+        return not self.launched.is_set() or (
+            self.playwright_browser is not None and self.playwright_browser.is_connected()
+        )
+
+    def matches(self, config: BrowserInstanceConfig) -> bool:
+        """Whether contexts for ``config`` can be hosted on this process."""
+        return (
+            self.config.headless == config.headless and
+            self.config.slow_mo == config.slow_mo and
+            self.config.devtools == config.devtools and
+            self.config.profile_template == config.profile_template
         )
 
+    async def close(self):
+        """Close the browser process."""
+        self.logger.info(f"Closing shared browser process {self.browser_id}")
+        try:
+            if self.template_browser:
+                await self.template_browser.close()
+            elif self.playwright_browser:
+                await self.playwright_browser.close()
+        except Exception as e:
+            self.logger.error(f"Error closing shared browser {self.browser_id}", error=e)
+        finally:
+            self.playwright_browser = None
+            self.template_browser = None
+            self.browser_use_browser = None
+
 
 class BrowserInstance:
     """
     Represents a single browser instance with its context and page.
+
+    The instance either owns its browser process or, in context pooling mode,
+    holds an isolated context on a SharedBrowser used by other instances too.
     """
-    
-    def __init__(self, instance_id: str, config: BrowserInstanceConfig):
+
+    def __init__(self, instance_id: str, config: BrowserInstanceConfig,
+                 reset_strategy: str = "navigate"):
+        if reset_strategy not in RESET_STRATEGIES:
+            raise ValueError(f"Unknown reset strategy '{reset_strategy}', expected one of {RESET_STRATEGIES}")
+
         self.instance_id = instance_id
         self.config = config
+        self.reset_strategy = reset_strategy
         self.status = InstanceStatus.INITIALIZING
         self.created_at = time.time()
         self.last_used = time.time()
         self.use_count = 0
-        
+
         # Browser components
-        self.playwright_browser: Optional[Browser] = None
-        self.browser_use_browser: Optional[BrowserUseBrowser] = None
-        self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
-        
+        self.playwright_browser: Browser | None = None
+        self.template_browser: TemplateBrowser | None = None
+        self.browser_use_browser: BrowserUseBrowser | None = None
+        self.context: BrowserContext | None = None
+        self.page: Page | None = None
+        self.shared_browser: SharedBrowser | None = None
+
+        # Memory sampled by the pool; over-limit instances are recycled on release
+        self.rss_mb: float | None = None
+        self.js_heap_mb: float | None = None
+        self.recycle_requested = False
+
+        # Liveness: set by crash/disconnect events or a failed probe; the pool
+        # registers on_dead to evict and replace the instance right away
+        self.dead_reason: str | None = None
+        self.on_dead: Callable[[BrowserInstance], None] | None = None
+
+        # Origins whose storage the clear_storage reset has to wipe
+        self._touched_origins: set[str] = set()
+        self.last_reset_duration: float | None = None
+
         # Cleanup tracking
-        self._cleanup_callbacks: List[callable] = []
+        self._cleanup_callbacks: list[callable] = []
         self.logger = get_logger(f"browser-{instance_id}")
-    
-    async def initialize(self, playwright_instance):
-        """Initialize the browser instance."""
+
+    async def initialize(self, playwright_instance, shared_browser: SharedBrowser | None = None):
+        """Initialize the browser instance.
+
+        Args:
+            playwright_instance: Running Playwright driver
+            shared_browser: Launched process to create this instance's context on,
+                instead of launching a dedicated browser
+        """
         try:
             self.logger.info(f"Initializing browser instance {self.instance_id}")
-            
-            # Launch Playwright browser
-            self.playwright_browser = await playwright_instance.chromium.launch(
-                headless=self.config.headless,
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor',
-                    '--disable-background-timer-throttling',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding'
-                ],
-                slow_mo=self.config.slow_mo,
-                devtools=self.config.devtools
-            )
-            
-            # Create browser context
-            self.context = await self.playwright_browser.new_context(
-                viewport={
-                    'width': self.config.viewport_width,
-                    'height': self.config.viewport_height
-                },
-                user_agent=self.config.user_agent,
-                ignore_https_errors=True
-            )
-            
-            # Create page
-            self.page = await self.context.new_page()
-            
-            # Set default timeout
-            self.page.set_default_timeout(self.config.timeout)
-            
+
+            if shared_browser is not None:
+                # Context pooling: only a new context on an existing process
+                self.shared_browser = shared_browser
+                self.playwright_browser = shared_browser.playwright_browser
+            else:
+                # Launch Playwright browser (from a profile template, if configured)
+                self.playwright_browser, self.template_browser = await launch_browser(
+                    playwright_instance, self.config
+                )
+
+            self.playwright_browser.on("disconnected", self._on_browser_disconnected)
+            await self._create_context()
+
             # Create browser-use browser instance
-            browser_config = self.config.to_browser_config()
-            self.browser_use_browser = BrowserUseBrowser(
-                config=browser_config,
-                browser=self.playwright_browser
-            )
-            
+            if self.shared_browser is not None:
+                self.browser_use_browser = self.shared_browser.browser_use_browser
+            else:
+                self.browser_use_browser = attach_browser_use(self.playwright_browser, self.config)
+
             self.status = InstanceStatus.AVAILABLE
             self.logger.info(f"Browser instance {self.instance_id} initialized successfully")
-            
+
         except Exception as e:
             self.status = InstanceStatus.FAILED
             self.logger.error(f"Failed to initialize browser instance {self.instance_id}", error=e)
             await self._cleanup()
             raise
-    
+
+    async def _create_context(self):
+        """Create the instance's browser context and page."""
+        # Create browser context
+        self.context = await self.playwright_browser.new_context(
+            viewport={
+                'width': self.config.viewport_width,
+                'height': self.config.viewport_height
+            },
+            user_agent=self.config.user_agent,
+            storage_state=self.config.context_storage_state,
+            ignore_https_errors=True
+        )
+
+        if self.reset_strategy == "clear_storage":
+            self.context.on("request", self._track_origin)
+
+        # Create page
+        self.page = await self.context.new_page()
+        self.page.on("crash", self._on_page_crash)
+
+        # Set default timeout
+        self.page.set_default_timeout(self.config.timeout)
+
+    def _on_browser_disconnected(self, *args):
+        self.mark_dead("browser disconnected")
+
+    def _on_page_crash(self, *args):
+        self.mark_dead("page crashed")
+
+    def mark_dead(self, reason: str):
+        """Flag the instance as unusable and notify the pool (once)."""
+        if self.dead_reason is not None or self.status == InstanceStatus.CLEANUP:
+            return
+        self.dead_reason = reason
+        self.logger.warning(f"Browser instance {self.instance_id} is dead: {reason}")
+        if self.on_dead is not None:
+            self.on_dead(self)
+
+    async def probe(self, timeout: float = 5.0) -> bool:
+        """Check the instance really responds by round-tripping a script through the page."""
+        if not self.is_healthy():
+            return False
+        try:
+            await asyncio.wait_for(self.page.evaluate("1"), timeout=timeout)
+            return True
+        except TimeoutError:
+            self.mark_dead(f"page did not respond within {timeout}s")
+        except Exception as e:
+            self.mark_dead(f"probe failed: {e}")
+        return False
+
+    def _track_origin(self, request):
+        """Remember the origin of every document (page or frame) loaded."""
+        if request.resource_type != "document":
+            return
+        scheme, _, rest = request.url.partition("://")
+        if scheme in ("http", "https") and rest:
+            self._touched_origins.add(f"{scheme}://{rest.split('/', 1)[0]}")
+
     async def acquire(self) -> 'BrowserInstance':
         """Acquire this browser instance for use."""
         if self.status != InstanceStatus.AVAILABLE:
             raise RuntimeError(f"Browser instance {self.instance_id} is not available")
-        
+
         self.status = InstanceStatus.IN_USE
         self.last_used = time.time()
         self.use_count += 1
-        
+
         self.logger.debug(f"Browser instance {self.instance_id} acquired (use count: {self.use_count})")
         return self
-    
+
     async def release(self):
         """Release this browser instance back to the pool."""
         if self.status != InstanceStatus.IN_USE:
             self.logger.warning(f"Attempting to release browser instance {self.instance_id} that is not in use")
             return
-        
+
         try:
             # Reset browser state
             await self._reset_state()
-            
+
             self.status = InstanceStatus.AVAILABLE
             self.last_used = time.time()
-            
+
             self.logger.debug(f"Browser instance {self.instance_id} released")
-            
+
         except Exception as e:
             self.logger.error(f"Error releasing browser instance {self.instance_id}", error=e)
             self.status = InstanceStatus.FAILED
-    
+
     async def _reset_state(self):
-        """Reset browser state for reuse."""
-        if self.page:
-            try:
+        """Reset browser state for reuse using the instance's reset strategy."""
+        if not self.page:
+            return
+
+        start_time = time.time()
+        try:
+            if self.reset_strategy == "recreate_context":
+                await self._recreate_context()
+            elif self.reset_strategy == "clear_storage":
+                await self._clear_storage()
+            else:
                 # Clear cookies and local storage
                 await self.context.clear_cookies()
                 await self.page.evaluate("localStorage.clear(); sessionStorage.clear();")
-                
+
                 # Navigate to blank page
                 await self.page.goto("about:blank")
-                
-            except Exception as e:
-                self.logger.warning(f"Error resetting browser state for {self.instance_id}", error=e)
-    
+
+            if self.reset_strategy != "recreate_context" and self.config.context_storage_state:
+                # Put the pre-loaded login state back after wiping storage
+                with open(self.config.context_storage_state, encoding="utf-8") as f:
+                    await apply_storage_state(self.context, json.load(f))
+
+        except Exception as e:
+            self.logger.warning(f"Error resetting browser state for {self.instance_id}", error=e)
+        finally:
+            self.last_reset_duration = time.time() - start_time
+
+    async def _recreate_context(self):
+        """Discard the context (and everything stored in it) and open a fresh one."""
+        old_context = self.context
+        self.context = None
+        self.page = None
+        try:
+            await old_context.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing old context of {self.instance_id}: {e}")
+        await self._create_context()
+
+    async def _clear_storage(self):
+        """Clear every kind of storage for the origins visited since the last reset."""
+        # Unload the page first so its scripts can't write storage back
+        await self.page.goto("about:blank")
+
+        origins = list(self._touched_origins)
+        self._touched_origins.clear()
+        if origins:
+            cdp = await self.context.new_cdp_session(self.page)
+            try:
+                await asyncio.gather(*(
+                    cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+                    for origin in origins
+                ))
+            finally:
+                await cdp.detach()
+
+        await self.context.clear_cookies()
+        await self.context.clear_permissions()
+
     async def _cleanup(self):
         """Clean up browser resources."""
         self.status = InstanceStatus.CLEANUP
         self.logger.info(f"Cleaning up browser instance {self.instance_id}")
-        
+
         try:
             # Run cleanup callbacks
             for callback in self._cleanup_callbacks:
@@ -185,44 +491,70 @@ class BrowserInstance:
                     await callback()
                 except Exception as e:
                     self.logger.warning(f"Cleanup callback failed for {self.instance_id}", error=e)
-            
+
             # Close page
             if self.page:
                 await self.page.close()
                 self.page = None
-            
+
             # Close context
             if self.context:
                 await self.context.close()
                 self.context = None
-            
-            # Close browser
+
+            # Close browser (a shared process is closed by the pool once unused)
             if self.playwright_browser:
+                self.playwright_browser.remove_listener("disconnected", self._on_browser_disconnected)
+            if self.template_browser is not None:
+                await self.template_browser.close()
+                self.template_browser = None
+            elif self.playwright_browser and self.shared_browser is None:
                 await self.playwright_browser.close()
-                self.playwright_browser = None
-            
+            self.playwright_browser = None
+
             self.browser_use_browser = None
-            
+
         except Exception as e:
             self.logger.error(f"Error during cleanup of browser instance {self.instance_id}", error=e)
-    
+
     def add_cleanup_callback(self, callback: callable):
         """Add a cleanup callback."""
         self._cleanup_callbacks.append(callback)
-    
+
+    async def sample_memory(self):
+        """Sample the page's JS heap and, for a dedicated browser, the process RSS."""
+        if self.context is None or self.page is None:
+            return
+
+        cdp = await self.context.new_cdp_session(self.page)
+        try:
+            await cdp.send("Performance.enable")
+            result = await cdp.send("Performance.getMetrics")
+        finally:
+            await cdp.detach()
+        metrics = {m["name"]: m["value"] for m in result.get("metrics", [])}
+        if "JSHeapUsedSize" in metrics:
+            self.js_heap_mb = metrics["JSHeapUsedSize"] / (1024 * 1024)
+
+        if self.shared_browser is None and self.playwright_browser is not None:
+            self.rss_mb = await sample_browser_rss_mb(self.playwright_browser)
+
     def is_healthy(self) -> bool:
         """Check if the browser instance is healthy."""
         return (
             self.status in [InstanceStatus.AVAILABLE, InstanceStatus.IN_USE] and
+            self.dead_reason is None and
             self.playwright_browser is not None and
+            self.playwright_browser.is_connected() and
             self.context is not None and
-            self.page is not None
+            self.page is not None and
+            not self.page.is_closed()
         )
-    
+
     def get_age(self) -> float:
         """Get the age of this instance in seconds."""
         return time.time() - self.created_at
-    
+
     def get_idle_time(self) -> float:
         """Get the idle time of this instance in seconds."""
         return time.time() - self.last_used
@@ -232,175 +564,840 @@ class BrowserPool:
     """
     Pool of browser instances for efficient resource management.
     """
-    
-    def __init__(self, max_size: int = 10, max_idle_time: int = 300, max_instance_age: int = 3600):
+
+    def __init__(self, max_size: int = 10, max_idle_time: int = 300, max_instance_age: int = 3600,
+                 min_size: int = 0, warm_size: int = 0, contexts_per_browser: int = 1,
+                 warm_config: BrowserInstanceConfig | None = None,
+                 max_instance_rss_mb: int | None = None, max_js_heap_mb: int | None = None,
+                 memory_ceiling_mb: int | None = None, memory_check_interval: int = 60,
+                 reset_strategy: str = "navigate",
+                 health_check_interval: int = 30, probe_timeout: float = 5.0):
+        if reset_strategy not in RESET_STRATEGIES:
+            raise ValueError(f"Unknown reset strategy '{reset_strategy}', expected one of {RESET_STRATEGIES}")
+
         self.max_size = max_size
         self.max_idle_time = max_idle_time  # 5 minutes
         self.max_instance_age = max_instance_age  # 1 hour
-        
-        self.available_instances: List[BrowserInstance] = []
-        self.active_instances: Dict[str, BrowserInstance] = {}
-        self.all_instances: Dict[str, BrowserInstance] = {}
-        
+
+        # Pre-warming: never idle-evict below min_size instances in total, and
+        # keep warm_size instances launched and ready for the next acquire()
+        self.min_size = max(0, min(min_size, max_size))
+        self.warm_size = max(0, min(warm_size, max_size))
+        self.warm_config = warm_config or BrowserInstanceConfig()
+
+        # Context pooling: with contexts_per_browser > 1 each browser process
+        # hosts up to that many instances as isolated BrowserContexts. The
+        # shared_browsers list and context counts are only changed in sections
+        # without an await, so they need no lock of their own.
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.shared_browsers: list[SharedBrowser] = []
+
+        # Memory-aware recycling: instances (or shared processes) whose RSS or
+        # JS heap exceed these limits are recycled, and no new browsers are
+        # launched while the pool's total RSS is above memory_ceiling_mb
+        self.max_instance_rss_mb = max_instance_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.memory_check_interval = memory_check_interval
+        self.total_rss_mb = 0.0
+        self.memory_recycled = 0
+        self._memory_throttled = False
+        self._last_memory_check = 0.0
+
+        # How released instances are cleaned (see RESET_STRATEGIES)
+        self.reset_strategy = reset_strategy
+        self._reset_times: deque[float] = deque(maxlen=1000)
+
+        # Liveness: available instances are probed every health_check_interval
+        # seconds; dead instances (probe failure, crash, disconnect) are evicted
+        # immediately and replaced in the background
+        self.health_check_interval = health_check_interval
+        self.probe_timeout = probe_timeout
+        self.dead_evicted = 0
+        self._background_tasks: set[asyncio.Task] = set()
+
+        # Destroyed instances still closing their context and browser process
+        self._closing_tasks: set[asyncio.Task] = set()
+
+        # Available instances bucketed by config; the most recently released
+        # instance of a bucket is handed out first
+        self._available: dict[BrowserInstanceConfig, deque[BrowserInstance]] = {}
+        self.active_instances: dict[str, BrowserInstance] = {}
+        self.all_instances: dict[str, BrowserInstance] = {}
+        self._resetting: set[str] = set()  # Released instances being reset outside the lock
+
         self.playwright_instance = None
         self._lock = asyncio.Lock()
-        self._cleanup_task: Optional[asyncio.Task] = None
+
+        # Callers blocked in acquire() while the pool is full, oldest first,
+        # with the config they asked for. A waiter's future resolves to the
+        # instance handed to it by release(), or to None when capacity was
+        # freed; the slot is then already reserved for it in _pending_launches
+        # so a caller arriving later can't take it first.
+        self._waiters: deque[tuple[BrowserInstanceConfig, asyncio.Future]] = deque()
+        self._acquire_wait_times: deque[float] = deque(maxlen=1000)
+
+        # Launch/acquire histograms, reuse and eviction counters for capacity planning
+        self.metrics = PoolMetrics()
+
+        # Launches run outside the lock; each holds a reserved slot meanwhile.
+        # _warm_launches counts those started by _replenish, which alone are
+        # meant to end up as pre-warmed available instances.
+        self._launches_idle = asyncio.Event()
+        self._pending_launches = 0
+        self._warm_launches = 0
+        self._playwright_lock = asyncio.Lock()
+
+        # Set when instances are consumed or retired so the cleanup worker tops
+        # the pool back up without waiting for its next tick
+        self._replenish_needed = asyncio.Event()
+        self._cleanup_task: asyncio.Task | None = None
         self._shutdown = False
-        
+
         self.logger = get_logger("browser-pool")
-        
+
         # Start cleanup task
         self._start_cleanup_task()
-    
+
+    @property
+    def _pending_launches(self) -> int:
+        return self._pending_launch_count
+
+    @_pending_launches.setter
+    def _pending_launches(self, count: int):
+        # shutdown() waits on _launches_idle for launches still in flight
+        self._pending_launch_count = count
+        if count:
+            self._launches_idle.clear()
+        else:
+            self._launches_idle.set()
+
     def _start_cleanup_task(self):
         """Start the cleanup task."""
         if self._cleanup_task is None or self._cleanup_task.done():
             self._cleanup_task = asyncio.create_task(self._cleanup_worker())
-    
+
     async def _cleanup_worker(self):
-        """Worker task that cleans up old and idle instances."""
+        """Worker task that cleans up old and idle instances and keeps the pool warm."""
         while not self._shutdown:
             try:
                 await self._cleanup_old_instances()
-                await asyncio.sleep(60)  # Run cleanup every minute
+                await self._probe_available()
+                await self._check_memory()
+                await self._replenish()
             except Exception as e:
                 self.logger.error("Cleanup worker error", error=e)
-                await asyncio.sleep(60)
-    
+
+            # Run every minute (or health check interval), or sooner when an
+            # instance was consumed or retired
+            try:
+                await asyncio.wait_for(
+                    self._replenish_needed.wait(),
+                    timeout=min(60, self.health_check_interval)
+                )
+            except TimeoutError:
+                pass
+            self._replenish_needed.clear()
+
     async def _cleanup_old_instances(self):
         """Clean up old and idle instances."""
         async with self._lock:
-            current_time = time.time()
             instances_to_remove = []
-            
-            for instance in self.available_instances[:]:
-                # Remove instances that are too old or idle
-                if (instance.get_age() > self.max_instance_age or 
-                    instance.get_idle_time() > self.max_idle_time or
-                    not instance.is_healthy()):
-                    
-                    instances_to_remove.append(instance)
-                    self.available_instances.remove(instance)
-            
+
+            for instance in self.available_instances:
+                # Remove instances that are too old or unhealthy, and idle ones
+                # as long as the pool stays at its minimum size
+                idle = (instance.get_idle_time() > self.max_idle_time and
+                        len(self.all_instances) - len(instances_to_remove) > self.min_size)
+                if not instance.is_healthy():
+                    reason = "unhealthy"
+                elif instance.get_age() > self.max_instance_age:
+                    reason = "max_age"
+                elif idle:
+                    reason = "idle"
+                else:
+                    continue
+
+                instances_to_remove.append((instance, reason))
+                self._remove_available(instance)
+
             # Clean up removed instances
-            for instance in instances_to_remove:
-                await self._destroy_instance(instance)
+            for instance, reason in instances_to_remove:
+                self._destroy_instance(instance, reason)
                 self.logger.info(f"Cleaned up old/idle browser instance {instance.instance_id}")
-    
+
+    async def _probe_available(self):
+        """Ping idle instances; failed probes mark them dead, which evicts them."""
+        async with self._lock:
+            instances = [
+                i for i in self.available_instances
+                if time.time() - i.last_used >= self.health_check_interval
+            ]
+
+        if instances:
+            await asyncio.gather(*(i.probe(self.probe_timeout) for i in instances))
+
+    def _on_instance_dead(self, instance: BrowserInstance):
+        """Called by a dying instance; evict and replace it off the event callback."""
+        task = asyncio.get_running_loop().create_task(self._evict_dead(instance))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _evict_dead(self, instance: BrowserInstance):
+        """Destroy a dead available instance and launch a replacement in the background.
+
+        Dead in-use instances are left to their session and destroyed on release.
+        """
+        async with self._lock:
+            if self._shutdown or instance.instance_id not in self.all_instances:
+                return
+            if instance.instance_id in self.active_instances or instance.instance_id in self._resetting:
+                return
+
+            self._remove_available(instance)
+            self._destroy_instance(instance, "dead")
+            self.dead_evicted += 1
+            self.logger.info(f"Evicted dead browser instance {instance.instance_id} ({instance.dead_reason})")
+
+            # A queued caller can use the freed slot directly; otherwise refill it
+            if self._wake_next_waiter(None) or not self._has_capacity():
+                return
+            self._pending_launches += 1
+
+        try:
+            replacement = await self._create_instance(instance.config)
+        except Exception as e:
+            async with self._lock:
+                self._pending_launches -= 1
+                self._wake_next_waiter(None)
+            self.logger.error("Failed to replace dead browser instance", error=e)
+            return
+
+        async with self._lock:
+            self._pending_launches -= 1
+            if self._register_launched(replacement):
+                await self._return_instance(replacement)
+
+    def _memory_limits_enabled(self) -> bool:
+        return any(limit is not None for limit in (
+            self.max_instance_rss_mb, self.max_js_heap_mb, self.memory_ceiling_mb
+        ))
+
+    def _over_memory_limit(self, instance: BrowserInstance) -> bool:
+        """Whether an instance's last sample exceeds the per-instance limits."""
+        return (
+            (self.max_instance_rss_mb is not None and instance.rss_mb is not None and
+             instance.rss_mb > self.max_instance_rss_mb) or
+            (self.max_js_heap_mb is not None and instance.js_heap_mb is not None and
+             instance.js_heap_mb > self.max_js_heap_mb)
+        )
+
+    async def _check_memory(self):
+        """Sample memory, recycle instances over their limits and apply the global ceiling."""
+        if not self._memory_limits_enabled():
+            return
+        if time.time() - self._last_memory_check < self.memory_check_interval:
+            return
+        self._last_memory_check = time.time()
+
+        # Sample without the lock; CDP round-trips shouldn't block acquire/release
+        async with self._lock:
+            instances = list(self.all_instances.values())
+        shared_browsers = [b for b in self.shared_browsers if b.launched.is_set()]
+
+        for instance in instances:
+            try:
+                await instance.sample_memory()
+            except Exception as e:
+                self.logger.debug(f"Memory sample failed for {instance.instance_id}: {e}")
+        for shared_browser in shared_browsers:
+            try:
+                if shared_browser.playwright_browser is not None:
+                    shared_browser.rss_mb = await sample_browser_rss_mb(shared_browser.playwright_browser)
+            except Exception as e:
+                self.logger.debug(f"Memory sample failed for shared browser {shared_browser.browser_id}: {e}")
+
+        async with self._lock:
+            # Shared processes over the RSS limit take no new contexts and close
+            # once their current contexts are recycled
+            for shared_browser in shared_browsers:
+                if (self.max_instance_rss_mb is not None and shared_browser.rss_mb is not None and
+                        shared_browser.rss_mb > self.max_instance_rss_mb and not shared_browser.retiring):
+                    shared_browser.retiring = True
+                    self.logger.warning(
+                        f"Shared browser {shared_browser.browser_id} uses {shared_browser.rss_mb:.0f} MB, retiring it"
+                    )
+
+            for instance in list(self.all_instances.values()):
+                retiring = instance.shared_browser is not None and instance.shared_browser.retiring
+                if not (retiring or self._over_memory_limit(instance)):
+                    continue
+                if instance in self.available_instances:
+                    self._remove_available(instance)
+                    self._destroy_instance(instance, "memory")
+                    self.memory_recycled += 1
+                    self.logger.info(f"Recycled browser instance {instance.instance_id} over its memory limit")
+                    self._wake_next_waiter(None)
+                else:
+                    instance.recycle_requested = True
+
+            self._update_memory_throttle()
+
+            # Above the ceiling, retire idle instances (oldest first) to give memory back
+            if self._memory_throttled:
+                for instance in sorted(self.available_instances, key=lambda i: i.last_used):
+                    if not self._memory_throttled:
+                        break
+                    self._remove_available(instance)
+                    self._destroy_instance(instance, "memory_ceiling")
+                    self.memory_recycled += 1
+                    self._update_memory_throttle()
+
+    def _update_memory_throttle(self):
+        """Recompute total RSS from the last samples and the launch throttle."""
+        shared_rss = sum(b.rss_mb or 0.0 for b in self.shared_browsers)
+        dedicated_rss = sum(
+            i.rss_mb or 0.0 for i in self.all_instances.values() if i.shared_browser is None
+        )
+        self.total_rss_mb = shared_rss + dedicated_rss
+
+        throttled = self.memory_ceiling_mb is not None and self.total_rss_mb > self.memory_ceiling_mb
+        if throttled and not self._memory_throttled:
+            self.logger.warning(
+                f"Browser pool uses {self.total_rss_mb:.0f} MB (ceiling {self.memory_ceiling_mb} MB), "
+                "pausing new launches"
+            )
+        lifted = self._memory_throttled and not throttled
+        self._memory_throttled = throttled
+        if lifted:
+            # Launches are allowed again; let a queued caller use the freed slot
+            self._wake_next_waiter(None)
+
+    def _warm_deficit(self) -> int:
+        """How many instances to launch to meet min_size and warm_size.
+
+        Must be called with ``self._lock`` held.
+        """
+        total = len(self.all_instances) + self._pending_launches
+        ready = len(self._available.get(self.warm_config, ())) + self._warm_launches
+        wanted = max(self.min_size - total, self.warm_size - ready, 0)
+        return min(wanted, self.max_size - total)
+
+    async def _replenish(self):
+        """Launch instances in the background until the warm targets are met."""
+        if self._shutdown or (self.min_size == 0 and self.warm_size == 0):
+            return
+
+        async with self._lock:
+            count = self._warm_deficit() if not self._memory_throttled else 0
+            self._pending_launches += count
+            self._warm_launches += count
+
+        if count <= 0:
+            return
+
+        self.logger.info(f"Pre-warming {count} browser instance(s)")
+        outcomes = await asyncio.gather(
+            *(self._create_instance(self.warm_config) for _ in range(count)),
+            return_exceptions=True
+        )
+
+        async with self._lock:
+            self._pending_launches -= count
+            self._warm_launches -= count
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    self.logger.error("Failed to pre-warm browser instance", error=outcome)
+                    # The reserved slot is free again; let a queued caller use it
+                    self._wake_next_waiter(None)
+                    continue
+
+                if self._register_launched(outcome):
+                    await self._return_instance(outcome)
+
+    async def warm_up(self):
+        """Launch the pre-warmed instances now instead of on the worker's next pass."""
+        await self._replenish()
+
     async def _ensure_playwright(self):
         """Ensure Playwright is initialized."""
-        if self.playwright_instance is None:
-            self.playwright_instance = await async_playwright().start()
-    
+        async with self._playwright_lock:
+            if self.playwright_instance is None:
+                self.playwright_instance = await async_playwright().start()
+
+    def _has_capacity(self) -> bool:
+        """Whether another instance may be launched (counting launches in flight)."""
+        if self._memory_throttled and self.all_instances:
+            return False
+        return len(self.all_instances) + self._pending_launches < self.max_size
+
     async def _create_instance(self, config: BrowserInstanceConfig) -> BrowserInstance:
-        """Create a new browser instance."""
+        """Create a new browser instance.
+
+        Called without ``self._lock`` held so a cold start doesn't block other
+        acquires and releases; callers reserve a slot in ``_pending_launches``
+        first and register the instance under the lock afterwards.
+        """
         await self._ensure_playwright()
-        
+
         instance_id = str(uuid.uuid4())
-        instance = BrowserInstance(instance_id, config)
-        
+        instance = BrowserInstance(instance_id, config, reset_strategy=self.reset_strategy)
+        instance.on_dead = self._on_instance_dead
+        shared_browser = None
+        start_time = time.time()
+
         try:
-            await instance.initialize(self.playwright_instance)
-            self.all_instances[instance_id] = instance
+            if self.contexts_per_browser > 1:
+                shared_browser = await self._reserve_shared_browser(config)
+            await instance.initialize(self.playwright_instance, shared_browser=shared_browser)
+            self.metrics.record_launch(time.time() - start_time)
             self.logger.info(f"Created new browser instance {instance_id}")
             return instance
-            
-        except Exception as e:
-            self.logger.error(f"Failed to create browser instance {instance_id}", error=e)
+
+        except BaseException as e:
+            if shared_browser is not None:
+                await self._release_shared_browser(shared_browser)
+            if isinstance(e, Exception):
+                self.metrics.record_launch(time.time() - start_time, failed=True)
+                self.logger.error(f"Failed to create browser instance {instance_id}", error=e)
             raise
-    
-    async def _destroy_instance(self, instance: BrowserInstance):
-        """Destroy a browser instance."""
+
+    async def _reserve_shared_browser(self, config: BrowserInstanceConfig) -> SharedBrowser:
+        """Claim a context slot on a shared browser process, launching one if all are full.
+
+        The slot (on a new, still-launching process if need be) is claimed
+        without awaiting; the launch itself, and waiting for one started by
+        another instance, happen afterwards so other reservations never queue
+        behind a cold start.
+        """
+        shared_browser = next(
+            (b for b in self.shared_browsers if b.can_host(config, self.contexts_per_browser)), None
+        )
+        launch = shared_browser is None
+        if launch:
+            shared_browser = SharedBrowser(str(uuid.uuid4()), config)
+            self.shared_browsers.append(shared_browser)
+        shared_browser.context_count += 1
+
+        try:
+            if launch:
+                await shared_browser.launch(self.playwright_instance)
+            else:
+                await shared_browser.wait_launched()
+        except BaseException:
+            await self._release_shared_browser(shared_browser)
+            raise
+        return shared_browser
+
+    def _detach_shared_browser(self, shared_browser: SharedBrowser) -> SharedBrowser | None:
+        """Give back a context slot; returns the process if it is now unused and must be closed."""
+        shared_browser.context_count -= 1
+        if shared_browser.context_count > 0:
+            return None
+        if shared_browser in self.shared_browsers:
+            self.shared_browsers.remove(shared_browser)
+        return shared_browser
+
+    async def _release_shared_browser(self, shared_browser: SharedBrowser):
+        """Give back a context slot, closing the process once no instance uses it."""
+        unused = self._detach_shared_browser(shared_browser)
+        if unused is not None:
+            await unused.close()
+
+    def _destroy_instance(self, instance: BrowserInstance, reason: str):
+        """Take an instance out of the pool and close it in the background.
+
+        Only the bookkeeping happens here, with ``self._lock`` held; closing
+        the context and browser process runs in a task so a slow or hung
+        Chromium never blocks other acquires and releases. shutdown() waits
+        for these tasks.
+        """
+        self.metrics.record_eviction(reason)
+        self.all_instances.pop(instance.instance_id, None)
+        # Crash/disconnect events fired while closing are expected now
+        instance.status = InstanceStatus.CLEANUP
+
+        unused_browser = None
+        if instance.shared_browser is not None:
+            unused_browser = self._detach_shared_browser(instance.shared_browser)
+        if self._memory_limits_enabled():
+            self._update_memory_throttle()
+        self._request_replenish()
+
+        task = asyncio.get_running_loop().create_task(self._close_instance(instance, unused_browser))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    async def _close_instance(self, instance: BrowserInstance, unused_browser: SharedBrowser | None):
+        """Close a destroyed instance, and its shared process once nothing else uses it."""
         try:
             await instance._cleanup()
-            self.all_instances.pop(instance.instance_id, None)
             self.logger.debug(f"Destroyed browser instance {instance.instance_id}")
         except Exception as e:
             self.logger.error(f"Error destroying browser instance {instance.instance_id}", error=e)
-    
-    async def acquire(self, headless: bool = True, timeout: int = 30) -> BrowserInstance:
-        """Acquire a browser instance from the pool."""
-        config = BrowserInstanceConfig(headless=headless)
-        
+        finally:
+            instance.shared_browser = None
+            if unused_browser is not None:
+                await unused_browser.close()
+
+    async def acquire(self, headless: bool = True, timeout: int = 30,
+                      config: BrowserInstanceConfig | None = None) -> BrowserInstance:
+        """Acquire a browser instance from the pool.
+
+        Only instances created with an equal config (viewport, user agent,
+        timeouts, ...) are reused. When the pool is full, an idle instance of
+        another config is retired to make room; failing that the caller joins
+        a FIFO queue. Queued callers are served in arrival order, each with the
+        next instance released if it matches, else a slot to launch one.
+
+        Args:
+            headless: Headless mode, used when no ``config`` is given
+            timeout: Seconds to wait for an instance
+            config: Full instance configuration
+
+        Raises:
+            TimeoutError: If no instance became available within ``timeout`` seconds
+        """
+        if config is None:
+            config = BrowserInstanceConfig(headless=headless)
+        start_time = time.time()
+        deadline = start_time + timeout
+
         async with self._lock:
-            # Try to find an available instance with matching config
-            for instance in self.available_instances[:]:
-                if (instance.config.headless == config.headless and 
-                    instance.is_healthy()):
-                    
-                    self.available_instances.remove(instance)
-                    await instance.acquire()
-                    self.active_instances[instance.instance_id] = instance
-                    
-                    self.logger.debug(f"Acquired existing browser instance {instance.instance_id}")
-                    return instance
-            
-            # Create new instance if pool not at capacity
-            if len(self.all_instances) < self.max_size:
-                instance = await self._create_instance(config)
-                await instance.acquire()
-                self.active_instances[instance.instance_id] = instance
-                
-                self.logger.info(f"Created and acquired new browser instance {instance.instance_id}")
+            instance = await self._take_available(config)
+            if instance is not None:
+                self._record_wait(start_time, instance)
+                self._request_replenish()
                 return instance
-            
-            # Pool is full, wait for an instance to become available
-            self.logger.warning("Browser pool is full, waiting for available instance")
-            
-        # Wait for an instance to become available (with timeout)
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            await asyncio.sleep(0.5)
-            
+
+            # Over the memory ceiling nothing new is launched, so retiring an
+            # idle instance of another config would only shrink the pool
+            launch = self._has_capacity() or (not self._memory_throttled and self._evict_idle())
+            if launch:
+                self._pending_launches += 1
+            else:
+                # Pool is full or throttled, queue up behind earlier waiters
+                self.logger.warning("Browser pool is full, waiting for available instance")
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append((config, waiter))
+
+        if launch:
+            instance = await self._launch_reserved(config)
+            self._record_wait(start_time, instance)
+            return instance
+
+        try:
+            instance = await asyncio.wait_for(waiter, timeout=max(0.0, deadline - time.time()))
+        except (TimeoutError, asyncio.CancelledError) as e:
+            await self._abandon_waiter(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.metrics.acquire_timeouts += 1
+                raise TimeoutError(
+                    f"Failed to acquire browser instance within {timeout} seconds"
+                ) from None
+            raise
+
+        if instance is None:
+            # Capacity was freed and a launch slot reserved for us
+            instance = await self._launch_reserved(config)
+        self._record_wait(start_time, instance)
+        return instance
+
+    async def _take_available(self, config: BrowserInstanceConfig) -> BrowserInstance | None:
+        """Take an available instance matching ``config``, if there is one.
+
+        Must be called with ``self._lock`` held.
+        """
+        bucket = self._available.get(config)
+        while bucket:
+            instance = bucket.pop()
+            if not bucket:
+                del self._available[config]
+            if not instance.is_healthy():
+                self._destroy_instance(instance, "unhealthy")
+                continue
+
+            await instance.acquire()
+            self.active_instances[instance.instance_id] = instance
+
+            self.logger.debug(f"Acquired existing browser instance {instance.instance_id}")
+            return instance
+
+        return None
+
+    def _evict_idle(self) -> bool:
+        """Retire the least recently used available instance to free a slot.
+
+        Only called when the pool is full and nothing matching is available,
+        so any available instance has a different config. Must be called with
+        ``self._lock`` held.
+        """
+        idle = self.available_instances
+        if not idle:
+            return False
+
+        instance = min(idle, key=lambda i: i.last_used)
+        self._remove_available(instance)
+        self._destroy_instance(instance, "config_swap")
+        self.logger.info(f"Retired idle browser instance {instance.instance_id} to launch another config")
+        return True
+
+    @property
+    def available_instances(self) -> list[BrowserInstance]:
+        """All available instances across config buckets."""
+        return [instance for bucket in self._available.values() for instance in bucket]
+
+    def _add_available(self, instance: BrowserInstance):
+        """Park an instance in its config bucket."""
+        self._available.setdefault(instance.config, deque()).append(instance)
+
+    def _remove_available(self, instance: BrowserInstance):
+        """Take an instance out of its config bucket."""
+        bucket = self._available.get(instance.config)
+        if bucket is None:
+            return
+        try:
+            bucket.remove(instance)
+        except ValueError:
+            pass
+        if not bucket:
+            del self._available[instance.config]
+
+    async def _launch_reserved(self, config: BrowserInstanceConfig) -> BrowserInstance:
+        """Launch an instance into a slot reserved by the caller and acquire it."""
+        try:
+            instance = await self._create_instance(config)
+        except BaseException:
             async with self._lock:
-                if self.available_instances:
-                    instance = self.available_instances.pop(0)
-                    if instance.is_healthy():
-                        await instance.acquire()
-                        self.active_instances[instance.instance_id] = instance
-                        return instance
-                    else:
-                        # Instance is unhealthy, destroy it
-                        await self._destroy_instance(instance)
-        
-        raise TimeoutError(f"Failed to acquire browser instance within {timeout} seconds")
-    
+                self._pending_launches -= 1
+                # The reserved slot is free again; let a queued caller use it
+                self._wake_next_waiter(None)
+            raise
+
+        async with self._lock:
+            self._pending_launches -= 1
+            if not self._register_launched(instance):
+                raise RuntimeError("Browser pool is shutting down")
+            await instance.acquire()
+            self.active_instances[instance.instance_id] = instance
+
+        self.logger.info(f"Created and acquired new browser instance {instance.instance_id}")
+        return instance
+
+    def _register_launched(self, instance: BrowserInstance) -> bool:
+        """Add a freshly launched instance to the pool.
+
+        A launch that finishes after shutdown() started is destroyed instead,
+        so its browser process doesn't outlive the pool. Must be called with
+        ``self._lock`` held.
+        """
+        if self._shutdown:
+            self._destroy_instance(instance, "shutdown")
+            return False
+        self.all_instances[instance.instance_id] = instance
+        return True
+
+    async def _abandon_waiter(self, waiter: asyncio.Future):
+        """Drop a timed-out or cancelled waiter without losing a handed-over instance."""
+        async with self._lock:
+            for entry in self._waiters:
+                if entry[1] is waiter:
+                    self._waiters.remove(entry)
+                    break
+
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                instance = waiter.result()
+                if instance is not None:
+                    # The instance arrived just as the waiter gave up; pass it on
+                    self.active_instances.pop(instance.instance_id, None)
+                    instance.status = InstanceStatus.AVAILABLE
+                    await self._return_instance(instance)
+                else:
+                    # Give up the launch slot reserved for this waiter
+                    self._pending_launches -= 1
+                    self._wake_next_waiter(None)
+
+    def _request_replenish(self):
+        """Wake the cleanup worker to top up pre-warmed instances."""
+        if self.min_size or self.warm_size:
+            self._replenish_needed.set()
+
+    def _record_wait(self, start_time: float, instance: BrowserInstance):
+        """Record how long an acquire() call waited and whether it reused an instance."""
+        wait = time.time() - start_time
+        self._acquire_wait_times.append(wait)
+        self.metrics.record_acquire(wait, reused=instance.use_count > 1)
+
+    def _head_waiter(self) -> tuple[BrowserInstanceConfig, asyncio.Future] | None:
+        """The oldest waiter that is still waiting, dropping finished ones ahead of it."""
+        while self._waiters:
+            entry = self._waiters[0]
+            if not entry[1].done():
+                return entry
+            self._waiters.popleft()
+        return None
+
+    def _wake_next_waiter(self, result: BrowserInstance | None) -> bool:
+        """Resolve the oldest pending waiter with an instance, or hand it a freed slot.
+
+        With ``result`` None the launch slot is reserved in ``_pending_launches``
+        on the waiter's behalf; nobody is woken while the pool has no capacity.
+        """
+        if result is None and not self._has_capacity():
+            return False
+        entry = self._head_waiter()
+        if entry is None:
+            return False
+        self._waiters.popleft()
+        if result is None:
+            self._pending_launches += 1
+        entry[1].set_result(result)
+        return True
+
+    async def _return_instance(self, instance: BrowserInstance):
+        """Hand a healthy, reset instance to the oldest waiter or park it as available.
+
+        Waiters are served strictly in arrival order: if the oldest one wants
+        another config, the instance is retired and the freed slot reserved
+        for that waiter to launch what it needs, even when a later waiter
+        could have used the instance as is. Must be called with
+        ``self._lock`` held.
+        """
+        entry = self._head_waiter()
+        if entry is None:
+            self._add_available(instance)
+            self.logger.debug(f"Released browser instance {instance.instance_id} back to pool")
+            return
+
+        if entry[0] != instance.config:
+            self._destroy_instance(instance, "config_swap")
+            self._wake_next_waiter(None)
+            return
+
+        await instance.acquire()
+        self.active_instances[instance.instance_id] = instance
+        self._wake_next_waiter(instance)
+        self.logger.debug(f"Handed browser instance {instance.instance_id} to waiting caller")
+
     async def release(self, instance: BrowserInstance):
-        """Release a browser instance back to the pool."""
+        """Release a browser instance back to the pool.
+
+        The instance is reset (new context, cleared storage or navigation)
+        without the pool lock held, so concurrent acquires and releases don't
+        queue behind it; the lock is only taken to hand the reset instance on.
+        """
         async with self._lock:
             if instance.instance_id not in self.active_instances:
                 self.logger.warning(f"Attempting to release unknown instance {instance.instance_id}")
                 return
-            
-            # Remove from active instances
+
+            # Remove from active instances; it is neither active nor available while resetting
             self.active_instances.pop(instance.instance_id, None)
-            
+            self._resetting.add(instance.instance_id)
+
+        reset_error = None
+        try:
+            await instance.release()
+        except Exception as e:
+            reset_error = e
+
+        async with self._lock:
+            self._resetting.discard(instance.instance_id)
+            if instance.instance_id not in self.all_instances:
+                # Destroyed meanwhile (pool shutdown)
+                return
+
             try:
-                await instance.release()
-                
-                # Add back to available instances if healthy
-                if instance.is_healthy():
-                    self.available_instances.append(instance)
-                    self.logger.debug(f"Released browser instance {instance.instance_id} back to pool")
+                if reset_error is not None:
+                    raise reset_error
+                if instance.last_reset_duration is not None:
+                    self._reset_times.append(instance.last_reset_duration)
+                    self.metrics.reset_time.observe(instance.last_reset_duration)
+
+                # Hand back to a waiter (or the available list) if healthy
+                if instance.recycle_requested:
+                    # Over its memory limit while in use; replace it with a fresh one
+                    self._destroy_instance(instance, "memory")
+                    self.memory_recycled += 1
+                    self.logger.info(f"Recycled browser instance {instance.instance_id} over its memory limit")
+                    self._wake_next_waiter(None)
+                elif instance.is_healthy():
+                    await self._return_instance(instance)
                 else:
-                    # Instance is unhealthy, destroy it
-                    await self._destroy_instance(instance)
+                    # Instance is unhealthy, destroy it and let a waiter launch a new one
+                    self._destroy_instance(instance, "unhealthy")
                     self.logger.info(f"Destroyed unhealthy browser instance {instance.instance_id}")
-                    
+                    self._wake_next_waiter(None)
+
             except Exception as e:
                 self.logger.error(f"Error releasing browser instance {instance.instance_id}", error=e)
-                await self._destroy_instance(instance)
-    
-    async def get_stats(self) -> Dict[str, int]:
+                self._destroy_instance(instance, "release_error")
+                self._wake_next_waiter(None)
+
+    async def get_stats(self) -> dict[str, Any]:
         """Get pool statistics."""
         async with self._lock:
+            wait_times = list(self._acquire_wait_times)
             return {
                 "total_instances": len(self.all_instances),
                 "available_instances": len(self.available_instances),
                 "active_instances": len(self.active_instances),
-                "max_size": self.max_size
+                "max_size": self.max_size,
+                "min_size": self.min_size,
+                "warm_size": self.warm_size,
+                "contexts_per_browser": self.contexts_per_browser,
+                "browser_processes": (
+                    len(self.shared_browsers) if self.contexts_per_browser > 1
+                    else len(self.all_instances)
+                ),
+                "pending_launches": self._pending_launches,
+                "total_rss_mb": round(self.total_rss_mb, 1),
+                "memory_throttled": self._memory_throttled,
+                "memory_recycled": self.memory_recycled,
+                "dead_evicted": self.dead_evicted,
+                "reset_strategy": self.reset_strategy,
+                "reset_avg_ms": (sum(self._reset_times) / len(self._reset_times) * 1000) if self._reset_times else 0.0,
+                "config_buckets": len(self._available),
+                "waiting_callers": sum(1 for _, w in self._waiters if not w.done()),
+                "acquire_wait_avg_ms": (sum(wait_times) / len(wait_times) * 1000) if wait_times else 0.0,
+                "acquire_wait_max_ms": max(wait_times) * 1000 if wait_times else 0.0
+            }
+
+    async def get_metrics_snapshot(self) -> dict[str, Any]:
+        """Point-in-time view of pool stats, launch/acquire metrics and every instance.
+
+        Returns:
+            Dict with ``stats`` (as from get_stats), ``metrics`` (histograms,
+            reuse ratio, evictions by reason, failures) and ``instances`` (one
+            entry per live instance with its use count and age)
+        """
+        stats = await self.get_stats()
+        async with self._lock:
+            instances = [
+                {
+                    "instance_id": instance.instance_id,
+                    "status": instance.status.value,
+                    "use_count": instance.use_count,
+                    "age": instance.get_age(),
+                    "idle_time": instance.get_idle_time(),
+                    "headless": instance.config.headless,
+                    "rss_mb": instance.rss_mb,
+                    "js_heap_mb": instance.js_heap_mb,
+                    "dead_reason": instance.dead_reason,
+                }
+                for instance in self.all_instances.values()
+            ]
+            return {
+                "timestamp": time.time(),
+                "stats": stats,
+                "metrics": self.metrics.snapshot(),
+                "instances": instances,
             }
-    
+
+    async def render_prometheus(self) -> str:
+        """Current metrics in Prometheus text exposition format."""
+        return render_prometheus(await self.get_metrics_snapshot())
+
     @asynccontextmanager
     async def browser_instance(self, headless: bool = True, timeout: int = 30):
         """Context manager for acquiring and releasing browser instances."""
@@ -409,34 +1406,56 @@ class BrowserPool:
             yield instance
         finally:
             await self.release(instance)
-    
+
     async def shutdown(self):
         """Shutdown the browser pool and clean up all resources."""
         self.logger.info("Shutting down browser pool")
         self._shutdown = True
-        
-        # Cancel cleanup task
+        self._replenish_needed.set()
+
+        # Let the cleanup worker finish its current pass and background
+        # evictions/replacements run out rather than cancelling them mid-launch,
+        # which would leak the half-started browser; anything they launch from
+        # now on is destroyed instead of registered
         if self._cleanup_task and not self._cleanup_task.done():
-            self._cleanup_task.cancel()
             try:
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
-        
+        await asyncio.gather(*list(self._background_tasks), return_exceptions=True)
+
         async with self._lock:
+            # Fail anyone still queued for an instance
+            while self._waiters:
+                _, waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(RuntimeError("Browser pool is shutting down"))
+
             # Destroy all instances
             all_instances = list(self.all_instances.values())
             for instance in all_instances:
-                await self._destroy_instance(instance)
-            
-            self.available_instances.clear()
+                self._destroy_instance(instance, "shutdown")
+
+            self._available.clear()
             self.active_instances.clear()
             self.all_instances.clear()
-        
+
+        # Wait for launches still in flight (they destroy what they launched)
+        # and for every destroyed instance to finish closing
+        await self._launches_idle.wait()
+        while self._closing_tasks:
+            await asyncio.gather(*list(self._closing_tasks), return_exceptions=True)
+
+        # Close shared browser processes left over from failed instances
+        shared_browsers = list(self.shared_browsers)
+        self.shared_browsers.clear()
+        for shared_browser in shared_browsers:
+            await shared_browser.close()
+
         # Close Playwright
         if self.playwright_instance:
             await self.playwright_instance.stop()
             self.playwright_instance = None
-        
+
         self.logger.info("Browser pool shutdown complete")
 
@@ -11,7 +11,13 @@ from collections import deque
 import pathlib  # Added for file reading
 
 # Import log server function
-from .log_server import send_log
+from ..utils.log_server import has_viewers, send_log
+from ..utils.llm_cache import get_llm_cache
+from ..utils.llm_utils import get_llm
+from ..utils.port_utils import allocate_port, release_port, cdp_url
+from ..utils.screenshot_store import DEFAULT_SCREENSHOT_DIR, get_screenshot_store
+from .profile_template import ensure_profile_template, launch_from_template
+from .screencast import DEFAULT_SCREENCAST_PROFILE, ScreencastStreamer, screencast_params
 
 # Import Playwright types
 from playwright.async_api import (
@@ -29,7 +35,6 @@ from browser_use.browser.browser import Browser, BrowserConfig
 from browser_use.browser.context import BrowserContext  # Import BrowserContext
 
 # Langchain/MCP imports
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.globals import set_verbose
 
 # Original method will be stored here
@@ -49,7 +54,7 @@ original_create_context: Optional[callable] = None  # Store original patched met
 active_cdp_session = None  # Store active CDP session for input handling
 active_screencast_running = False  # Track if screencast is running
 browser_task_loop = None  # Store the asyncio loop used by run_browser_task
-screenshot_task = None  # Store the periodic screenshot task
+active_screencast = None  # ScreencastStreamer of the running task
 
 # Define the maximum number of logs/requests to keep
 MAX_LOG_ENTRIES = 1000  # Increased from 10 to allow more log entries
@@ -103,6 +108,8 @@ console_log_storage: deque = deque(maxlen=MAX_LOG_ENTRIES)
 network_request_storage: deque = deque(maxlen=MAX_LOG_ENTRIES)
 
 # --- Screenshot Storage (Global within this module) ---
+# One entry per agent step; "screenshot" is a ScreenshotRef into the on-disk
+# store, read and base64-encoded only when a consumer needs the image
 screenshot_storage: List[Dict[str, Any]] = []
 
 
@@ -118,6 +125,8 @@ async def _handle_console_message(message):
             "timestamp": asyncio.get_event_loop().time(),
         }
         console_log_storage.append(log_entry)
+        if not has_viewers():
+            return  # Stored for the report; nobody is watching the live log
 
         # Check if message has a failure attribute
         if hasattr(message, "failure") and message.failure:
@@ -177,6 +186,8 @@ async def _handle_request(request):
             "id": id(request),
         }
         network_request_storage.append(request_entry)
+        if not has_viewers():
+            return
         send_log(
             f"NET REQ [{request_entry['method']}]: {request_entry['url']}",
             "➡️",
@@ -223,7 +234,8 @@ async def _handle_response(response):
                 req["response_headers"] = headers
                 req["response_body_size"] = body_size
                 req["response_timestamp"] = asyncio.get_event_loop().time()
-                send_log(f"NET RESP [{status}]: {url} (JSON)", "⬅️", log_type="network")
+                if has_viewers():
+                    send_log(f"NET RESP [{status}]: {url} (JSON)", "⬅️", log_type="network")
                 break
         else:
             send_log(
@@ -414,7 +426,7 @@ def pause_agent():
         agent_instance.pause()
         send_log("Agent paused", "⏸️", log_type="status")
         # Send agent state update to frontend
-        from .log_server import socketio
+        from ..utils.log_server import socketio
 
         socketio.emit("agent_state", {"state": {"paused": True, "stopped": False}})
         return True
@@ -428,7 +440,7 @@ def resume_agent():
         agent_instance.resume()
         send_log("Agent resumed", "▶️", log_type="status")
         # Send agent state update to frontend
-        from .log_server import socketio
+        from ..utils.log_server import socketio
 
         socketio.emit("agent_state", {"state": {"paused": False, "stopped": False}})
         return True
@@ -442,7 +454,7 @@ def stop_agent():
         agent_instance.stop()
         send_log("Agent stopped", "⏹️", log_type="status")
         # Send agent state update to frontend
-        from .log_server import socketio
+        from ..utils.log_server import socketio
 
         socketio.emit("agent_state", {"state": {"paused": False, "stopped": True}})
         return True
@@ -462,7 +474,7 @@ def get_agent_state():
 
     # Send agent state update to frontend
     try:
-        from .log_server import socketio
+        from ..utils.log_server import socketio
 
         socketio.emit("agent_state", {"state": state})
     except Exception:
@@ -515,8 +527,7 @@ async def handle_browser_input(event_type: str, details: Dict) -> None:
         if event_type == "click":
             # CDP expects separate press and release events for a click
             button = details.get("button", "left")
-            x = details.get("x", 0)
-            y = details.get("y", 0)
+            x, y = _frame_to_page(details.get("x", 0), details.get("y", 0))
             click_count = details.get("clickCount", 1)
             # Modifiers might be needed for complex interactions, but start simple
             modifiers = 0  # TODO: Map ctrlKey, shiftKey etc. if needed
@@ -647,8 +658,7 @@ async def handle_browser_input(event_type: str, details: Dict) -> None:
 
         elif event_type == "scroll":
             # Use dispatchMouseEvent with type 'mouseWheel'
-            x = details.get("x", 0)
-            y = details.get("y", 0)
+            x, y = _frame_to_page(details.get("x", 0), details.get("y", 0))
             delta_x = details.get("deltaX", 0)
             delta_y = details.get("deltaY", 0)
 
@@ -697,6 +707,13 @@ async def handle_browser_input(event_type: str, details: Dict) -> None:
                 active_cdp_session = None
 
 
+def _frame_to_page(x: float, y: float):
+    """Map dashboard coordinates on a (possibly downscaled) frame to the page."""
+    if active_screencast is None:
+        return x, y
+    return active_screencast.to_page_coordinates(x, y)
+
+
 def _map_modifiers(details: Dict) -> int:
     """Maps modifier keys from frontend details to CDP modifier bitmask."""
     modifiers = 0
@@ -737,9 +754,13 @@ def _get_persisted_state() -> Optional[str]:
 
 
 async def run_browser_task(
-    task: str, tool_call_id: str = None, api_key: str = None, headless: bool = True
+    task: str,
+    tool_call_id: str = None,
+    api_key: str = None,
+    headless: bool = True,
+    screencast_profile: str | None = None,
 ) -> Dict[str, Any]:
-    global browser_task_loop, screenshot_task
+    global browser_task_loop, active_screencast
     # Store the current asyncio loop for input handling
     browser_task_loop = asyncio.get_running_loop()
     """
@@ -749,6 +770,8 @@ async def run_browser_task(
         task: The task to run.
         tool_call_id: The tool call ID for API headers.
         api_key: The API key for authentication.
+        screencast_profile: Encoding of the dashboard's live view (see
+            SCREENCAST_PROFILES); defaults to $WEB_EVAL_SCREENCAST_PROFILE or "balanced".
 
     Returns:
         str: Agent's final result (stringified).
@@ -774,6 +797,8 @@ async def run_browser_task(
     playwright = None
     playwright_browser = None
     agent_browser = None  # browser-use Browser instance
+    cdp_port = None  # Remote debugging port reserved for this run
+    template_browser = None  # Chromium started from a profile template, if configured
     local_original_create_context = (
         None  # To store original method for this run's finally block
     )
@@ -795,17 +820,37 @@ async def run_browser_task(
         _original_bring_to_front = PlaywrightPage.bring_to_front
         PlaywrightPage.bring_to_front = _no_bring_to_front
 
+        # Resolve the screencast profile up front so a bad name fails the run early
+        screencast_profile = (
+            screencast_profile
+            or os.getenv("WEB_EVAL_SCREENCAST_PROFILE")
+            or DEFAULT_SCREENCAST_PROFILE
+        )
+        screencast_params(screencast_profile)
+
         # --- Initialize Playwright Directly ---
         playwright = await async_playwright().start()
-        # Launch with CDP enabled
-        playwright_browser = await playwright.chromium.launch(
-            headless=headless,  # Use the provided headless parameter
-            args=["--remote-debugging-port=9222"],
-        )
+        profile_template_dir = os.getenv("WEB_EVAL_PROFILE_TEMPLATE")
+        if profile_template_dir:
+            # Start from a clone of a pre-initialised profile (built on first use)
+            await ensure_profile_template(playwright, profile_template_dir)
+            template_browser = await launch_from_template(
+                playwright, profile_template_dir, headless=headless
+            )
+            playwright_browser = template_browser.browser
+            browser_cdp_url = template_browser.cdp_url
+        else:
+            # Launch with CDP enabled on a port reserved for this run
+            cdp_port = allocate_port()
+            playwright_browser = await playwright.chromium.launch(
+                headless=headless,  # Use the provided headless parameter
+                args=[f"--remote-debugging-port={cdp_port}"],
+            )
+            browser_cdp_url = cdp_url(cdp_port)
 
         # Get the CDP URL from the browser
         send_log(
-            f"Playwright initialized for task with CDP (headless={headless}).",
+            f"Playwright initialized for task with CDP at {browser_cdp_url} (headless={headless}).",
             "🎭",
             log_type="status",
         )  # Type: status
@@ -821,7 +866,7 @@ async def run_browser_task(
 
         # --- Create browser-use Browser ---
         browser_config = BrowserConfig(
-            disable_security=True, headless=headless, cdp_url="http://127.0.0.1:9222"
+            disable_security=True, headless=headless, cdp_url=browser_cdp_url
         )
         agent_browser = Browser(config=browser_config)
         agent_browser.playwright = playwright
@@ -853,152 +898,32 @@ async def run_browser_task(
                     "❌",
                     log_type="status",
                 )
-                import traceback
-
                 raise  # Re-raise to be caught by outer try/except
 
-            # Set up a listener for screencast frames
-            async def handle_screencast_frame(params):
-                if "data" not in params:
-                    return
-
-                if "sessionId" not in params:
-                    return
-
-                try:
-                    # Format as data URL
-                    image_data = params["data"]
-                    image_data_url = f"data:image/jpeg;base64,{image_data}"
-
-                    # Send to frontend via SocketIO
-                    try:
-                        from .log_server import send_browser_view
-                    except ImportError:
-                        return
-
-                    try:
-                        await send_browser_view(image_data_url)
-                    except Exception:
-                        pass
-
-                    # Acknowledge the frame
-                    try:
-                        await cdp_session.send(
-                            "Page.screencastFrameAck",
-                            {"sessionId": params["sessionId"]},
-                        )
-                    except Exception:
-                        pass
-                except Exception:
-                    pass
-
-            # Define async wrapper function for screencast frame event
-            cdp_session.on("Page.screencastFrame", handle_screencast_frame)
-
-            # Start the screencast
+            # The screencast is the only frame source: Chromium sends frames
+            # when the page changes, paced by the dashboard's acknowledgements
+            active_screencast = ScreencastStreamer(
+                cdp_session, screencast_profile, browser=playwright_browser
+            )
             try:
-                await cdp_session.send(
-                    "Page.startScreencast",
-                    {
-                        "format": "png",
-                        "quality": 100,
-                        "maxWidth": 1920,
-                        "maxHeight": 1080,
-                    },
-                )
+                await active_screencast.start()
             except Exception as start_error:
                 send_log(
                     f"Failed to start screencast: {start_error}",
                     "❌",
                     log_type="status",
                 )
-                import traceback
-
                 raise  # Re-raise to be caught by outer try/except
 
-            # Test if we can take a screenshot directly
-            try:
-                screenshot_bytes = await first_page.screenshot(type="jpeg")
-
-                # Try sending this screenshot directly
-                import base64
-
-                screenshot_b64 = base64.b64encode(screenshot_bytes).decode("utf-8")
-                direct_image_url = f"data:image/jpeg;base64,{screenshot_b64}"
-
-                from .log_server import send_browser_view
-
-                await send_browser_view(direct_image_url)
-            except Exception:
-                import traceback
-
+            active_screencast_running = True
             send_log(
                 "CDP screencast started for browser-use browser.",
                 "📹",
                 log_type="status",
             )
 
-            # Define the periodic screenshot capture function
-            async def capture_screenshots(page, interval=1 / 30):
-                """Capture screenshots at the specified interval in seconds (30 FPS)."""
-                global active_screencast_running
-                send_log(
-                    "Starting periodic screenshot capture at 30 FPS",
-                    "🎬",
-                    log_type="status",
-                )
-                try:
-                    while active_screencast_running:
-                        try:
-                            # Take a screenshot
-                            screenshot_bytes = await page.screenshot(
-                                type="jpeg", quality=80
-                            )
-
-                            # Convert to base64
-                            screenshot_b64 = base64.b64encode(screenshot_bytes).decode(
-                                "utf-8"
-                            )
-
-                            # Format as data URL
-                            screenshot_data_url = (
-                                f"data:image/jpeg;base64,{screenshot_b64}"
-                            )
-
-                            # Send to frontend
-                            from .log_server import send_browser_view
-
-                            await send_browser_view(screenshot_data_url)
-
-                        except Exception as e:
-                            if not active_screencast_running:
-                                break
-                            # Don't log every error to avoid spamming
-                            if (
-                                "Target closed" in str(e)
-                                or "Session closed" in str(e)
-                                or "Connection closed" in str(e)
-                            ):
-                                active_screencast_running = False
-                                break
-
-                        # Wait for the next interval
-                        await asyncio.sleep(interval)
-                except asyncio.CancelledError:
-                    send_log(
-                        "Periodic screenshot capture stopped", "🛑", log_type="status"
-                    )
-                except Exception as e:
-                    send_log(f"Screenshot capture error: {e}", "❌", log_type="status")
-
-            # Start the screenshot capture task
-            active_screencast_running = True
-            if headless:
-                screenshot_task = asyncio.create_task(capture_screenshots(first_page))
-
         except Exception as e:
             send_log(f"Failed to start CDP screencast: {e}", "❌", log_type="status")
-            import traceback
 
         # --- Patch BrowserContext._create_context ---
         # Store original only if not already stored (first run)
@@ -1093,11 +1018,14 @@ async def run_browser_task(
                 f"Generated tool_call_id: {tool_call_id}", "🆔", log_type="status"
             )  # Type: status
 
-        # --- LLM Setup ---
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-pro",
-            google_api_key=api_key,
-            temperature=0.1,
+        # --- LLM Setup (shared client, reused across MCP calls) ---
+        llm_cache_dir = os.getenv("WEB_EVAL_LLM_CACHE_DIR")
+        llm_cache = get_llm_cache(llm_cache_dir) if llm_cache_dir else None
+        llm = get_llm("gemini-1.5-pro", api_key, temperature=0.1, cache=llm_cache)
+
+        # --- Step Screenshots (content-addressed, identical frames stored once) ---
+        screenshot_store = get_screenshot_store(
+            os.getenv("WEB_EVAL_SCREENSHOT_DIR", DEFAULT_SCREENSHOT_DIR)
         )
         send_log(
             f"LLM ({llm.model}) configured.", "🤖", log_type="status"
@@ -1124,13 +1052,15 @@ async def run_browser_task(
                         screenshot_bytes = await current_page.screenshot(
                             type="jpeg", quality=80
                         )
-                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode(
-                            "utf-8"
+                        # Writing (and the store's periodic trim) is disk I/O;
+                        # keep it off the event loop the agent runs on
+                        screenshot_ref = await asyncio.to_thread(
+                            screenshot_store.put, screenshot_bytes, "image/jpeg"
                         )
 
                         # Log screenshot size for debugging
                         send_log(
-                            f"Screenshot captured: {len(screenshot_bytes)} bytes, {len(screenshot_base64)} base64 chars",
+                            f"Screenshot captured: {screenshot_ref.size} bytes ({screenshot_ref.digest[:12]})",
                             "📊",
                             log_type="status",
                         )
@@ -1141,7 +1071,7 @@ async def run_browser_task(
                                 "step": step_number,
                                 "url": browser_state.url,
                                 "timestamp": asyncio.get_event_loop().time(),
-                                "screenshot": screenshot_base64,
+                                "screenshot": screenshot_ref,
                             }
                         )
 
@@ -1181,9 +1111,11 @@ async def run_browser_task(
                     log_type="status",
                 )
 
-            # Ensure agent_output is a string before logging
-            output_str = str(agent_output)
-            send_log(f"Agent Output: {output_str}", "💬", log_type="agent")
+            # Ensure agent_output is a string before logging; skip the
+            # conversion when no dashboard would show it
+            if has_viewers():
+                output_str = str(agent_output)
+                send_log(f"Agent Output: {output_str}", "💬", log_type="agent")
 
         # --- Initialize and Run Agent ---
         agent = Agent(
@@ -1211,7 +1143,7 @@ async def run_browser_task(
         if screenshot_storage:
             for i, screenshot in enumerate(screenshot_storage):
                 send_log(
-                    f"Screenshot {i + 1}: Step {screenshot['step']}, {len(screenshot['screenshot'])} base64 chars",
+                    f"Screenshot {i + 1}: Step {screenshot['step']}, {screenshot['screenshot'].size} bytes",
                     "🔢",
                     log_type="status",
                 )
@@ -1229,15 +1161,12 @@ async def run_browser_task(
         return {"result": error_message, "screenshots": screenshot_storage}
     finally:
         # --- Cleanup ---
-        # Cancel the screenshot task if it's running
-        if screenshot_task:
-            screenshot_task.cancel()
-            try:
-                await screenshot_task
-            except asyncio.CancelledError:
-                pass
-            screenshot_task = None
-            send_log("Periodic screenshot task canceled", "🧹", log_type="status")
+        # Stop streaming frames to the dashboard
+        if active_screencast:
+            await active_screencast.stop()
+            active_screencast = None
+            active_screencast_running = False
+            send_log("CDP screencast stopped", "🧹", log_type="status")
 
         # Restore the original bring_to_front method
         if _original_bring_to_front:
@@ -1257,6 +1186,10 @@ async def run_browser_task(
             send_log(
                 "Agent browser resources cleaned up.", "🧹", log_type="status"
             )  # Type: status
+        # Stop the profile-template browser and delete its profile clone
+        if template_browser:
+            await template_browser.close()
+            template_browser = None
         # Close the playwright instance started for this task
         if playwright:
             await playwright.stop()
@@ -1264,6 +1197,8 @@ async def run_browser_task(
             send_log(
                 "Playwright instance for task stopped.", "🧹", log_type="status"
             )  # Type: status
+        if cdp_port is not None:
+            release_port(cdp_port)
 
         # Clear the global instance if it was set
         agent_instance = None
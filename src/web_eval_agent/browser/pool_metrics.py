@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Metrics for the browser pool.
+
+Counters and histograms are updated by BrowserPool as it launches, hands out
+and evicts instances. ``render_prometheus`` turns a pool metrics snapshot into
+the Prometheus text exposition format served by the log server's /metrics
+endpoint.
+"""
+
+import bisect
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+# Histogram bucket upper bounds, in seconds
+LAUNCH_TIME_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0)
+ACQUIRE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+RESET_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative buckets."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Cumulative bucket counts keyed by upper bound, plus sum and count."""
+        cumulative = []
+        running = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts, strict=True):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+
+class PoolMetrics:
+    """Counters and histograms describing a BrowserPool's behaviour over time."""
+
+    def __init__(self):
+        self.launch_time = Histogram(LAUNCH_TIME_BUCKETS)
+        self.acquire_wait = Histogram(ACQUIRE_WAIT_BUCKETS)
+        self.reset_time = Histogram(RESET_TIME_BUCKETS)
+
+        self.launches = 0
+        self.launch_failures = 0
+        self.acquires_reused = 0  # Served by an instance that was used before
+        self.acquires_launched = 0  # Served by a freshly launched instance
+        self.acquire_timeouts = 0
+        self.evictions: Counter = Counter()  # Reason -> count
+
+    def record_launch(self, duration: float, failed: bool = False):
+        if failed:
+            self.launch_failures += 1
+            return
+        self.launches += 1
+        self.launch_time.observe(duration)
+
+    def record_acquire(self, wait: float, reused: bool):
+        self.acquire_wait.observe(wait)
+        if reused:
+            self.acquires_reused += 1
+        else:
+            self.acquires_launched += 1
+
+    def record_eviction(self, reason: str):
+        self.evictions[reason] += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.acquires_reused + self.acquires_launched
+        return self.acquires_reused / total if total else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "launches": self.launches,
+            "launch_failures": self.launch_failures,
+            "acquires_reused": self.acquires_reused,
+            "acquires_launched": self.acquires_launched,
+            "acquire_timeouts": self.acquire_timeouts,
+            "reuse_ratio": self.reuse_ratio,
+            "evictions": dict(self.evictions),
+            "launch_time_seconds": self.launch_time.snapshot(),
+            "acquire_wait_seconds": self.acquire_wait.snapshot(),
+            "reset_time_seconds": self.reset_time.snapshot(),
+        }
+
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus(snapshot: dict[str, Any], prefix: str = "web_eval_browser_pool",
+                      labels: dict[str, Any] | None = None) -> str:
+    """Render a BrowserPool metrics snapshot in Prometheus text format."""
+    labels = labels or {}
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples):
+        full_name = f"{prefix}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for suffix, sample_labels, value in samples:
+            lines.append(f"{full_name}{suffix}{_format_labels({**labels, **sample_labels})} {value}")
+
+    def histogram(name: str, help_text: str, data: dict[str, Any]):
+        samples = [("_bucket", {"le": bound}, count) for bound, count in data["buckets"]]
+        samples.append(("_sum", {}, data["sum"]))
+        samples.append(("_count", {}, data["count"]))
+        metric(name, "histogram", help_text, samples)
+
+    stats = snapshot["stats"]
+    metrics = snapshot["metrics"]
+
+    metric("instances", "gauge", "Browser instances by state", [
+        ("", {"state": "available"}, stats["available_instances"]),
+        ("", {"state": "active"}, stats["active_instances"]),
+        ("", {"state": "launching"}, stats["pending_launches"]),
+    ])
+    metric("max_size", "gauge", "Maximum number of browser instances", [("", {}, stats["max_size"])])
+    metric("browser_processes", "gauge", "Running browser processes",
+           [("", {}, stats["browser_processes"])])
+    metric("waiting_callers", "gauge", "Callers queued in acquire()",
+           [("", {}, stats["waiting_callers"])])
+    metric("rss_megabytes", "gauge", "Sampled resident memory of all pooled browsers",
+           [("", {}, stats["total_rss_mb"])])
+
+    metric("launches_total", "counter", "Browser instances launched", [("", {}, metrics["launches"])])
+    metric("launch_failures_total", "counter", "Browser instance launches that failed",
+           [("", {}, metrics["launch_failures"])])
+    metric("acquires_total", "counter", "Instances handed out, by whether they were reused", [
+        ("", {"source": "reused"}, metrics["acquires_reused"]),
+        ("", {"source": "launched"}, metrics["acquires_launched"]),
+    ])
+    metric("acquire_timeouts_total", "counter", "acquire() calls that timed out",
+           [("", {}, metrics["acquire_timeouts"])])
+    metric("reuse_ratio", "gauge", "Share of acquires served by a reused instance",
+           [("", {}, metrics["reuse_ratio"])])
+    metric("evictions_total", "counter", "Instances destroyed, by reason", [
+        ("", {"reason": reason}, count) for reason, count in sorted(metrics["evictions"].items())
+    ])
+
+    histogram("launch_time_seconds", "Time to launch a browser instance", metrics["launch_time_seconds"])
+    histogram("acquire_wait_seconds", "Time acquire() waited for an instance", metrics["acquire_wait_seconds"])
+    histogram("reset_time_seconds", "Time to reset an instance on release", metrics["reset_time_seconds"])
+
+    metric("instance_use_count", "gauge", "Times each live instance was acquired", [
+        ("", {"instance": i["instance_id"]}, i["use_count"]) for i in snapshot["instances"]
+    ])
+    metric("instance_age_seconds", "gauge", "Age of each live instance", [
+        ("", {"instance": i["instance_id"]}, round(i["age"], 3)) for i in snapshot["instances"]
+    ])
+
+    return "\n".join(lines) + "\n"
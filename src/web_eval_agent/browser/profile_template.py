@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+"""
+Pre-baked Chromium profile templates.
+
+A fresh user-data-dir makes Chromium do its first-run work (profile creation,
+preferences, component and font/shader caches) on every launch. A template is
+a user-data-dir that has been through that once, optionally with the login
+state saved by setup_browser_state (~/.operative/browser_state) baked in. Each
+browser launched from it gets its own clone, copied with reflinks
+(copy-on-write) where the filesystem supports them.
+
+Playwright refuses ``--user-data-dir`` in ``chromium.launch()``, so clones are
+started as a Chromium process of our own and attached with
+``connect_over_cdp``, which keeps the regular Browser API (new_context,
+disconnect events, CDP sessions) available to the pool.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import weakref
+from typing import Any
+
+from playwright.async_api import Browser
+
+DEFAULT_TEMPLATE_DIR = "~/.operative/profile_template"
+BROWSER_STATE_FILE = "~/.operative/browser_state/state.json"
+
+# Written last when a template is built; a directory without it is incomplete
+TEMPLATE_INFO_FILE = "web-eval-template.json"
+# Copy of the login state baked into the template, for new contexts
+TEMPLATE_STATE_FILE = "storage_state.json"
+
+# Per-process files that must not be carried into a clone
+_SKIP_FILES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "DevToolsActivePort"}
+
+_FICLONE = 0x40049409  # Linux ioctl: share the source file's extents
+_reflink_supported = True  # Cleared after the first filesystem that refuses
+
+# One lock per template directory, so concurrent launches don't rebuild it twice.
+# asyncio locks are bound to the loop that first waits on them, so they are
+# kept per loop and dropped together with their loop.
+_template_locks_by_loop: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _clone_file(src: str, dst: str) -> str:
+    """Copy one file, as a reflink when possible (shutil.copytree copy_function)."""
+    global _reflink_supported
+    if _reflink_supported:
+        try:
+            if sys.platform.startswith("linux"):
+                import fcntl
+                with open(src, "rb") as s, open(dst, "wb") as d:
+                    fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+                shutil.copystat(src, dst)
+                return dst
+            if sys.platform == "darwin":
+                libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0:
+                    return dst
+                raise OSError(ctypes.get_errno(), "clonefile failed")
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                # Source and destination are on different filesystems; that
+                # says nothing about reflinks within one, so only copy this file
+                return shutil.copy2(src, dst)
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS):
+                raise
+            _reflink_supported = False
+    return shutil.copy2(src, dst)
+
+
+def _ignore_process_files(directory: str, names: list[str]) -> list[str]:
+    return [name for name in names if name in _SKIP_FILES]
+
+
+def template_info(template_dir: str) -> dict[str, Any] | None:
+    """Metadata of a built template, or None if there is no complete template."""
+    path = os.path.join(os.path.expanduser(template_dir), TEMPLATE_INFO_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def template_storage_state(template_dir: str) -> str | None:
+    """Path of the login state baked into a template, if it has one."""
+    path = os.path.join(os.path.expanduser(template_dir), TEMPLATE_STATE_FILE)
+    return path if os.path.exists(path) else None
+
+
+def is_template_stale(template_dir: str, state_file: str | None = BROWSER_STATE_FILE) -> bool:
+    """Whether a template is missing or older than the login state it should carry."""
+    info = template_info(template_dir)
+    if info is None:
+        return True
+    state_path = os.path.expanduser(state_file) if state_file else None
+    if state_path and os.path.exists(state_path):
+        return info.get("state_mtime") != os.path.getmtime(state_path)
+    return info.get("state_mtime") is not None
+
+
+async def apply_storage_state(context, state: dict[str, Any]):
+    """Load cookies and localStorage from a Playwright storage state into a context."""
+    if state.get("cookies"):
+        await context.add_cookies(state["cookies"])
+
+    origins = [o for o in state.get("origins", []) if o.get("localStorage")]
+    if not origins:
+        return
+
+    # Serve an empty page for each origin so its localStorage can be written
+    # without touching the network
+    async def fulfill_blank(route):
+        await route.fulfill(status=200, content_type="text/html", body="<!doctype html>")
+
+    page = await context.new_page()
+    try:
+        for origin in origins:
+            pattern = origin["origin"].rstrip("/") + "/**"
+            await context.route(pattern, fulfill_blank)
+            try:
+                await page.goto(origin["origin"])
+                await page.evaluate(
+                    "items => items.forEach(i => localStorage.setItem(i.name, i.value))",
+                    origin["localStorage"],
+                )
+            finally:
+                await context.unroute(pattern, fulfill_blank)
+    finally:
+        await page.close()
+
+
+async def build_profile_template(playwright, template_dir: str = DEFAULT_TEMPLATE_DIR,
+                                 state_file: str | None = BROWSER_STATE_FILE) -> str:
+    """Create (or rebuild) a profile template.
+
+    Launches Chromium once on a new user-data-dir so its first-run work is done,
+    loads the login state from ``state_file`` if it exists, and moves the
+    result into ``template_dir``.
+
+    Returns:
+        str: The template directory
+    """
+    template_dir = os.path.expanduser(template_dir)
+    parent_dir = os.path.dirname(template_dir.rstrip(os.sep)) or "."
+    os.makedirs(parent_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=".profile-build-", dir=parent_dir)
+
+    state_path = os.path.expanduser(state_file) if state_file else None
+    state = None
+    if state_path and os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+
+    try:
+        context = await playwright.chromium.launch_persistent_context(build_dir, headless=True)
+        try:
+            page = context.pages[0] if context.pages else await context.new_page()
+            await page.goto("about:blank")
+            if state is not None:
+                await apply_storage_state(context, state)
+        finally:
+            await context.close()
+
+        if state is not None:
+            with open(os.path.join(build_dir, TEMPLATE_STATE_FILE), "w", encoding="utf-8") as f:
+                json.dump(state, f)
+        with open(os.path.join(build_dir, TEMPLATE_INFO_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": time.time(),
+                "state_file": state_path,
+                "state_mtime": os.path.getmtime(state_path) if state is not None else None,
+            }, f)
+
+        # Swap the finished template into place
+        shutil.rmtree(template_dir, ignore_errors=True)
+        try:
+            os.replace(build_dir, template_dir)
+        except OSError:
+            # Another process swapped in its own build first; keep that one
+            if template_info(template_dir) is None:
+                raise
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return template_dir
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+
+async def ensure_profile_template(playwright, template_dir: str = DEFAULT_TEMPLATE_DIR,
+                                  state_file: str | None = BROWSER_STATE_FILE) -> str:
+    """Return ``template_dir``, building it first if it is missing or stale."""
+    template_dir = os.path.expanduser(template_dir)
+    if not is_template_stale(template_dir, state_file):
+        return template_dir
+
+    locks = _template_locks_by_loop.setdefault(asyncio.get_running_loop(), {})
+    lock = locks.setdefault(template_dir, asyncio.Lock())
+    async with lock:
+        # Launches that queued behind the build find it done
+        if is_template_stale(template_dir, state_file):
+            await build_profile_template(playwright, template_dir, state_file)
+    return template_dir
+
+
+def clone_profile(template_dir: str) -> str:
+    """Copy a template into a new user-data-dir beside it and return its path.
+
+    The clone is created next to the template rather than in the system temp
+    directory, which is often another filesystem (tmpfs) where reflinks fail.
+    """
+    template_dir = os.path.expanduser(template_dir)
+    if template_info(template_dir) is None:
+        raise FileNotFoundError(f"No profile template at {template_dir}")
+
+    parent_dir = os.path.dirname(template_dir.rstrip(os.sep)) or "."
+    profile_dir = tempfile.mkdtemp(prefix=".profile-clone-", dir=parent_dir)
+    shutil.copytree(template_dir, profile_dir, dirs_exist_ok=True, symlinks=True,
+                    ignore=_ignore_process_files, copy_function=_clone_file)
+    return profile_dir
+
+
+class TemplateBrowser:
+    """
+    A Chromium process running on a clone of a profile template, attached over CDP.
+
+    ``close()`` disconnects Playwright, stops the process and deletes the clone.
+    """
+
+    def __init__(self, profile_dir: str, process: subprocess.Popen, browser: Browser, port: int):
+        self.profile_dir = profile_dir
+        self.process = process
+        self.browser = browser
+        self.port = port
+
+    @property
+    def cdp_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    async def close(self):
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        await _stop_process(self.process)
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+async def _stop_process(process: subprocess.Popen, timeout: float = 5.0):
+    if process.poll() is not None:
+        return
+    process.terminate()
+    deadline = time.time() + timeout
+    while process.poll() is None and time.time() < deadline:
+        await asyncio.sleep(0.05)
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+async def _wait_for_devtools_port(profile_dir: str, process: subprocess.Popen, timeout: float) -> int:
+    """Read the port Chromium picked for ``--remote-debugging-port=0``."""
+    port_file = os.path.join(profile_dir, "DevToolsActivePort")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Chromium exited with code {process.returncode} during startup")
+        try:
+            with open(port_file, encoding="utf-8") as f:
+                first_line = f.readline().strip()
+            if first_line:
+                return int(first_line)
+        except (OSError, ValueError):
+            pass
+        await asyncio.sleep(0.02)
+    raise TimeoutError(f"Chromium did not open a DevTools port within {timeout} seconds")
+
+
+async def launch_from_template(playwright, template_dir: str, headless: bool = True,
+                               args: list[str] | None = None, slow_mo: int = 0,
+                               timeout: float = 30.0) -> TemplateBrowser:
+    """Start Chromium on a fresh clone of ``template_dir`` and connect to it.
+
+    Args:
+        playwright: Running Playwright driver (supplies the Chromium binary)
+        template_dir: Profile template built by build_profile_template
+        headless: Run without a window
+        args: Extra Chromium flags
+        slow_mo: Slow down Playwright operations by this many milliseconds
+        timeout: Seconds to wait for Chromium to come up
+    """
+    # Without reflinks this is a full copy of the profile; keep it off the event loop
+    profile_dir = await asyncio.to_thread(clone_profile, template_dir)
+    command = [
+        playwright.chromium.executable_path,
+        f"--user-data-dir={profile_dir}",
+        "--remote-debugging-port=0",
+        "--no-first-run",
+        "--no-default-browser-check",
+        *(args or []),
+    ]
+    if headless:
+        command += ["--headless=new", "--hide-scrollbars", "--mute-audio"]
+    command.append("about:blank")
+
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        port = await _wait_for_devtools_port(profile_dir, process, timeout)
+        browser = await playwright.chromium.connect_over_cdp(
+            f"http://127.0.0.1:{port}", slow_mo=slow_mo, timeout=timeout * 1000
+        )
+    except BaseException:
+        await _stop_process(process)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    return TemplateBrowser(profile_dir, process, browser, port)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+"""
+CDP screencast streaming to the dashboard.
+
+Chromium sends a ``Page.screencastFrame`` only when the page has changed, and
+no further frame until the previous one is acknowledged. Acknowledging each
+frame only after the dashboard has acknowledged it turns that into end-to-end
+backpressure: the frame rate follows what the viewer can draw and drops to
+zero while nothing changes. While no dashboard is connected the screencast is
+stopped altogether, so Chromium captures and encodes nothing; it is restarted
+as soon as one connects.
+
+How frames are encoded is chosen with a screencast profile (see
+SCREENCAST_PROFILES); the streamer reports frame rate, bytes/sec and CPU use
+to the dashboard while it runs.
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from ..utils.log_server import (
+    add_viewer_listener,
+    has_viewers,
+    remove_viewer_listener,
+    send_browser_frame,
+    send_log,
+    send_screencast_stats,
+)
+
+# Page.startScreencast parameters by profile name. JPEG encodes far faster and
+# smaller than PNG; frames are scaled to fit maxWidth x maxHeight, and
+# everyNthFrame skips frames Chromium would otherwise send.
+SCREENCAST_PROFILES: dict[str, dict[str, Any]] = {
+    "low": {"format": "jpeg", "quality": 40, "maxWidth": 640, "maxHeight": 360, "everyNthFrame": 3},
+    "balanced": {"format": "jpeg", "quality": 60, "maxWidth": 960, "maxHeight": 540, "everyNthFrame": 1},
+    "high": {"format": "jpeg", "quality": 80, "maxWidth": 1920, "maxHeight": 1080, "everyNthFrame": 1},
+    "lossless": {"format": "png", "maxWidth": 1920, "maxHeight": 1080, "everyNthFrame": 1},
+}
+DEFAULT_SCREENCAST_PROFILE = "balanced"
+
+# Errors meaning the page or CDP session is gone and the stream is over
+_CLOSED_MARKERS = ("Target closed", "Session closed", "Connection closed")
+
+
+def screencast_params(profile: str | dict[str, Any] | None = None) -> dict[str, Any]:
+    """Resolve a profile name (or explicit parameters) to Page.startScreencast parameters.
+
+    Raises:
+        ValueError: If the profile name is unknown
+    """
+    if profile is None:
+        profile = DEFAULT_SCREENCAST_PROFILE
+    if isinstance(profile, dict):
+        return dict(profile)
+    try:
+        return dict(SCREENCAST_PROFILES[profile])
+    except KeyError:
+        raise ValueError(
+            f"Unknown screencast profile '{profile}', expected one of {tuple(SCREENCAST_PROFILES)}"
+        ) from None
+
+
+class ScreencastStreamer:
+    """
+    Streams one page's CDP screencast to the dashboard.
+
+    Args:
+        cdp_session: CDP session attached to the page
+        profile: Screencast profile name or explicit ``Page.startScreencast`` parameters
+        browser: Playwright Browser of the page; when given, its CPU use is reported
+        ack_timeout: Longest time to wait for a dashboard to acknowledge a frame
+        min_frame_interval: Frame pacing for dashboards that don't send acks
+        stats_interval: Seconds between stats updates sent to the dashboard
+    """
+
+    def __init__(self, cdp_session, profile: str | dict[str, Any] | None = None,
+                 browser=None, ack_timeout: float = 1.0, min_frame_interval: float = 0.1,
+                 stats_interval: float = 2.0):
+        self.cdp_session = cdp_session
+        self.profile_name = profile if isinstance(profile, str) else (
+            DEFAULT_SCREENCAST_PROFILE if profile is None else "custom"
+        )
+        self.screencast_params = screencast_params(profile)
+        self.browser = browser
+        self.ack_timeout = ack_timeout
+        self.min_frame_interval = min_frame_interval
+        self.stats_interval = stats_interval
+        self.running = False
+        self.capturing = False  # Page.startScreencast is in effect
+
+        # Set from the Socket.IO thread when dashboards come or go
+        self._viewers_changed: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._capture_lock = asyncio.Lock()
+        self._watch_task: asyncio.Task | None = None
+
+        # Totals since start(); the stats task derives rates from them
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.started_at: float | None = None
+        self.last_stats: dict[str, Any] = {}
+        self._stats_task: asyncio.Task | None = None
+        self._device_size: tuple[float, float] | None = None
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.screencast_params.get('format', 'png')}"
+
+    async def start(self):
+        """Subscribe to frames and start the screencast once a dashboard is connected."""
+        self.cdp_session.on("Page.screencastFrame", self._on_frame)
+        self.running = True
+        try:
+            await self._sync_capture()
+        except Exception:
+            self.running = False
+            self.cdp_session.remove_listener("Page.screencastFrame", self._on_frame)
+            raise
+        self.started_at = time.monotonic()
+
+        self._loop = asyncio.get_running_loop()
+        self._viewers_changed = asyncio.Event()
+        add_viewer_listener(self._on_viewers_changed)
+        # A dashboard may have come or gone between _sync_capture() and registering
+        self._viewers_changed.set()
+        self._watch_task = asyncio.create_task(self._watch_viewers())
+        self._stats_task = asyncio.create_task(self._report_stats())
+
+    async def stop(self):
+        """Stop the screencast; frames still in flight are dropped."""
+        if not self.running:
+            return
+        self.running = False
+        remove_viewer_listener(self._on_viewers_changed)
+        self.cdp_session.remove_listener("Page.screencastFrame", self._on_frame)
+
+        for task in (self._watch_task, self._stats_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._watch_task = self._stats_task = None
+
+        try:
+            await self._sync_capture()
+        except Exception:
+            self.capturing = False
+
+        stats = self.get_stats()
+        send_log(
+            f"Screencast ({self.profile_name}): {stats['frames']} frames, "
+            f"{stats['avg_bytes_per_sec'] / 1024:.1f} KB/s average",
+            "📊",
+            log_type="status",
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        """Totals since start() plus the most recent rates."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "profile": self.profile_name,
+            "frames": self.frames_sent,
+            "bytes": self.bytes_sent,
+            "avg_bytes_per_sec": self.bytes_sent / elapsed if elapsed > 0 else 0.0,
+            **self.last_stats,
+        }
+
+    def to_page_coordinates(self, x: float, y: float) -> tuple[float, float]:
+        """Map a point on a (possibly downscaled) frame to page coordinates."""
+        if self._device_size is None:
+            return x, y
+        device_width, device_height = self._device_size
+        scale = min(
+            1.0,
+            self.screencast_params.get("maxWidth", device_width) / device_width,
+            self.screencast_params.get("maxHeight", device_height) / device_height,
+        )
+        return x / scale, y / scale
+
+    def _on_viewers_changed(self):
+        # Runs on the Socket.IO thread
+        loop, event = self._loop, self._viewers_changed
+        if loop is not None and event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    async def _sync_capture(self):
+        """Start or stop Chromium's screencast so it runs exactly while someone is watching."""
+        async with self._capture_lock:
+            wanted = self.running and has_viewers()
+            if wanted and not self.capturing:
+                await self.cdp_session.send("Page.startScreencast", self.screencast_params)
+                self.capturing = True
+            elif not wanted and self.capturing:
+                self.capturing = False
+                await self.cdp_session.send("Page.stopScreencast")
+
+    async def _watch_viewers(self):
+        while self.running:
+            await self._viewers_changed.wait()
+            self._viewers_changed.clear()
+            try:
+                await self._sync_capture()
+            except Exception as e:
+                if any(marker in str(e) for marker in _CLOSED_MARKERS):
+                    self.running = False
+                    return
+                send_log(f"Failed to {'resume' if has_viewers() else 'pause'} screencast: {e}", "❌",
+                         log_type="status")
+
+    async def _on_frame(self, params: dict[str, Any]):
+        image_data = params.get("data")
+        session_id = params.get("sessionId")
+        if not self.running or image_data is None or session_id is None:
+            return
+
+        metadata = params.get("metadata") or {}
+        if metadata.get("deviceWidth") and metadata.get("deviceHeight"):
+            self._device_size = (metadata["deviceWidth"], metadata["deviceHeight"])
+
+        start_time = time.monotonic()
+        acked = False
+        # With no dashboard the frame is dropped (the watcher is about to stop the
+        # screencast), but still acked: if a dashboard reconnects before the stop,
+        # capture is left running and Chromium must not be waiting on this frame
+        if has_viewers():
+            # Passed on as base64; decoded once for binary clients, wrapped for data URL ones
+            acked = await send_browser_frame(image_data, self.mime_type, ack_timeout=self.ack_timeout)
+            self.frames_sent += 1
+            self.bytes_sent += len(image_data) * 3 // 4  # Encoded image size, before base64
+        if not acked:
+            # The dashboard doesn't acknowledge frames (or there is none); pace them instead
+            await asyncio.sleep(max(0.0, self.min_frame_interval - (time.monotonic() - start_time)))
+        if not self.running:
+            return
+
+        try:
+            await self.cdp_session.send("Page.screencastFrameAck", {"sessionId": session_id})
+        except Exception as e:
+            if any(marker in str(e) for marker in _CLOSED_MARKERS):
+                self.running = False
+
+    async def _browser_cpu_time(self, session) -> float | None:
+        """Total CPU seconds used by all of the browser's processes."""
+        try:
+            info = await session.send("SystemInfo.getProcessInfo")
+        except Exception:
+            return None
+        return sum(process.get("cpuTime", 0.0) for process in info.get("processInfo", []))
+
+    async def _report_stats(self):
+        """Send frame rate, bytes/sec and CPU use to the dashboard every stats_interval."""
+        browser_session = None
+        if self.browser is not None:
+            try:
+                browser_session = await self.browser.new_browser_cdp_session()
+            except Exception:
+                browser_session = None
+
+        last_time = time.monotonic()
+        last_frames, last_bytes = self.frames_sent, self.bytes_sent
+        last_process_cpu = time.process_time()
+        last_browser_cpu = await self._browser_cpu_time(browser_session) if browser_session else None
+        try:
+            while self.running:
+                await asyncio.sleep(self.stats_interval)
+                if not self.capturing:
+                    # Nothing to measure or report; resume from a fresh baseline
+                    last_time = None
+                    continue
+                if last_time is None:
+                    last_time = time.monotonic()
+                    last_frames, last_bytes = self.frames_sent, self.bytes_sent
+                    last_process_cpu = time.process_time()
+                    last_browser_cpu = (await self._browser_cpu_time(browser_session)
+                                        if browser_session else None)
+                    continue
+                now = time.monotonic()
+                elapsed = now - last_time
+                process_cpu = time.process_time()
+                browser_cpu = await self._browser_cpu_time(browser_session) if browser_session else None
+
+                self.last_stats = {
+                    "fps": (self.frames_sent - last_frames) / elapsed,
+                    "bytes_per_sec": (self.bytes_sent - last_bytes) / elapsed,
+                    # CPU of this process: forwarding frames to the dashboard
+                    "agent_cpu_percent": (process_cpu - last_process_cpu) / elapsed * 100,
+                    # CPU of every browser process: rendering and encoding frames
+                    "browser_cpu_percent": (
+                        (browser_cpu - last_browser_cpu) / elapsed * 100
+                        if browser_cpu is not None and last_browser_cpu is not None else None
+                    ),
+                }
+                send_screencast_stats(self.get_stats())
+
+                last_time = now
+                last_frames, last_bytes = self.frames_sent, self.bytes_sent
+                last_process_cpu, last_browser_cpu = process_cpu, browser_cpu
+        finally:
+            if browser_session is not None:
+                try:
+                    await browser_session.detach()
+                except Exception:
+                    pass
@@ -14,7 +14,7 @@ from typing import Optional
 
 from .instruction_parser import InstructionParser
 from .test_executor import TestExecutor
-from .config import Config
+from .config import Config, FAIL_FAST_EVENTS
 from ..utils.utils import setup_logging, validate_url, check_dependencies
 from ..reporting.reporter import Reporter
 
@@ -31,6 +31,11 @@ Examples:
   web-eval --url https://example.com --instructions tests/form-test.md --output report.html
   web-eval --url http://localhost:3000 --instructions tests/e2e.md --timeout 300
   web-eval --url http://localhost:3000 --instructions tests/ui.md --no-headless
+  web-eval --url http://localhost:3000 --instructions tests/e2e.md --workers 4
+  web-eval --url http://localhost:3000 --instructions tests/e2e.md --processes 4 --workers 2
+  web-eval --url http://localhost:3000 --instructions tests/e2e.md --replay
+  web-eval --url http://localhost:3000 --instructions tests/e2e.md --llm-cache .web-eval/llm-cache
+  web-eval --url http://localhost:3000 --instructions tests/e2e.md --fail-fast-on pageerror,5xx
         """
     )
     
@@ -82,6 +87,89 @@ Examples:
         help="Test timeout in seconds (default: 300)"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of scenarios to run concurrently, each in its own browser context (default: 1)"
+    )
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Shard scenarios across N worker processes, each with its own browser; "
+             "--workers then applies per process (default: 1)"
+    )
+
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Retry a scenario up to N times in a fresh context when it fails on a browser "
+             "error (a closed target or a timed-out Playwright operation, not the scenario's "
+             "own --timeout); 0 disables retries (default: 3)"
+    )
+
+    parser.add_argument(
+        "--duration-history",
+        default="~/.operative/scenario_durations.json",
+        help="File recording scenario durations, used to run the slowest scenarios first "
+             "when --workers or --processes is above 1 (default: ~/.operative/scenario_durations.json)"
+    )
+
+    parser.add_argument(
+        "--no-duration-history",
+        action="store_const",
+        const=None,
+        dest="duration_history",
+        help="Do not read or record scenario durations; run scenarios in file order"
+    )
+
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Record the agent's actions for passing scenarios so later runs can --replay them"
+    )
+
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Replay recorded actions without the LLM, falling back to the agent when a "
+             "selector or validation diverges (implies --record to refresh traces)"
+    )
+
+    parser.add_argument(
+        "--replay-dir",
+        default=".web-eval/replays",
+        help="Directory holding recorded action traces (default: .web-eval/replays)"
+    )
+
+    parser.add_argument(
+        "--fail-fast-on",
+        default="",
+        metavar="EVENTS",
+        help="Comma-separated page events that stop a scenario immediately and fail it: "
+             f"{', '.join(FAIL_FAST_EVENTS)} (default: none). 5xx only counts responses "
+             "to page navigations, not subresources or XHR/fetch calls"
+    )
+
+    parser.add_argument(
+        "--llm-cache",
+        metavar="DIR",
+        help="Cache LLM responses on disk, keyed by prompt and page state, and reuse them "
+             "on later runs"
+    )
+
+    parser.add_argument(
+        "--llm-cache-size",
+        type=int,
+        default=200,
+        metavar="MB",
+        help="Size limit of the LLM response cache before least-recently-used entries "
+             "are evicted (default: 200)"
+    )
+
     parser.add_argument(
         "--browser",
         choices=["chromium", "firefox", "webkit"],
@@ -140,6 +228,30 @@ def validate_arguments(args) -> bool:
         print("❌ Error: Gemini API key required. Set GEMINI_API_KEY environment variable or use --api-key")
         return False
     
+    # Validate worker count
+    if args.workers < 1:
+        print(f"❌ Error: --workers must be at least 1 (got {args.workers})")
+        return False
+
+    if args.processes < 1:
+        print(f"❌ Error: --processes must be at least 1 (got {args.processes})")
+        return False
+
+    if args.max_retries < 0:
+        print(f"❌ Error: --max-retries cannot be negative (got {args.max_retries})")
+        return False
+
+    fail_fast_events = [e.strip().lower() for e in args.fail_fast_on.split(",") if e.strip()]
+    unknown_events = [e for e in fail_fast_events if e not in FAIL_FAST_EVENTS]
+    if unknown_events:
+        print(f"❌ Error: Unknown --fail-fast-on event(s): {', '.join(unknown_events)}. "
+              f"Choose from {', '.join(FAIL_FAST_EVENTS)}")
+        return False
+
+    if args.llm_cache_size < 1:
+        print(f"❌ Error: --llm-cache-size must be at least 1 MB (got {args.llm_cache_size})")
+        return False
+
     # Validate viewport format
     if args.viewport and "x" not in args.viewport:
         print(f"❌ Error: Invalid viewport format '{args.viewport}'. Use format like '1280x720'")
@@ -159,6 +271,16 @@ async def run_tests(args) -> int:
             report_format=args.format,
             headless=args.headless,
             timeout=args.timeout,
+            workers=args.workers,
+            processes=args.processes,
+            max_retries=args.max_retries,
+            duration_history_file=args.duration_history,
+            record_replay=args.record,
+            replay=args.replay,
+            replay_dir=args.replay_dir,
+            fail_fast_on=[e for e in args.fail_fast_on.split(",") if e.strip()],
+            llm_cache_dir=args.llm_cache,
+            llm_cache_max_mb=args.llm_cache_size,
             browser=args.browser,
             viewport=args.viewport,
             api_key=args.api_key or os.getenv("GEMINI_API_KEY"),
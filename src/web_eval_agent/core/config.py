@@ -2,64 +2,97 @@
 Configuration management for Web Eval Agent
 """
 
-from dataclasses import dataclass
-from typing import Optional, Tuple
 import os
+from dataclasses import dataclass, field
+
+# Page events that can stop a scenario early (see ``Config.fail_fast_on``)
+FAIL_FAST_EVENTS = ("pageerror", "console-error", "5xx")
 
 
 @dataclass
 class Config:
     """Configuration class for Web Eval Agent."""
-    
+
     # Required settings
     url: str
     instructions_file: str
     api_key: str
-    
+
     # Output settings
     output_file: str = "web-eval-report.html"
     report_format: str = "html"
     report_detail_level: str = "detailed"  # Options: "summary", "detailed", "verbose"
-    
+
     # Browser settings
     browser: str = "chromium"
     headless: bool = False
     viewport: str = "1280x720"
     timeout: int = 300
-    
+
+    # Execution settings
+    workers: int = 1  # Number of scenarios run concurrently per process
+    processes: int = 1  # Number of worker processes, each with its own browser
+    duration_history_file: str | None = "~/.operative/scenario_durations.json"  # None disables
+
+    # Record/replay settings
+    record_replay: bool = False  # Save action traces of passing agent runs
+    replay: bool = False  # Replay saved traces, falling back to the agent on divergence
+    replay_dir: str = ".web-eval/replays"
+
+    # Stop a scenario as soon as one of these events is captured (see FAIL_FAST_EVENTS)
+    fail_fast_on: list[str] = field(default_factory=list)
+
+    # LLM response cache settings
+    llm_cache_dir: str | None = None  # None disables the cache
+    llm_cache_max_mb: int = 200
+
     # Logging settings
     verbose: bool = False
     debug: bool = False
-    
+
     # Advanced settings
-    max_retries: int = 3
+    max_retries: int = 3  # Retries of scenarios failing on browser/network errors
     screenshot_on_failure: bool = True
     capture_network: bool = True
     capture_console: bool = True
-    
+
     def __post_init__(self):
         """Validate and process configuration after initialization."""
         # Ensure URL has protocol
         if not self.url.startswith(("http://", "https://")):
             self.url = "https://" + self.url
-        
+
         # Set API key in environment for compatibility
         if self.api_key:
             os.environ["GEMINI_API_KEY"] = self.api_key
             os.environ["GOOGLE_API_KEY"] = self.api_key
-        
+
+        # At least one worker is always needed
+        if self.workers < 1:
+            self.workers = 1
+        if self.processes < 1:
+            self.processes = 1
+        if self.max_retries < 0:
+            self.max_retries = 0
+
+        # Accept "5XX", " console-error" etc. and drop unknown events
+        self.fail_fast_on = [
+            event for event in (e.strip().lower() for e in self.fail_fast_on)
+            if event in FAIL_FAST_EVENTS
+        ]
+
         # Disable telemetry
         os.environ["ANONYMIZED_TELEMETRY"] = "false"
-    
+
     @property
-    def viewport_size(self) -> Tuple[int, int]:
+    def viewport_size(self) -> tuple[int, int]:
         """Parse viewport string into width, height tuple."""
         try:
             width, height = self.viewport.split("x")
             return int(width), int(height)
         except (ValueError, AttributeError):
             return 1280, 720
-    
+
     def get_browser_config(self) -> dict:
         """Get browser configuration dictionary."""
         return {
@@ -68,7 +101,7 @@ class Config:
             "viewport": {"width": self.viewport_size[0], "height": self.viewport_size[1]},
             "timeout": self.timeout * 1000,  # Convert to milliseconds
         }
-    
+
     def get_logging_level(self) -> str:
         """Get appropriate logging level based on settings."""
         if self.debug:
@@ -0,0 +1,236 @@
+"""
+Record/replay support for Web Eval Agent
+
+Records the browser actions an agent took for a scenario (from browser-use's
+AgentHistoryList) and re-executes them directly through Playwright on later
+runs, skipping the LLM entirely. Any action whose target can't be found raises
+ReplayDivergenceError so the executor can fall back to a normal agent run.
+
+The executor's own validations are mostly generic, so a trace also records the
+page the agent finished on; a replay that ends anywhere else has diverged.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ..utils.utils import sanitize_filename
+from .instruction_parser import TestScenario
+
+# Bump when the trace file layout changes; older traces are ignored
+TRACE_VERSION = 2
+
+# Actions that only read the page and can be skipped on replay
+READ_ONLY_ACTIONS = {"extract_content", "done", "get_dropdown_options"}
+
+
+class ReplayDivergenceError(Exception):
+    """Raised when a recorded action can no longer be replayed on the page."""
+
+
+@dataclass
+class ReplayAction:
+    """One recorded browser action."""
+    name: str
+    params: dict[str, Any] = field(default_factory=dict)
+    css_selector: str | None = None
+    xpath: str | None = None
+
+
+@dataclass
+class ReplayTrace:
+    """The recorded actions for one scenario."""
+    scenario_name: str
+    fingerprint: str
+    actions: list[ReplayAction]
+    final_url: str | None = None  # Page the recorded agent run finished on
+    version: int = TRACE_VERSION
+    recorded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+def scenario_fingerprint(scenario: TestScenario, url: str) -> str:
+    """Hash everything that should invalidate a recording when it changes."""
+    payload = json.dumps({
+        "url": url,
+        "description": scenario.description,
+        "steps": scenario.steps,
+        "validations": scenario.validations,
+        "expected_outcomes": scenario.expected_outcomes,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def actions_from_history(agent_result) -> list[ReplayAction]:
+    """Convert a browser-use AgentHistoryList into replayable actions."""
+    actions = []
+    model_actions = agent_result.model_actions() if hasattr(agent_result, "model_actions") else []
+
+    for entry in model_actions:
+        entry = dict(entry)
+        element = entry.pop("interacted_element", None)
+        if not entry:
+            continue
+
+        name, params = next(iter(entry.items()))
+        actions.append(ReplayAction(
+            name=name,
+            params=params if isinstance(params, dict) else {},
+            css_selector=getattr(element, "css_selector", None),
+            xpath=getattr(element, "xpath", None),
+        ))
+
+    return actions
+
+
+def final_url_from_history(agent_result) -> str | None:
+    """Return the last page URL a browser-use AgentHistoryList visited."""
+    urls = agent_result.urls() if hasattr(agent_result, "urls") else []
+    return next((url for url in reversed(urls) if url), None)
+
+
+def same_page(url: str, other: str) -> bool:
+    """Compare page URLs, ignoring the fragment and a trailing slash."""
+    def normalize(value: str) -> str:
+        return value.split("#", 1)[0].rstrip("/")
+    return normalize(url) == normalize(other)
+
+
+class ReplayStore:
+    """Stores one JSON trace per scenario in a directory."""
+
+    def __init__(self, replay_dir: str):
+        self.replay_dir = Path(os.path.expanduser(replay_dir))
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, scenario: TestScenario) -> Path:
+        return self.replay_dir / f"{sanitize_filename(scenario.name)}.json"
+
+    def load(self, scenario: TestScenario, url: str) -> ReplayTrace | None:
+        """Return the scenario's trace if one exists and is still current."""
+        path = self._path(scenario)
+        if not path.exists():
+            return None
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            trace = ReplayTrace(
+                scenario_name=data["scenario_name"],
+                fingerprint=data["fingerprint"],
+                actions=[ReplayAction(**action) for action in data["actions"]],
+                final_url=data.get("final_url"),
+                version=data.get("version", 0),
+                recorded_at=data.get("recorded_at", ""),
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable replay trace {path}: {e}")
+            return None
+
+        if trace.version != TRACE_VERSION or trace.fingerprint != scenario_fingerprint(scenario, url):
+            self.logger.info(f"Replay trace for '{scenario.name}' is stale, ignoring it")
+            return None
+
+        return trace
+
+    def save(self, scenario: TestScenario, url: str, actions: list[ReplayAction],
+             final_url: str | None = None):
+        """Write a trace for the scenario, replacing any previous one."""
+        trace = ReplayTrace(
+            scenario_name=scenario.name,
+            fingerprint=scenario_fingerprint(scenario, url),
+            actions=actions,
+            final_url=final_url,
+        )
+        path = self._path(scenario)
+        try:
+            self.replay_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(asdict(trace), indent=2, default=str), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not save replay trace to {path}: {e}")
+
+
+class ReplayRunner:
+    """Re-executes recorded actions on a Playwright page."""
+
+    def __init__(self, page, action_timeout: float = 5.0):
+        self.page = page
+        self.action_timeout_ms = action_timeout * 1000
+
+    def _locator(self, action: ReplayAction):
+        if action.css_selector:
+            return self.page.locator(action.css_selector).first
+        if action.xpath:
+            xpath = action.xpath if action.xpath.startswith("/") else f"/{action.xpath}"
+            return self.page.locator(f"xpath={xpath}").first
+        raise ReplayDivergenceError(f"No selector recorded for '{action.name}'")
+
+    async def run(self, actions: list[ReplayAction]) -> list[str]:
+        """Replay every action and return report-style step lines.
+
+        Raises:
+            ReplayDivergenceError: If an action's target is missing or the action fails
+        """
+        steps = []
+        for i, action in enumerate(actions, 1):
+            try:
+                description = await self._run_action(action)
+            except ReplayDivergenceError:
+                raise
+            except Exception as e:
+                raise ReplayDivergenceError(f"Step {i} ({action.name}) failed: {e}") from e
+
+            if description:
+                steps.append(f"🔁 {i}. {description}")
+        return steps
+
+    async def _run_action(self, action: ReplayAction) -> str | None:
+        params = action.params
+        timeout = self.action_timeout_ms
+
+        if action.name == "open_tab":
+            # Later actions ran in the new tab; the runner drives a single page
+            raise ReplayDivergenceError("Opening a new tab cannot be replayed")
+
+        if action.name == "go_to_url":
+            await self.page.goto(params["url"], wait_until="load", timeout=timeout * 3)
+            return f"Navigate → {params['url']}"
+
+        if action.name == "go_back":
+            await self.page.go_back(timeout=timeout)
+            return "Navigate → back"
+
+        if action.name == "click_element":
+            await self._locator(action).click(timeout=timeout)
+            return f"Click → {action.css_selector or action.xpath}"
+
+        if action.name == "input_text":
+            await self._locator(action).fill(params.get("text", ""), timeout=timeout)
+            return f"Type → {action.css_selector or action.xpath}"
+
+        if action.name == "select_dropdown_option":
+            await self._locator(action).select_option(label=params.get("text"), timeout=timeout)
+            return f"Select → {params.get('text')}"
+
+        if action.name == "send_keys":
+            await self.page.keyboard.press(params["keys"])
+            return f"Keys → {params['keys']}"
+
+        if action.name in ("scroll_down", "scroll_up"):
+            amount = params.get("amount") or 500
+            await self.page.mouse.wheel(0, amount if action.name == "scroll_down" else -amount)
+            return f"Scroll → {amount}px"
+
+        if action.name == "wait":
+            await self.page.wait_for_timeout(params.get("seconds", 1) * 1000)
+            return f"Wait → {params.get('seconds', 1)}s"
+
+        if action.name in READ_ONLY_ACTIONS:
+            return None
+
+        raise ReplayDivergenceError(f"Action '{action.name}' cannot be replayed")
@@ -0,0 +1,102 @@
+"""
+Scenario duration history for Web Eval Agent
+
+Remembers how long each scenario took on previous runs so the executor can
+schedule the slowest scenarios first (longest-processing-time-first) and keep
+the tail of a parallel run short.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from .instruction_parser import TestScenario
+
+# Weight given to the newest measurement when smoothing durations
+SMOOTHING_FACTOR = 0.5
+
+# Used to rank scenarios that have no recorded duration yet
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def hash_instruction_file(filepath: str) -> str:
+    """Return a short content hash of an instruction file."""
+    try:
+        content = Path(filepath).read_bytes()
+    except OSError:
+        content = filepath.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+class DurationHistory:
+    """Per-scenario durations persisted as JSON, keyed by file hash and scenario name."""
+
+    def __init__(self, history_file: str, instructions_file: str):
+        self.history_file = Path(os.path.expanduser(history_file))
+        self.file_hash = hash_instruction_file(instructions_file)
+        self.logger = logging.getLogger(__name__)
+        self._durations: dict[str, float] = {}
+        self._load()
+
+    def _key(self, scenario_name: str) -> str:
+        return f"{self.file_hash}:{scenario_name}"
+
+    def _load(self):
+        """Load recorded durations, ignoring a missing or corrupt file."""
+        if not self.history_file.exists():
+            return
+        try:
+            data = json.loads(self.history_file.read_text(encoding="utf-8"))
+            self._durations = {k: float(v) for k, v in data.get("durations", {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable duration history {self.history_file}: {e}")
+            self._durations = {}
+
+    def save(self):
+        """Write the history back to disk."""
+        try:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.history_file.with_suffix(self.history_file.suffix + ".tmp")
+            tmp_path.write_text(json.dumps({"durations": self._durations}, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.history_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save duration history to {self.history_file}: {e}")
+
+    def get(self, scenario_name: str) -> float | None:
+        """Return the smoothed duration for a scenario, if one was recorded."""
+        return self._durations.get(self._key(scenario_name))
+
+    def record(self, scenario_name: str, duration: float):
+        """Fold a new measurement into the smoothed duration."""
+        if duration <= 0:
+            return
+        key = self._key(scenario_name)
+        previous = self._durations.get(key)
+        if previous is None:
+            self._durations[key] = duration
+        else:
+            self._durations[key] = SMOOTHING_FACTOR * duration + (1 - SMOOTHING_FACTOR) * previous
+
+    def estimate(self, scenarios: list[TestScenario]) -> dict[str, float]:
+        """Estimate a duration for every scenario.
+
+        Scenarios without history get the mean of the known durations (or 1.0
+        when nothing is known) so they still spread evenly across workers.
+        """
+        known = [d for d in (self.get(s.name) for s in scenarios) if d is not None]
+        default = sum(known) / len(known) if known else 1.0
+        return {s.name: (self.get(s.name) or default) for s in scenarios}
+
+    def order(self, indexed: list[tuple[int, TestScenario]]) -> list[tuple[int, TestScenario]]:
+        """Order (index, scenario) pairs longest-first, breaking ties by priority."""
+        estimates = self.estimate([scenario for _, scenario in indexed])
+        return sorted(
+            indexed,
+            key=lambda item: (
+                -estimates[item[1].name],
+                -PRIORITY_RANK.get(item[1].priority, PRIORITY_RANK["medium"]),
+                item[0],
+            )
+        )
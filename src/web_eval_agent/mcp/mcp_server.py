@@ -54,7 +54,8 @@ else:
     print("Error: No API key provided. Please set the GEMINI_API_KEY environment variable.")
 
 @mcp.tool(name=BrowserTools.WEB_EVAL_AGENT)
-async def web_eval_agent(url: str, task: str, ctx: Context, headless_browser: bool = False) -> list[TextContent]:
+async def web_eval_agent(url: str, task: str, ctx: Context, headless_browser: bool = False,
+                         screencast_profile: str | None = None) -> list[TextContent]:
     """Evaluate the user experience / interface of a web application.
 
     This tool allows the AI to assess the quality of user experience and interface design
@@ -71,6 +72,10 @@ async def web_eval_agent(url: str, task: str, ctx: Context, headless_browser: bo
              Be as detailed as possible in your task description. It could be anywhere from 2 sentences to 2 paragraphs.
         headless_browser: Optional. Whether to hide the browser window popup during evaluation.
         If headless_browser is True, only the operative control center browser will show, and no popup browser will be shown.
+        screencast_profile: Optional. Encoding of the live browser view in the control center:
+            "low" (jpeg q40, 640px, every 3rd frame), "balanced" (jpeg q60, 960px, default),
+            "high" (jpeg q80, 1920px) or "lossless" (png, 1920px). Defaults to the
+            WEB_EVAL_SCREENCAST_PROFILE environment variable, then "balanced".
 
     Returns:
         list[list[TextContent, ImageContent]]: A detailed evaluation of the web application's UX/UI, including
@@ -89,7 +94,8 @@ async def web_eval_agent(url: str, task: str, ctx: Context, headless_browser: bo
         # Generate a new tool_call_id for this specific tool call
         tool_call_id = str(uuid.uuid4())
         return await handle_web_evaluation(
-            {"url": url, "task": task, "headless": headless, "tool_call_id": tool_call_id},
+            {"url": url, "task": task, "headless": headless, "tool_call_id": tool_call_id,
+             "screencast_profile": screencast_profile},
             ctx,
             api_key
         )
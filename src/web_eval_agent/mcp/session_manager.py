@@ -16,8 +16,9 @@ import weakref
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
-from .logging_config import StructuredLogger, LogContext, create_session_context, get_logger
-from .browser_pool import BrowserPool, BrowserInstance
+from ..utils.logging_config import StructuredLogger, LogContext, create_session_context, get_logger
+from ..browser.browser_pool import BrowserPool, BrowserInstance, BrowserInstanceConfig
+from ..utils.log_server import register_metrics_source, unregister_metrics_source
 
 
 class SessionStatus(Enum):
@@ -36,6 +37,9 @@ class SessionConfig:
     url: str
     task: str
     headless: bool = True
+    viewport_width: int = 1920
+    viewport_height: int = 1080
+    user_agent: str | None = None
     timeout: int = 300  # 5 minutes default
     max_retries: int = 3
     github_repo: Optional[str] = None
@@ -44,6 +48,15 @@ class SessionConfig:
     user_id: Optional[str] = None
     api_key: str = ""
     
+    def to_browser_config(self) -> BrowserInstanceConfig:
+        """Browser settings used to pick a matching pooled instance."""
+        return BrowserInstanceConfig(
+            headless=self.headless,
+            viewport_width=self.viewport_width,
+            viewport_height=self.viewport_height,
+            user_agent=self.user_agent
+        )
+
     def to_log_context(self, session_id: str) -> LogContext:
         """Convert to logging context."""
         return LogContext(
@@ -112,8 +125,8 @@ class EvaluationSession:
             try:
                 # Get browser instance from pool
                 self.browser_instance = await browser_pool.acquire(
-                    headless=self.config.headless,
-                    timeout=30
+                    timeout=30,
+                    config=self.config.to_browser_config()
                 )
                 self.logger.info(f"Browser instance acquired for session {self.session_id}")
                 
@@ -198,9 +211,17 @@ class SessionManager:
     Provides session isolation, resource pooling, and lifecycle management.
     """
     
-    def __init__(self, max_concurrent_sessions: int = 5, browser_pool_size: int = 10):
+    def __init__(self, max_concurrent_sessions: int = 5, browser_pool_size: int = 10,
+                 browser_pool_min_size: int = 0, browser_pool_warm_size: int = 0,
+                 contexts_per_browser: int = 1):
         self.max_concurrent_sessions = max_concurrent_sessions
-        self.browser_pool = BrowserPool(max_size=browser_pool_size)
+        self.browser_pool = BrowserPool(
+            max_size=browser_pool_size,
+            min_size=browser_pool_min_size,
+            warm_size=browser_pool_warm_size,
+            contexts_per_browser=contexts_per_browser
+        )
+        register_metrics_source("browser_pool", self.browser_pool.render_prometheus)
         self.sessions: Dict[str, EvaluationSession] = {}
         self.active_sessions: Dict[str, EvaluationSession] = {}
         self.session_queue: asyncio.Queue = asyncio.Queue()
@@ -382,6 +403,7 @@ class SessionManager:
             await self.cancel_session(session_id)
         
         # Shutdown browser pool
+        unregister_metrics_source("browser_pool")
         await self.browser_pool.shutdown()
         
         self.logger.info("Session manager shutdown complete")
@@ -392,13 +414,19 @@ _global_session_manager: Optional[SessionManager] = None
 
 
 def get_session_manager(max_concurrent_sessions: int = 5, 
-                       browser_pool_size: int = 10) -> SessionManager:
+                       browser_pool_size: int = 10,
+                       browser_pool_min_size: int = 0,
+                       browser_pool_warm_size: int = 0,
+                       contexts_per_browser: int = 1) -> SessionManager:
     """Get or create global session manager instance."""
     global _global_session_manager
     if _global_session_manager is None:
         _global_session_manager = SessionManager(
             max_concurrent_sessions=max_concurrent_sessions,
-            browser_pool_size=browser_pool_size
+            browser_pool_size=browser_pool_size,
+            browser_pool_min_size=browser_pool_min_size,
+            browser_pool_warm_size=browser_pool_warm_size,
+            contexts_per_browser=contexts_per_browser
         )
     return _global_session_manager
 
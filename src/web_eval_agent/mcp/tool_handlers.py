@@ -76,6 +76,7 @@ async def handle_web_evaluation(arguments: Dict[str, Any], ctx: Context, api_key
     task = arguments["task"]
     tool_call_id = arguments.get("tool_call_id", str(uuid.uuid4()))
     headless = arguments.get("headless", True)
+    screencast_profile = arguments.get("screencast_profile")
 
     send_log(f"Handling web evaluation call with context: {ctx}", "🤔")
 
@@ -123,22 +124,14 @@ async def handle_web_evaluation(arguments: Dict[str, Any], ctx: Context, api_key
             evaluation_task,
             headless=headless, # Pass the headless parameter
             tool_call_id=tool_call_id,
-            api_key=api_key
+            api_key=api_key,
+            screencast_profile=screencast_profile
         )
         
         # Extract the final result string
         agent_final_result = agent_result_data.get("result", "No result provided")
         screenshots = agent_result_data.get("screenshots", []) # Added this line
 
-        # Log detailed screenshot information
-        send_log(f"Received {len(screenshots)} screenshots from run_browser_task", "📸")
-        for i, screenshot in enumerate(screenshots):
-            if 'screenshot' in screenshot and screenshot['screenshot']:
-                b64_length = len(screenshot['screenshot'])
-                send_log(f"Processing screenshot {i+1}: Step {screenshot.get('step', 'unknown')}, {b64_length} base64 chars", "🔢")
-            else:
-                send_log(f"Screenshot {i+1} missing 'screenshot' data! Keys: {list(screenshot.keys())}", "⚠️")
-
         # Log the number of screenshots captured
         send_log(f"📸 Captured {len(screenshots)} screenshots during evaluation", "📸")
 
@@ -172,18 +165,24 @@ async def handle_web_evaluation(arguments: Dict[str, Any], ctx: Context, api_key
     # Create the final response structure
     response = [TextContent(type="text", text=confirmation_text)]
     
-    # Debug the screenshot data structure one last time before adding to response
+    # Screenshots are references into the on-disk store; each image is read and
+    # base64-encoded only here, as its ImageContent is built, off the event loop
     for i, screenshot_data in enumerate(screenshots[1:]):
-        if 'screenshot' in screenshot_data and screenshot_data['screenshot']:
-            b64_length = len(screenshot_data['screenshot'])
-            send_log(f"Adding screenshot {i+1} to response ({b64_length} chars)", "➕")
-            response.append(ImageContent(
-                type="image",
-                data=screenshot_data["screenshot"],
-                mimeType="image/jpeg"
-            ))
-        else:
+        screenshot_ref = screenshot_data.get('screenshot')
+        if not screenshot_ref:
             send_log(f"Screenshot {i+1} can't be added to response - missing data!", "❌")
+            continue
+        try:
+            image_data = await asyncio.to_thread(screenshot_ref.to_base64)
+        except OSError as e:
+            send_log(f"Screenshot {i+1} can't be added to response - {e}", "❌")
+            continue
+        send_log(f"Adding screenshot {i+1} to response ({screenshot_ref.size} bytes)", "➕")
+        response.append(ImageContent(
+            type="image",
+            data=image_data,
+            mimeType=screenshot_ref.mime_type
+        ))
     
     send_log(f"Final response contains {len(response)} items ({len(response)-1} images)", "📦")
     
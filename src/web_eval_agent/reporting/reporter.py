@@ -462,6 +462,12 @@ class Reporter:
                     "passed": result.passed,
                     "duration": result.duration,
                     "error_message": result.error_message,
+                    "timed_out": result.timed_out,
+                    "replayed": result.replayed,
+                    "fail_fast_event": result.fail_fast_event,
+                    "attempts": result.attempts,
+                    "attempt_durations": result.attempt_durations,
+                    "flaky": result.flaky,
                     "validation_results": result.validation_results,
                     "console_logs": result.console_logs,
                     "network_requests": result.network_requests,
@@ -504,10 +510,21 @@ class Reporter:
             f"📈 Success Rate: {success_rate:.1f}%",
             f"🔧 Browser: {self.config.browser}",
             f"📱 Viewport: {self.config.viewport}",
-            f"⚡ Headless Mode: {'Yes' if self.config.headless else 'No'}",
-            ""
+            f"⚡ Headless Mode: {'Yes' if self.config.headless else 'No'}"
         ])
         
+        flaky_tests = [r.scenario_name for r in results.test_results if r.flaky]
+        if flaky_tests:
+            lines.append(f"🎲 Flaky Tests (passed on retry): {', '.join(flaky_tests)}")
+
+        llm_cache = summary.get('llm_cache')
+        if llm_cache:
+            lines.append(
+                f"🗄️  LLM Cache: {llm_cache['hits']} hits / {llm_cache['misses']} misses "
+                f"({llm_cache['hit_rate']:.1f}% hit rate)"
+            )
+        lines.append("")
+
         # Test Results Overview
         if results.test_results:
             lines.extend([
@@ -518,6 +535,8 @@ class Reporter:
             for i, result in enumerate(results.test_results, 1):
                 status_icon = "✅" if result.passed else "❌"
                 duration_str = format_duration(result.duration)
+                if result.attempts > 1:
+                    duration_str += f", {result.attempts} attempts"
                 lines.append(f"{i:2d}. {status_icon} {result.scenario_name} ({duration_str})")
                 
                 if result.error_message:
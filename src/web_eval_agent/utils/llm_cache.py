@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""
+On-disk LLM response cache.
+
+Plugs into LangChain's cache hook on the chat model, so every agent step whose
+prompt (which carries the page's DOM snapshot) matches an earlier call is
+answered from disk without a network round-trip. Entries are evicted
+least-recently-used once the cache directory exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+# Parts of a prompt that change between otherwise identical page states
+_VOLATILE_PATTERNS = [
+    re.compile(r"Current date and time: [^\\\n\"]*"),
+]
+
+# Check the directory size only every N writes to keep `update` cheap
+_EVICTION_CHECK_INTERVAL = 20
+
+
+def _strip_images(node: Any) -> Any:
+    """Drop image parts (screenshots) so the key depends on text and DOM only."""
+    if isinstance(node, dict):
+        if node.get("type") == "image_url":
+            return None
+        return {k: _strip_images(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [item for item in (_strip_images(v) for v in node) if item is not None]
+    return node
+
+
+def prompt_key(prompt: str, llm_string: str) -> str:
+    """Hash a serialized prompt and model settings into a cache key."""
+    try:
+        normalized = json.dumps(_strip_images(json.loads(prompt)), sort_keys=True)
+    except ValueError:
+        normalized = prompt
+
+    for pattern in _VOLATILE_PATTERNS:
+        normalized = pattern.sub("", normalized)
+
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiskLLMCache(BaseCache):
+    """Size-bounded LRU cache storing one JSON file per prompt hash."""
+
+    def __init__(self, directory: str, max_size_mb: int = 200):
+        self.directory = Path(os.path.expanduser(directory))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lookup(self, prompt: str, llm_string: str) -> Sequence[Generation] | None:
+        path = self._path(prompt_key(prompt, llm_string))
+        try:
+            generations = loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        path = self._path(prompt_key(prompt, llm_string))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(dumps(list(return_val)), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._writes += 1
+            check_size = self._writes % _EVICTION_CHECK_INTERVAL == 0
+        if check_size:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least-recently-used entries until the cache fits its budget."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self, **kwargs: Any) -> None:
+        for path in self.directory.glob("*/*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters since this cache was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            }
+
+
+# One cache object per directory, shared by every client in the process
+_caches: dict[str, DiskLLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(directory: str, max_size_mb: int = 200) -> DiskLLMCache:
+    """Get the process-wide cache for a directory."""
+    key = str(Path(os.path.expanduser(directory)).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = DiskLLMCache(key, max_size_mb=max_size_mb)
+            _caches[key] = cache
+        return cache
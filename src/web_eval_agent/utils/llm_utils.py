@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Shared LLM client registry.
+
+Building a ChatGoogleGenerativeAI client sets up a new gRPC channel (and TLS
+session) to the Gemini API. Scenarios and MCP calls ask this registry for a
+client instead, so one client (and its open connection) is reused for every
+agent step in the process.
+"""
+
+import asyncio
+import hashlib
+import threading
+import weakref
+
+from langchain_core.caches import BaseCache
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+# (model, temperature, api key fingerprint, response cache id)
+ClientKey = tuple[str, float, str, int]
+
+# The async gRPC channel is bound to the event loop that first uses it, so
+# clients are kept per loop and dropped together with their loop.
+_clients_by_loop: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_loopless_clients: dict[ClientKey, ChatGoogleGenerativeAI] = {}
+_registry_lock = threading.Lock()
+
+
+def _fingerprint(api_key: str | None) -> str:
+    """Identify an API key without keeping it in the registry key."""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _current_registry() -> dict[ClientKey, ChatGoogleGenerativeAI]:
+    """Return the client map for the running event loop (or the loop-less map)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _loopless_clients
+
+    registry = _clients_by_loop.get(loop)
+    if registry is None:
+        registry = {}
+        _clients_by_loop[loop] = registry
+    return registry
+
+
+def get_llm(model: str, api_key: str | None, temperature: float = 0.1,
+            cache: BaseCache | None = None) -> ChatGoogleGenerativeAI:
+    """Get the shared chat model client for a model, temperature and API key.
+
+    Args:
+        model: Gemini model name (e.g. "gemini-1.5-flash")
+        api_key: Google API key used by the client
+        temperature: Sampling temperature
+        cache: Optional LangChain response cache consulted before each call
+
+    Returns:
+        ChatGoogleGenerativeAI: A client reused across calls with the same settings
+    """
+    key: ClientKey = (model, float(temperature), _fingerprint(api_key), id(cache) if cache else 0)
+
+    with _registry_lock:
+        registry = _current_registry()
+        client = registry.get(key)
+        if client is None:
+            client = ChatGoogleGenerativeAI(
+                model=model,
+                google_api_key=api_key,
+                temperature=temperature,
+                cache=cache,
+            )
+            registry[key] = client
+        return client
+
+
+def clear_llm_clients() -> None:
+    """Drop every cached client (e.g. after rotating API keys)."""
+    with _registry_lock:
+        _clients_by_loop.clear()
+        _loopless_clients.clear()
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
 import asyncio
+import base64
+import itertools
+import struct
 import threading
 import webbrowser
 from flask import Flask, render_template, send_from_directory, request
@@ -38,6 +41,32 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode=_async_mode)
 # Store connected SIDs
 connected_clients = set()
 
+# SIDs of dashboards that emitted 'enable_frame_acks' and acknowledge browser
+# frames; the screencast waits for their acks before asking Chromium for the
+# next frame. Only these get frames with an ack callback (python-socketio keeps
+# each callback until it is called or the client leaves); the rest are paced
+# by time.
+frame_ack_clients = set()
+
+# Binary frame transport. Dashboards that emit 'enable_binary_frames' receive
+# 'browser_frame' events whose payload is an ArrayBuffer laid out as
+#   uint8 version | uint8 format (0 = jpeg, 1 = png) | uint32 sequence (big endian) | image bytes
+# and can display it with e.g.
+#   new Blob([new Uint8Array(buf, 6)], {type: format ? 'image/png' : 'image/jpeg'})
+# Other dashboards keep receiving base64 data URLs in 'browser_update'.
+FRAME_HEADER = struct.Struct("!BBI")
+FRAME_VERSION = 1
+FRAME_FORMATS = {"image/jpeg": 0, "image/png": 1}
+binary_frame_clients = set()
+_frame_sequence = itertools.count()
+
+# Callbacks run (from the Socket.IO thread) whenever the number of connected
+# dashboards goes to or from zero; the screencast uses them to stop and resume
+viewer_listeners = set()
+
+# Prometheus metrics sources: name -> (event loop, coroutine function returning exposition text)
+metrics_sources = {}
+
 @app.route('/')
 def index():
     """Serve the main HTML dashboard page."""
@@ -54,6 +83,36 @@ def get_url_task():
     """Return the current URL and task as JSON."""
     return {'url': current_url, 'task': current_task}
 
+@app.route('/metrics')
+def metrics():
+    """Serve registered metrics (e.g. the browser pool) in Prometheus text format."""
+    chunks = []
+    for name, (loop, collect) in list(metrics_sources.items()):
+        if loop.is_closed():
+            metrics_sources.pop(name, None)
+            continue
+        try:
+            # Sources live on the agent's asyncio loop, not this Flask thread
+            future = asyncio.run_coroutine_threadsafe(collect(), loop)
+            chunks.append(future.result(timeout=5))
+        except Exception as e:
+            chunks.append(f"# Failed to collect {name} metrics: {e}\n")
+    return "".join(chunks), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def register_metrics_source(name: str, collect, loop=None):
+    """Expose an async metrics collector on the /metrics endpoint.
+
+    Args:
+        name: Unique source name; registering it again replaces the old source
+        collect: Coroutine function returning Prometheus exposition text
+        loop: Event loop to run ``collect`` on (defaults to the running loop)
+    """
+    metrics_sources[name] = (loop or asyncio.get_running_loop(), collect)
+
+def unregister_metrics_source(name: str):
+    """Remove a metrics source from the /metrics endpoint."""
+    metrics_sources.pop(name, None)
+
 # Dashboard tab tracking handlers
 @socketio.on('register_dashboard_tab')
 def handle_register_tab(data):
@@ -79,10 +138,23 @@ def handle_dashboard_visible(data):
         # This tab is now the most recently active
         last_tab_activity[tab_id] = datetime.now()
 
+@socketio.on('enable_frame_acks')
+def handle_enable_frame_acks(data=None):
+    """Send this dashboard frames with an ack callback it promises to call."""
+    frame_ack_clients.add(request.sid)
+
+@socketio.on('enable_binary_frames')
+def handle_enable_binary_frames(data=None):
+    """Switch this dashboard from data URL frames to binary 'browser_frame' events."""
+    binary_frame_clients.add(request.sid)
+
 @socketio.on('connect')
 def handle_connect():
     # Add client to connected_clients set
+    first_viewer = not connected_clients
     connected_clients.add(request.sid)
+    if first_viewer:
+        _notify_viewer_listeners()
     
     # Send status message to dashboard
     send_log(f"Connected to log server at {datetime.now().strftime('%H:%M:%S')}", "✅", log_type='status')
@@ -92,6 +164,10 @@ def handle_disconnect():
     # Remove client from connected_clients set
     if request.sid in connected_clients:
         connected_clients.remove(request.sid)
+    frame_ack_clients.discard(request.sid)
+    binary_frame_clients.discard(request.sid)
+    if not connected_clients:
+        _notify_viewer_listeners()
     
     # Remove any dashboard tabs associated with this session
     tabs_to_remove = []
@@ -118,6 +194,9 @@ def set_url_and_task(url: str, task: str):
 
 def send_log(message: str, emoji: str = "➡️", log_type: str = 'agent'):
     """Sends a log message with an emoji prefix and type to all connected clients."""
+    # Nobody to send to: skip formatting and the emit altogether
+    if not connected_clients:
+        return
     # Ensure socketio context is available. If called from a non-SocketIO thread,
     # use socketio.emit directly.
     try:
@@ -127,18 +206,51 @@ def send_log(message: str, emoji: str = "➡️", log_type: str = 'agent'):
     except Exception:
         pass
 
+def has_viewers():
+    """Whether any dashboard client is connected to receive browser frames."""
+    return len(connected_clients) > 0
+
+def add_viewer_listener(callback):
+    """Call ``callback()`` whenever the first dashboard connects or the last one disconnects.
+
+    The callback runs on the Socket.IO thread and must not block; check
+    has_viewers() from it to tell which of the two happened.
+    """
+    viewer_listeners.add(callback)
+
+def remove_viewer_listener(callback):
+    viewer_listeners.discard(callback)
+
+def _notify_viewer_listeners():
+    for callback in list(viewer_listeners):
+        try:
+            callback()
+        except Exception:
+            pass
+
 # --- Browser View Update Function ---
-async def send_browser_view(image_data_url: str):
-    """Sends the browser view image data URL to all connected clients."""
-    # This function is async because it might be called from the asyncio loop
-    # in browser_manager. However, socketio.emit needs to be called carefully
-    # when interacting between asyncio and other threads (like Flask's).
-    # socketio.emit is generally thread-safe, but ensure the event loop is handled.
-    
-    # Check if the data URL is valid
-    if not image_data_url or not image_data_url.startswith("data:image/"):
-        return
-    
+async def send_browser_frame(image: bytes | str, mime_type: str = "image/jpeg",
+                             ack_timeout: float = 0.0) -> bool:
+    """Sends one browser view frame to all connected clients.
+
+    Dashboards that sent 'enable_binary_frames' get a binary 'browser_frame'
+    event (FRAME_HEADER followed by the encoded image); the others get the
+    frame as a data URL in 'browser_update'. Dashboards that sent
+    'enable_frame_acks' acknowledge a frame by calling the Socket.IO ack
+    callback of their handler. With ``ack_timeout`` > 0 this waits up to that
+    long for the first acknowledgement.
+
+    Args:
+        image: Encoded image, as bytes or base64 (as CDP delivers screencast frames)
+        mime_type: Image type, "image/jpeg" or "image/png"
+        ack_timeout: Seconds to wait for a dashboard acknowledgement
+
+    Returns:
+        bool: True if a dashboard acknowledged the frame
+    """
+    if not image or mime_type not in FRAME_FORMATS:
+        return False
+
     # Mark the screencast as running when we receive a browser view update
     try:
         from .browser_utils import set_screencast_running
@@ -147,9 +259,68 @@ async def send_browser_view(image_data_url: str):
         pass
     except Exception:
         pass
-        
+
+    clients = list(connected_clients)
+    binary_sids = [sid for sid in clients if sid in binary_frame_clients]
+    legacy_sids = [sid for sid in clients if sid not in binary_frame_clients]
+
+    # Encode each representation at most once per frame, and only if some client wants it
+    binary_payload = None
+    if binary_sids:
+        raw = base64.b64decode(image) if isinstance(image, str) else image
+        binary_payload = FRAME_HEADER.pack(FRAME_VERSION, FRAME_FORMATS[mime_type],
+                                           next(_frame_sequence) & 0xFFFFFFFF) + raw
+    data_url = None
+    if legacy_sids:
+        encoded = image if isinstance(image, str) else base64.b64encode(image).decode("ascii")
+        data_url = f"data:{mime_type};base64,{encoded}"
+
+    loop = asyncio.get_running_loop()
+    acked = loop.create_future()
+
+    def on_ack(*args):
+        # Runs on a Socket.IO server thread
+        try:
+            loop.call_soon_threadsafe(lambda: acked.done() or acked.set_result(True))
+        except RuntimeError:
+            pass  # The sender's loop has already closed
+
+    try:
+        for sid in binary_sids:
+            socketio.emit('browser_frame', binary_payload, to=sid,
+                          callback=on_ack if sid in frame_ack_clients else None)
+        for sid in legacy_sids:
+            socketio.emit('browser_update', {'data': data_url}, to=sid,
+                          callback=on_ack if sid in frame_ack_clients else None)
+    except Exception:
+        pass
+
+    if ack_timeout > 0 and frame_ack_clients & connected_clients:
+        try:
+            await asyncio.wait_for(acked, timeout=ack_timeout)
+        except TimeoutError:
+            pass
+    return acked.done()
+
+async def send_browser_view(image_data_url: str, ack_timeout: float = 0.0) -> bool:
+    """Sends the browser view image data URL to all connected clients.
+
+    Kept for callers holding a data URL; see send_browser_frame.
+    """
+    # Check if the data URL is valid
+    if not image_data_url or not image_data_url.startswith("data:image/"):
+        return False
+
+    header, _, encoded = image_data_url.partition(",")
+    mime_type = header[len("data:"):].split(";")[0]
+    return await send_browser_frame(encoded, mime_type, ack_timeout=ack_timeout)
+
+def send_screencast_stats(stats: dict):
+    """Sends screencast frame rate, bytes/sec and CPU figures to all connected clients."""
+    if not connected_clients:
+        return
     try:
-        socketio.emit('browser_update', {'data': image_data_url})
+        socketio.emit('screencast_stats', stats)
     except Exception:
         pass
 
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+Port allocation for Chromium remote debugging (CDP) endpoints.
+
+Every browser launch asks for its own free port instead of sharing a fixed
+one, so several evaluations can run side by side on the same host.
+"""
+
+import socket
+import threading
+
+# Ports handed out by this process that have not been released yet
+_reserved_ports: set[int] = set()
+_reserved_lock = threading.Lock()
+
+# How many times to ask the OS for a port before giving up
+MAX_ALLOCATION_ATTEMPTS = 50
+
+
+def allocate_port(host: str = "127.0.0.1") -> int:
+    """Reserve a free TCP port on ``host``.
+
+    The OS picks an unused ephemeral port; ports already handed out by this
+    process are skipped so two launches in flight never get the same one.
+
+    Args:
+        host: Interface the port must be free on
+
+    Returns:
+        int: The reserved port number
+
+    Raises:
+        RuntimeError: If no free port could be found
+    """
+    with _reserved_lock:
+        for _ in range(MAX_ALLOCATION_ATTEMPTS):
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind((host, 0))
+                port = s.getsockname()[1]
+
+            if port not in _reserved_ports:
+                _reserved_ports.add(port)
+                return port
+
+    raise RuntimeError(f"Could not allocate a free port on {host}")
+
+
+def release_port(port: int) -> None:
+    """Return a port obtained from :func:`allocate_port`."""
+    with _reserved_lock:
+        _reserved_ports.discard(port)
+
+
+def cdp_url(port: int, host: str = "127.0.0.1") -> str:
+    """Build the CDP HTTP endpoint URL for a remote debugging port."""
+    return f"http://{host}:{port}"
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""
+Content-addressed on-disk store for step screenshots.
+
+Each image is written once, named by the SHA-256 of its bytes, so a page that
+doesn't change between agent steps costs one file however many steps capture
+it. Callers keep only ScreenshotRef handles in memory and read or base64-encode
+the image at the point it is actually sent somewhere.
+"""
+
+import base64
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_SCREENSHOT_DIR = "~/.operative/screenshots"
+
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png"}
+
+
+@dataclass(frozen=True)
+class ScreenshotRef:
+    """Handle to one stored screenshot."""
+
+    digest: str
+    path: str
+    size: int
+    mime_type: str = "image/jpeg"
+
+    def read_bytes(self) -> bytes:
+        return Path(self.path).read_bytes()
+
+    def to_base64(self) -> str:
+        """Base64 of the image, read from disk on every call."""
+        return base64.b64encode(self.read_bytes()).decode("ascii")
+
+
+class ScreenshotStore:
+    """Screenshot directory laid out as ``<digest[:2]>/<digest>.<ext>``.
+
+    The store is trimmed to ``max_size_mb`` every ``evict_every`` new images.
+    Images stored or re-stored within the last ``keep_recent_s`` seconds are
+    never evicted, so refs held by runs still in progress stay readable.
+
+    ``put`` and ``evict`` do blocking disk I/O and are thread-safe; async
+    callers run them with ``asyncio.to_thread``.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SCREENSHOT_DIR, max_size_mb: int = 500,
+                 evict_every: int = 100, keep_recent_s: float = 3600.0):
+        self.directory = Path(os.path.expanduser(directory))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.evict_every = evict_every
+        self.keep_recent_s = keep_recent_s
+        self.writes = 0
+        self.dedup_hits = 0
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str, mime_type: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}{_EXTENSIONS.get(mime_type, '.bin')}"
+
+    def put(self, data: bytes, mime_type: str = "image/jpeg") -> ScreenshotRef:
+        """Store an image unless an identical one is already stored, and return its ref."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, mime_type)
+        if path.exists():
+            os.utime(path)  # Keep it out of the next eviction
+            with self._lock:
+                self.dedup_hits += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.writes += 1
+                due = self.evict_every > 0 and self.writes % self.evict_every == 0
+            if due:
+                self.evict()
+        return ScreenshotRef(digest=digest, path=str(path), size=len(data), mime_type=mime_type)
+
+    def evict(self) -> int:
+        """Remove least-recently-stored images until the store fits its budget.
+
+        Images newer than ``keep_recent_s`` are kept even if the store stays
+        over budget.
+
+        Returns:
+            int: Number of images removed
+        """
+        entries = []
+        total = 0
+        cutoff = time.time() - self.keep_recent_s
+        for path in self.directory.glob("*/*.*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes or mtime >= cutoff:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"writes": self.writes, "dedup_hits": self.dedup_hits}
+
+
+_stores: dict[str, ScreenshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_screenshot_store(directory: str = DEFAULT_SCREENSHOT_DIR, max_size_mb: int = 500) -> ScreenshotStore:
+    """Get the process-wide store for a directory, trimming it to budget on first use."""
+    key = str(Path(os.path.expanduser(directory)).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ScreenshotStore(key, max_size_mb=max_size_mb)
+            store.evict()
+            _stores[key] = store
+        return store
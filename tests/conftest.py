@@ -64,6 +64,33 @@ def test_url() -> str:
     return "http://localhost:5000"
 
 
+@pytest.fixture
+def make_scenario():
+    """Factory for TestScenarios; fields not given are left empty."""
+    from web_eval_agent.core.instruction_parser import TestScenario
+
+    def build(name: str = "Scenario", **fields) -> TestScenario:
+        fields = {"description": "", "steps": [], "validations": [],
+                  "expected_outcomes": [], **fields}
+        return TestScenario(name=name, **fields)
+
+    return build
+
+
+@pytest.fixture
+def make_executor(test_url):
+    """Factory for TestExecutors that keep no duration history on disk."""
+    from web_eval_agent.core import test_executor
+    from web_eval_agent.core.config import Config
+
+    def build(**overrides):
+        config = Config(url=test_url, instructions_file="instructions.md", api_key="",
+                        duration_history_file=None, **overrides)
+        return test_executor.TestExecutor(config)
+
+    return build
+
+
 @pytest.fixture
 def sample_instructions_file(tmp_path) -> Path:
     """Create a sample instructions file for testing."""
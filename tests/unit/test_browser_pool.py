@@ -0,0 +1,803 @@
+"""
+Unit tests for BrowserPool scheduling, run against fake instances.
+
+The fakes skip Playwright entirely: "launching" an instance only yields to the
+event loop (or waits on a gate the test controls), so hand-off order, timeouts
+and slot accounting can be checked without Chromium. Context pooling and reset
+strategies run the real BrowserInstance code against a fake Chromium instead.
+"""
+
+import asyncio
+import itertools
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import pytest
+import pytest_asyncio
+
+from web_eval_agent.browser.browser_pool import (
+    BrowserInstance,
+    BrowserInstanceConfig,
+    BrowserPool,
+    InstanceStatus,
+)
+from web_eval_agent.browser.pool_metrics import Histogram
+
+HEADLESS = BrowserInstanceConfig(headless=True)
+HEADED = BrowserInstanceConfig(headless=False)
+
+
+class FakeInstance(BrowserInstance):
+    """Browser instance without a browser; closing it can be held open by a gate."""
+
+    def __init__(self, instance_id: str, config: BrowserInstanceConfig,
+                 close_gate: asyncio.Event | None = None):
+        super().__init__(instance_id, config)
+        self.status = InstanceStatus.AVAILABLE
+        self.closed = False
+        self.close_gate = close_gate
+
+    def is_healthy(self) -> bool:
+        return (self.status in (InstanceStatus.AVAILABLE, InstanceStatus.IN_USE)
+                and self.dead_reason is None and not self.closed)
+
+    async def _reset_state(self):
+        self.last_reset_duration = 0.0
+
+    async def _cleanup(self):
+        self.status = InstanceStatus.CLEANUP
+        if self.close_gate is not None:
+            await self.close_gate.wait()
+        self.closed = True
+
+
+class FakePool(BrowserPool):
+    """BrowserPool whose launches create FakeInstances.
+
+    ``launch_gate`` (when set) holds every launch until the test opens it, and
+    ``close_gate`` does the same for closing instances.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launched: list[FakeInstance] = []
+        self.launch_gate: asyncio.Event | None = None
+        self.close_gate: asyncio.Event | None = None
+        self._ids = itertools.count()
+
+    async def _create_instance(self, config: BrowserInstanceConfig) -> FakeInstance:
+        await asyncio.sleep(0)
+        if self.launch_gate is not None:
+            await self.launch_gate.wait()
+        instance = FakeInstance(f"fake-{next(self._ids)}", config, close_gate=self.close_gate)
+        instance.on_dead = self._on_instance_dead
+        self.launched.append(instance)
+        return instance
+
+
+def origin_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class FakeChromiumPage:
+    """Page whose script evaluation answers probes and storage clearing."""
+
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.closed = False
+
+    def on(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        if url.startswith("http"):
+            for handler in self.context.request_handlers:
+                handler(SimpleNamespace(resource_type="document", url=url))
+
+    async def evaluate(self, script, *args):
+        if "localStorage.clear()" in script and self.url.startswith("http"):
+            self.context.storage.get(origin_of(self.url), set()).discard("localStorage")
+        return 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCDPSession:
+    def __init__(self, context):
+        self.context = context
+
+    async def send(self, method, params=None):
+        if method == "Storage.clearDataForOrigin":
+            self.context.storage.pop(params["origin"], None)
+
+    async def detach(self):
+        pass
+
+
+class FakeChromiumContext:
+    """Context keeping per-origin storage kinds, cookies and permissions."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.storage: dict[str, set[str]] = {}
+        self.cookies: list[str] = []
+        self.permissions: list[str] = []
+        self.request_handlers = []
+
+    def on(self, event, handler):
+        if event == "request":
+            self.request_handlers.append(handler)
+
+    async def new_page(self):
+        return FakeChromiumPage(self)
+
+    async def new_cdp_session(self, page):
+        return FakeCDPSession(self)
+
+    async def clear_cookies(self):
+        self.cookies.clear()
+
+    async def clear_permissions(self):
+        self.permissions.clear()
+
+    async def close(self):
+        self.browser.contexts.remove(self)
+
+
+class FakeChromium:
+    """Browser process hosting FakeChromiumContexts."""
+
+    def __init__(self):
+        self.contexts: list[FakeChromiumContext] = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    async def new_context(self, **kwargs):
+        context = FakeChromiumContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    """Playwright driver launching FakeChromium processes.
+
+    ``launch_gate`` holds launches until opened and ``failures`` makes that
+    many launches raise.
+    """
+
+    def __init__(self):
+        self.chromium = self
+        self.launched: list[FakeChromium] = []
+        self.launch_gate: asyncio.Event | None = None
+        self.failures = 0
+
+    async def launch(self, headless=True, args=None, slow_mo=0):
+        await asyncio.sleep(0)
+        if self.launch_gate is not None:
+            await self.launch_gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("browser failed to launch")
+        browser = FakeChromium()
+        self.launched.append(browser)
+        return browser
+
+    async def stop(self):
+        pass
+
+
+async def visit(instance, origin: str):
+    """Load a page of ``origin`` that leaves every kind of state behind."""
+    await instance.page.goto(f"{origin}/")
+    instance.context.storage[origin] = {"localStorage", "indexedDB", "cacheStorage"}
+    instance.context.cookies.append(f"{origin} session")
+    instance.context.permissions.append(f"{origin} geolocation")
+
+
+async def settle():
+    """Let queued callbacks and tasks run."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest_asyncio.fixture
+async def make_pool():
+    pools = []
+
+    def build(**kwargs) -> FakePool:
+        kwargs.setdefault("health_check_interval", 3600)
+        pool = FakePool(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield build
+    for pool in pools:
+        if pool.close_gate is not None:
+            pool.close_gate.set()
+        await pool.shutdown()
+
+
+@pytest_asyncio.fixture
+async def make_chromium_pool():
+    pools = []
+
+    def build(**kwargs) -> BrowserPool:
+        kwargs.setdefault("health_check_interval", 3600)
+        pool = BrowserPool(**kwargs)
+        pool.playwright_instance = FakePlaywright()
+        pools.append(pool)
+        return pool
+
+    yield build
+    for pool in pools:
+        playwright = pool.playwright_instance
+        if playwright is not None and playwright.launch_gate is not None:
+            playwright.launch_gate.set()
+        await pool.shutdown()
+
+
+class TestAcquireRelease:
+    """Reuse, FIFO hand-off, timeouts and slot accounting."""
+
+    @pytest.mark.asyncio
+    async def test_released_instance_is_reused(self, make_pool):
+        pool = make_pool(max_size=2)
+
+        first = await pool.acquire(config=HEADLESS)
+        await pool.release(first)
+        second = await pool.acquire(config=HEADLESS)
+
+        assert second is first
+        assert len(pool.launched) == 1
+        assert second.use_count == 2
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_arrival_order(self, make_pool):
+        pool = make_pool(max_size=1)
+        instance = await pool.acquire(config=HEADLESS)
+
+        served = []
+
+        async def wait_for_instance(name):
+            acquired = await pool.acquire(config=HEADLESS, timeout=5)
+            served.append(name)
+            await pool.release(acquired)
+
+        waiters = [asyncio.create_task(wait_for_instance(n)) for n in ("a", "b", "c")]
+        await settle()
+        assert (await pool.get_stats())["waiting_callers"] == 3
+
+        await pool.release(instance)
+        await asyncio.gather(*waiters)
+
+        assert served == ["a", "b", "c"]
+        assert len(pool.launched) == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_times_out_when_full(self, make_pool):
+        pool = make_pool(max_size=1)
+        await pool.acquire(config=HEADLESS)
+
+        with pytest.raises(TimeoutError):
+            await pool.acquire(config=HEADLESS, timeout=0.05)
+
+        stats = await pool.get_stats()
+        assert stats["waiting_callers"] == 0
+        assert pool.metrics.acquire_timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_swallow_the_instance(self, make_pool):
+        pool = make_pool(max_size=1)
+        instance = await pool.acquire(config=HEADLESS)
+
+        cancelled = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        await pool.release(instance)
+        again = await pool.acquire(config=HEADLESS, timeout=0.5)
+
+        assert again is instance
+
+    @pytest.mark.asyncio
+    async def test_launches_in_flight_hold_their_slot(self, make_pool):
+        pool = make_pool(max_size=2)
+        pool.launch_gate = asyncio.Event()
+
+        launches = [asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+                    for _ in range(2)]
+        await settle()
+        assert pool._pending_launches == 2
+
+        # Both slots are reserved by launches that haven't finished yet
+        with pytest.raises(TimeoutError):
+            await pool.acquire(config=HEADLESS, timeout=0.05)
+
+        pool.launch_gate.set()
+        await asyncio.gather(*launches)
+
+        stats = await pool.get_stats()
+        assert stats["pending_launches"] == 0
+        assert stats["total_instances"] == 2
+        assert stats["active_instances"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_launch_frees_its_slot_for_a_waiter(self, make_pool):
+        pool = make_pool(max_size=1)
+        pool.launch_gate = asyncio.Event()
+        original_create = pool._create_instance
+        attempts = []
+
+        async def failing_once(config):
+            attempts.append(config)
+            if len(attempts) == 1:
+                await pool.launch_gate.wait()
+                raise RuntimeError("launch failed")
+            return await original_create(config)
+
+        pool._create_instance = failing_once
+        failing = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+        waiting = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        pool.launch_gate.set()
+        with pytest.raises(RuntimeError):
+            await failing
+        instance = await waiting
+
+        assert instance.status == InstanceStatus.IN_USE
+        assert pool._pending_launches == 0
+        assert len(pool.all_instances) == 1
+
+    @pytest.mark.asyncio
+    async def test_older_waiter_for_another_config_is_served_first(self, make_pool):
+        pool = make_pool(max_size=1)
+        instance = await pool.acquire(config=HEADLESS)
+
+        headed = asyncio.create_task(pool.acquire(config=HEADED, timeout=5))
+        await settle()
+        headless = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        await pool.release(instance)
+        served = await asyncio.wait_for(headed, timeout=1)
+
+        # The released instance was retired so the older waiter could launch
+        assert served.config == HEADED
+        assert instance.instance_id not in pool.all_instances
+        assert not headless.done()
+
+        await pool.release(served)
+        assert (await asyncio.wait_for(headless, timeout=1)).config == HEADLESS
+
+    @pytest.mark.asyncio
+    async def test_idle_instance_of_another_config_makes_room(self, make_pool):
+        pool = make_pool(max_size=1)
+        await pool.release(await pool.acquire(config=HEADLESS))
+
+        headed = await pool.acquire(config=HEADED, timeout=1)
+
+        assert headed.config == HEADED
+        assert pool.metrics.snapshot()["evictions"]["config_swap"] == 1
+
+
+class TestMemoryThrottle:
+    """Acquires while the pool is above its memory ceiling."""
+
+    @pytest.mark.asyncio
+    async def test_throttled_acquire_waits_instead_of_swapping_config(self, make_pool):
+        pool = make_pool(max_size=2, memory_ceiling_mb=100)
+        idle = await pool.acquire(config=HEADLESS)
+        await pool.release(idle)
+        idle.rss_mb = 500.0
+        pool._update_memory_throttle()
+
+        with pytest.raises(TimeoutError):
+            await pool.acquire(config=HEADED, timeout=0.05)
+
+        assert idle in pool.available_instances
+        assert len(pool.launched) == 1
+
+    @pytest.mark.asyncio
+    async def test_queued_acquire_launches_once_throttle_lifts(self, make_pool):
+        pool = make_pool(max_size=2, memory_ceiling_mb=100)
+        idle = await pool.acquire(config=HEADLESS)
+        await pool.release(idle)
+        idle.rss_mb = 500.0
+        pool._update_memory_throttle()
+
+        waiting = asyncio.create_task(pool.acquire(config=HEADED, timeout=5))
+        await settle()
+        assert not waiting.done()
+
+        idle.rss_mb = 50.0
+        async with pool._lock:
+            pool._update_memory_throttle()
+
+        assert (await asyncio.wait_for(waiting, timeout=1)).config == HEADED
+        assert idle in pool.available_instances
+
+
+class TestContextPooling:
+    """Context slots on shared browser processes, and the slots launches reserve."""
+
+    @pytest.mark.asyncio
+    async def test_instances_share_processes_up_to_the_limit(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=4, contexts_per_browser=2)
+
+        instances = [await pool.acquire(config=HEADLESS) for _ in range(3)]
+
+        assert len(pool.playwright_instance.launched) == 2
+        assert instances[0].shared_browser is instances[1].shared_browser
+        assert [b.context_count for b in pool.shared_browsers] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_reservations_wait_for_a_process_still_launching(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=4, contexts_per_browser=2)
+        pool.playwright_instance.launch_gate = asyncio.Event()
+
+        acquiring = [asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+                     for _ in range(2)]
+        await settle()
+        assert len(pool.shared_browsers) == 1
+        assert pool.shared_browsers[0].context_count == 2
+
+        pool.playwright_instance.launch_gate.set()
+        first, second = await asyncio.gather(*acquiring)
+
+        assert len(pool.playwright_instance.launched) == 1
+        assert first.shared_browser is second.shared_browser
+
+    @pytest.mark.asyncio
+    async def test_failed_process_launch_frees_every_slot(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=2, contexts_per_browser=2)
+        pool.playwright_instance.failures = 1
+
+        outcomes = await asyncio.gather(
+            pool.acquire(config=HEADLESS, timeout=5), pool.acquire(config=HEADLESS, timeout=5),
+            return_exceptions=True
+        )
+
+        # The launching caller gets the launch error, the one waiting on it a RuntimeError
+        assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+        assert pool.shared_browsers == []
+        assert pool._pending_launches == 0
+        assert pool.metrics.launch_failures == 2
+
+        instance = await pool.acquire(config=HEADLESS, timeout=1)
+        assert instance.shared_browser.context_count == 1
+
+    @pytest.mark.asyncio
+    async def test_waiter_is_woken_with_a_reserved_slot(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=1, contexts_per_browser=2)
+        instance = await pool.acquire(config=HEADLESS)
+        waiting = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        # Releasing a dead instance frees its slot and reserves it for the waiter
+        instance.mark_dead("page crashed")
+        await pool.release(instance)
+        assert pool._pending_launches == 1
+
+        replacement = await asyncio.wait_for(waiting, timeout=1)
+
+        assert replacement is not instance
+        assert pool._pending_launches == 0
+        assert len(pool.all_instances) == 1
+
+    @pytest.mark.asyncio
+    async def test_waiter_launch_failure_reaches_it_and_frees_the_slot(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=1)
+        instance = await pool.acquire(config=HEADLESS)
+        waiting = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        pool.playwright_instance.failures = 1
+        instance.mark_dead("browser disconnected")
+        await pool.release(instance)
+
+        with pytest.raises(RuntimeError, match="failed to launch"):
+            await asyncio.wait_for(waiting, timeout=1)
+        assert pool._pending_launches == 0
+        assert await pool.acquire(config=HEADLESS, timeout=1) is not None
+
+    @pytest.mark.asyncio
+    async def test_shutdown_during_launch_closes_the_process(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=2, contexts_per_browser=2)
+        playwright = pool.playwright_instance
+        playwright.launch_gate = asyncio.Event()
+        acquiring = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        shutdown = asyncio.create_task(pool.shutdown())
+        await settle()
+        assert not shutdown.done()
+        playwright.launch_gate.set()
+        await asyncio.wait_for(shutdown, timeout=1)
+
+        with pytest.raises(RuntimeError, match="shutting down"):
+            await acquiring
+        [process] = playwright.launched
+        assert not process.connected
+        assert pool.shared_browsers == []
+
+
+class TestResetStrategies:
+    """What each reset strategy leaves behind for the next user of an instance."""
+
+    ORIGIN = "https://shop.example.com"
+
+    async def reuse_after_visit(self, pool):
+        instance = await pool.acquire(config=HEADLESS)
+        old_context = instance.context
+        await visit(instance, self.ORIGIN)
+        await pool.release(instance)
+        reused = await pool.acquire(config=HEADLESS)
+        assert reused is instance
+        return reused, old_context
+
+    @pytest.mark.asyncio
+    async def test_navigate_keeps_indexeddb_cache_and_permissions(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=1, reset_strategy="navigate")
+
+        instance, old_context = await self.reuse_after_visit(pool)
+
+        assert instance.context is old_context
+        assert instance.context.storage[self.ORIGIN] == {"indexedDB", "cacheStorage"}
+        assert instance.context.cookies == []
+        assert instance.context.permissions == [f"{self.ORIGIN} geolocation"]
+
+    @pytest.mark.asyncio
+    async def test_clear_storage_wipes_every_visited_origin(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=1, reset_strategy="clear_storage")
+
+        instance, old_context = await self.reuse_after_visit(pool)
+
+        assert instance.context is old_context
+        assert instance.context.storage == {}
+        assert instance.context.cookies == []
+        assert instance.context.permissions == []
+        assert instance._touched_origins == set()
+
+    @pytest.mark.asyncio
+    async def test_recreate_context_starts_from_a_fresh_context(self, make_chromium_pool):
+        pool = make_chromium_pool(max_size=1, reset_strategy="recreate_context")
+
+        instance, old_context = await self.reuse_after_visit(pool)
+
+        assert instance.context is not old_context
+        assert instance.context.browser.contexts == [instance.context]
+        assert instance.context.storage == {}
+        assert instance.context.cookies == []
+        assert instance.context.permissions == []
+
+
+class TestLiveness:
+    """Dead instances are evicted right away and replaced in the background."""
+
+    @pytest.mark.asyncio
+    async def test_dead_available_instance_is_replaced(self, make_pool):
+        pool = make_pool(max_size=2)
+        instance = await pool.acquire(config=HEADLESS)
+        await pool.release(instance)
+
+        instance.mark_dead("browser disconnected")
+        await settle()
+
+        assert instance.closed
+        assert instance.instance_id not in pool.all_instances
+        assert pool.dead_evicted == 1
+        assert pool.metrics.snapshot()["evictions"]["dead"] == 1
+        [replacement] = pool.available_instances
+        assert replacement is pool.launched[1]
+
+    @pytest.mark.asyncio
+    async def test_unresponsive_page_fails_the_probe(self, make_pool):
+        pool = make_pool(max_size=2, probe_timeout=0.05)
+        instance = await pool.acquire(config=HEADLESS)
+        await pool.release(instance)
+
+        async def hang(script):
+            await asyncio.Event().wait()
+
+        instance.page = SimpleNamespace(evaluate=hang)
+        instance.last_used = 0
+        await pool._probe_available()
+        await settle()
+
+        assert instance.dead_reason == "page did not respond within 0.05s"
+        assert instance.instance_id not in pool.all_instances
+        assert len(pool.available_instances) == 1
+
+    @pytest.mark.asyncio
+    async def test_probe_error_marks_the_instance_dead(self, make_pool):
+        pool = make_pool(max_size=2)
+        instance = await pool.acquire(config=HEADLESS)
+        await pool.release(instance)
+
+        async def crashed(script):
+            raise RuntimeError("Target crashed")
+
+        instance.page = SimpleNamespace(evaluate=crashed)
+
+        assert await instance.probe() is False
+        await settle()
+
+        assert instance.dead_reason == "probe failed: Target crashed"
+        assert pool.dead_evicted == 1
+
+    @pytest.mark.asyncio
+    async def test_dead_instance_in_use_is_destroyed_on_release(self, make_pool):
+        pool = make_pool(max_size=2)
+        instance = await pool.acquire(config=HEADLESS)
+
+        instance.mark_dead("page crashed")
+        await settle()
+        assert instance.instance_id in pool.all_instances
+
+        await pool.release(instance)
+
+        assert instance.instance_id not in pool.all_instances
+        assert pool.metrics.snapshot()["evictions"]["unhealthy"] == 1
+
+
+class TestDestroyOutsideLock:
+    """Closing destroyed instances never blocks the pool."""
+
+    @pytest.mark.asyncio
+    async def test_hung_close_does_not_block_acquire_or_release(self, make_pool):
+        pool = make_pool(max_size=2)
+        pool.close_gate = asyncio.Event()
+        broken = await pool.acquire(config=HEADLESS)
+        healthy = await pool.acquire(config=HEADLESS)
+        broken.dead_reason = "page crashed"
+
+        # The unhealthy instance is destroyed, but its close hangs
+        await asyncio.wait_for(pool.release(broken), timeout=1)
+        assert not broken.closed
+
+        await asyncio.wait_for(pool.release(healthy), timeout=1)
+        replacement = await pool.acquire(config=HEADLESS, timeout=1)
+        launched = await pool.acquire(config=HEADLESS, timeout=1)
+
+        assert replacement is healthy
+        assert launched not in (broken, healthy)
+        assert broken.instance_id not in pool.all_instances
+
+    @pytest.mark.asyncio
+    async def test_shutdown_waits_for_pending_closes(self, make_pool):
+        pool = make_pool(max_size=1)
+        pool.close_gate = asyncio.Event()
+        instance = await pool.acquire(config=HEADLESS)
+        instance.dead_reason = "browser disconnected"
+        await pool.release(instance)
+
+        shutdown = asyncio.create_task(pool.shutdown())
+        await settle()
+        assert not shutdown.done()
+
+        pool.close_gate.set()
+        await asyncio.wait_for(shutdown, timeout=1)
+
+        assert instance.closed
+        assert pool.metrics.snapshot()["evictions"]["unhealthy"] == 1
+
+
+class TestPreWarming:
+    """Background replenishment towards min_size and warm_size."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_warm_instances_ready(self, make_pool):
+        pool = make_pool(max_size=3, warm_size=1)
+        await settle()
+        assert len(pool._available.get(pool.warm_config, ())) == 1
+
+        await pool.acquire(config=pool.warm_config)
+        await settle()
+
+        assert len(pool._available.get(pool.warm_config, ())) == 1
+        assert len(pool.launched) == 2
+
+    @pytest.mark.asyncio
+    async def test_acquire_launches_do_not_count_as_warm(self, make_pool):
+        pool = make_pool(max_size=3)
+        pool.launch_gate = asyncio.Event()
+        acquiring = asyncio.create_task(pool.acquire(config=pool.warm_config, timeout=5))
+        await settle()
+        pool.warm_size = 1
+
+        # The acquire's launch is taken by its caller, so one warm launch is still due
+        assert pool._pending_launches == 1
+        assert pool._warm_deficit() == 1
+
+        pool.launch_gate.set()
+        await acquiring
+
+    @pytest.mark.asyncio
+    async def test_launch_finishing_after_shutdown_is_destroyed(self, make_pool):
+        pool = make_pool(max_size=2, warm_size=1)
+        pool.launch_gate = asyncio.Event()
+        await settle()
+        assert pool._warm_launches == 1
+
+        shutdown = asyncio.create_task(pool.shutdown())
+        await settle()
+        assert not shutdown.done()
+
+        pool.launch_gate.set()
+        await asyncio.wait_for(shutdown, timeout=1)
+
+        assert len(pool.launched) == 1
+        assert pool.launched[0].closed
+        assert not pool.all_instances
+
+    @pytest.mark.asyncio
+    async def test_acquire_launch_finishing_after_shutdown_fails(self, make_pool):
+        pool = make_pool(max_size=1)
+        pool.launch_gate = asyncio.Event()
+        acquiring = asyncio.create_task(pool.acquire(config=HEADLESS, timeout=5))
+        await settle()
+
+        shutdown = asyncio.create_task(pool.shutdown())
+        await settle()
+        pool.launch_gate.set()
+        await asyncio.wait_for(shutdown, timeout=1)
+
+        with pytest.raises(RuntimeError, match="shutting down"):
+            await acquiring
+        assert pool.launched[0].closed
+
+
+class TestPrometheusMetrics:
+    """Metrics snapshot rendered for the /metrics endpoint."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram([1.0, 0.1])
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.snapshot() == {
+            "buckets": [(0.1, 2), (1.0, 3), ("+Inf", 4)], "sum": 2.65, "count": 4,
+        }
+
+    @pytest.mark.asyncio
+    async def test_renders_pool_state_in_text_format(self, make_pool):
+        pool = make_pool(max_size=2)
+        instance = await pool.acquire(config=HEADLESS)
+        await pool.release(instance)
+        await pool.acquire(config=HEADLESS)
+        pool.metrics.record_eviction('odd "reason"')
+
+        lines = (await pool.render_prometheus()).splitlines()
+
+        assert "# TYPE web_eval_browser_pool_instances gauge" in lines
+        assert 'web_eval_browser_pool_instances{state="active"} 1' in lines
+        assert 'web_eval_browser_pool_acquires_total{source="reused"} 1' in lines
+        assert 'web_eval_browser_pool_acquires_total{source="launched"} 1' in lines
+        assert 'web_eval_browser_pool_evictions_total{reason="odd \\"reason\\""} 1' in lines
+        assert 'web_eval_browser_pool_acquire_wait_seconds_bucket{le="+Inf"} 2' in lines
+        assert "web_eval_browser_pool_acquire_wait_seconds_count 2" in lines
+        assert f'web_eval_browser_pool_instance_use_count{{instance="{instance.instance_id}"}} 2' in lines
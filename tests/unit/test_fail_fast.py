@@ -0,0 +1,146 @@
+"""
+Unit tests for stopping a scenario early on page errors and 5xx navigations.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from web_eval_agent.core import test_executor
+
+
+class FakeRequest:
+    def __init__(self, navigation: bool):
+        self.navigation = navigation
+        self.url = "http://localhost:5000/api"
+        self.resource_type = "document" if navigation else "xhr"
+        self.method = "GET"
+
+    def is_navigation_request(self):
+        return self.navigation
+
+
+class FakeResponse:
+    def __init__(self, status: int, navigation: bool):
+        self.status = status
+        self.url = "http://localhost:5000/api"
+        self.request = FakeRequest(navigation)
+
+    async def all_headers(self):
+        return {}
+
+
+class FakePage:
+    """Keeps the handlers registered with page.on so tests can fire events."""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+
+class StubAgent:
+    """Agent whose run() takes ``duration`` seconds and counts as cancelled if cut short."""
+
+    def __init__(self, duration: float, result="history"):
+        self.duration = duration
+        self.result = result
+        self.cancelled = False
+
+    async def run(self):
+        try:
+            await asyncio.sleep(self.duration)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+
+def make_storage(*events):
+    return test_executor.ScenarioStorage(fail_fast_on=list(events))
+
+
+class TestCheckFailFast:
+    """ScenarioStorage.check_fail_fast."""
+
+    def test_records_the_first_matching_event(self):
+        storage = make_storage("5xx", "pageerror")
+
+        storage.check_fail_fast("console-error", "ignored")
+        storage.check_fail_fast("pageerror", "TypeError: x is undefined")
+        storage.check_fail_fast("5xx", "502 http://localhost:5000/")
+
+        assert storage.fail_fast_event["event"] == "pageerror"
+        assert storage.fail_fast_triggered.is_set()
+
+    def test_nothing_matches_without_a_policy(self):
+        storage = make_storage()
+
+        storage.check_fail_fast("5xx", "500 http://localhost:5000/")
+
+        assert storage.fail_fast_event is None
+        assert not storage.fail_fast_triggered.is_set()
+
+
+class TestNavigationResponses:
+    """Only 5xx responses to page navigations trigger the 5xx policy."""
+
+    @pytest.mark.asyncio
+    async def test_5xx_navigation_triggers(self, make_executor):
+        storage, page = make_storage("5xx"), FakePage()
+        await make_executor()._setup_page_listeners(page, storage)
+
+        await page.handlers["response"](FakeResponse(503, navigation=True))
+
+        assert storage.fail_fast_event["details"] == "503 http://localhost:5000/api"
+
+    @pytest.mark.asyncio
+    async def test_5xx_subresource_is_ignored(self, make_executor):
+        storage, page = make_storage("5xx"), FakePage()
+        await make_executor()._setup_page_listeners(page, storage)
+
+        await page.handlers["response"](FakeResponse(500, navigation=False))
+        await page.handlers["response"](FakeResponse(404, navigation=True))
+
+        assert storage.fail_fast_event is None
+
+
+class TestRunAgent:
+    """TestExecutor._run_agent racing the agent against fail-fast and the deadline."""
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_event_stops_the_agent(self, make_executor):
+        storage, agent = make_storage("pageerror"), StubAgent(10.0)
+        asyncio.get_running_loop().call_later(0.01, storage.check_fail_fast, "pageerror", "boom")
+
+        result = await make_executor()._run_agent(agent, storage, time.time() + 5.0)
+
+        assert result is None
+        assert agent.cancelled
+
+    @pytest.mark.asyncio
+    async def test_finished_agent_returns_its_history(self, make_executor):
+        result = await make_executor()._run_agent(StubAgent(0.0), make_storage("5xx"),
+                                                  time.time() + 5.0)
+
+        assert result == "history"
+
+    @pytest.mark.asyncio
+    async def test_deadline_raises_timeout(self, make_executor):
+        agent = StubAgent(10.0)
+
+        with pytest.raises(TimeoutError):
+            await make_executor()._run_agent(agent, make_storage("5xx"), time.time() + 0.05)
+        assert agent.cancelled
+
+    def test_fail_fast_result_reports_the_event(self, make_executor, make_scenario):
+        storage = make_storage("5xx")
+        storage.check_fail_fast("5xx", "500 http://localhost:5000/")
+
+        result = make_executor()._fail_fast_result(make_scenario(), storage, None)
+
+        assert not result.passed
+        assert result.error_message == "Stopped early on 5xx: 500 http://localhost:5000/"
+        assert result.fail_fast_event is storage.fail_fast_event
@@ -0,0 +1,100 @@
+"""
+Unit tests for the on-disk LLM response cache.
+"""
+
+import json
+import os
+
+from langchain_core.outputs import Generation
+
+from web_eval_agent.utils.llm_cache import DiskLLMCache, get_llm_cache, prompt_key
+
+LLM_STRING = "gemini-1.5-flash:temperature=0.1"
+
+
+def chat_prompt(dom: str, timestamp: str = "2026-01-01 10:00", screenshot: str = "AAAA"):
+    """A serialized prompt shaped like LangChain's message dumps."""
+    return json.dumps([{
+        "content": [
+            {"type": "text", "text": f"Current date and time: {timestamp}\n{dom}"},
+            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{screenshot}"}},
+        ]
+    }])
+
+
+class TestPromptKey:
+    """Which prompt differences produce a different key."""
+
+    def test_ignores_timestamp_and_screenshot(self):
+        first = prompt_key(chat_prompt("<button>Go</button>"), LLM_STRING)
+        second = prompt_key(chat_prompt("<button>Go</button>", "2026-05-05 18:30", "BBBB"),
+                            LLM_STRING)
+
+        assert first == second
+
+    def test_depends_on_page_state(self):
+        assert (prompt_key(chat_prompt("<button>Go</button>"), LLM_STRING)
+                != prompt_key(chat_prompt("<button>Stop</button>"), LLM_STRING))
+
+    def test_depends_on_model_settings(self):
+        prompt = chat_prompt("<button>Go</button>")
+
+        assert prompt_key(prompt, LLM_STRING) != prompt_key(prompt, "gemini-1.5-pro")
+
+    def test_non_json_prompts_are_hashed_verbatim(self):
+        assert prompt_key("plain prompt", LLM_STRING) != prompt_key("other prompt", LLM_STRING)
+
+
+class TestDiskLLMCache:
+    """Lookups, counters and eviction."""
+
+    def test_update_then_lookup_hits(self, tmp_path):
+        cache = DiskLLMCache(str(tmp_path))
+        prompt = chat_prompt("<form/>")
+
+        assert cache.lookup(prompt, LLM_STRING) is None
+        cache.update(prompt, LLM_STRING, [Generation(text="click 3")])
+
+        assert [g.text for g in cache.lookup(prompt, LLM_STRING)] == ["click 3"]
+        assert cache.get_stats() == {"hits": 1, "misses": 1, "hit_rate": 50.0}
+
+    def test_evicts_least_recently_used_first(self, tmp_path):
+        cache = DiskLLMCache(str(tmp_path))
+        prompts = [chat_prompt(f"<page {i}/>") for i in range(3)]
+        for i, prompt in enumerate(prompts):
+            cache.update(prompt, LLM_STRING, [Generation(text=f"answer {i}")])
+            path = cache._path(prompt_key(prompt, LLM_STRING))
+            os.utime(path, (1000 + i, 1000 + i))
+
+        entry_size = cache._path(prompt_key(prompts[0], LLM_STRING)).stat().st_size
+        cache.max_bytes = entry_size * 2
+
+        assert cache.evict() == 1
+        assert cache.lookup(prompts[0], LLM_STRING) is None
+        assert cache.lookup(prompts[2], LLM_STRING) is not None
+
+    def test_lookup_refreshes_recency(self, tmp_path):
+        cache = DiskLLMCache(str(tmp_path))
+        prompts = [chat_prompt(f"<page {i}/>") for i in range(2)]
+        for i, prompt in enumerate(prompts):
+            cache.update(prompt, LLM_STRING, [Generation(text=f"answer {i}")])
+            path = cache._path(prompt_key(prompt, LLM_STRING))
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # Reading the older entry makes the newer one the eviction candidate
+        cache.lookup(prompts[0], LLM_STRING)
+        cache.max_bytes = cache._path(prompt_key(prompts[0], LLM_STRING)).stat().st_size
+
+        assert cache.evict() == 1
+        assert cache.lookup(prompts[0], LLM_STRING) is not None
+
+    def test_clear_removes_entries(self, tmp_path):
+        cache = DiskLLMCache(str(tmp_path))
+        cache.update("prompt", LLM_STRING, [Generation(text="answer")])
+        cache.clear()
+
+        assert cache.lookup("prompt", LLM_STRING) is None
+
+    def test_one_cache_per_directory(self, tmp_path):
+        assert get_llm_cache(str(tmp_path)) is get_llm_cache(str(tmp_path / "."))
+        assert get_llm_cache(str(tmp_path)) is not get_llm_cache(str(tmp_path / "other"))
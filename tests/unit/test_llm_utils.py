@@ -0,0 +1,104 @@
+"""
+Unit tests for the per-event-loop LLM client registry.
+"""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from web_eval_agent.utils import llm_utils
+from web_eval_agent.utils.llm_utils import clear_llm_clients, get_llm
+
+
+class FakeChatModel:
+    """Records how it was built instead of opening a channel to the Gemini API."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+@pytest.fixture(autouse=True)
+def fake_clients(monkeypatch):
+    monkeypatch.setattr(llm_utils, "ChatGoogleGenerativeAI", FakeChatModel)
+    monkeypatch.setattr(llm_utils, "_clients_by_loop", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(llm_utils, "_loopless_clients", {})
+
+
+def run_on_new_loop(**kwargs):
+    """get_llm() called from a fresh event loop, returned together with that loop."""
+    loop = asyncio.new_event_loop()
+
+    async def build():
+        return get_llm(**kwargs)
+
+    try:
+        return loop.run_until_complete(build()), loop
+    finally:
+        loop.close()
+
+
+class TestGetLLM:
+
+    @pytest.mark.asyncio
+    async def test_same_settings_on_one_loop_reuse_the_client(self):
+        cache = object()
+
+        client = get_llm("gemini-2.0-flash", "key-1", temperature=0.1, cache=cache)
+
+        assert get_llm("gemini-2.0-flash", "key-1", temperature=0.1, cache=cache) is client
+        assert client.kwargs == {"model": "gemini-2.0-flash", "google_api_key": "key-1",
+                                 "temperature": 0.1, "cache": cache}
+
+    @pytest.mark.asyncio
+    async def test_different_settings_get_their_own_client(self):
+        client = get_llm("gemini-2.0-flash", "key-1")
+
+        assert get_llm("gemini-1.5-pro", "key-1") is not client
+        assert get_llm("gemini-2.0-flash", "key-1", temperature=0.7) is not client
+        assert get_llm("gemini-2.0-flash", "key-1", cache=object()) is not client
+
+    @pytest.mark.asyncio
+    async def test_changed_api_key_gets_a_new_client(self):
+        client = get_llm("gemini-2.0-flash", "key-1")
+
+        rotated = get_llm("gemini-2.0-flash", "key-2")
+
+        assert rotated is not client
+        assert rotated.kwargs["google_api_key"] == "key-2"
+
+    def test_each_loop_gets_its_own_client(self):
+        # Both loops are kept alive so their registries can't be collected in between
+        first, first_loop = run_on_new_loop(model="gemini-2.0-flash", api_key="key-1")
+        second, second_loop = run_on_new_loop(model="gemini-2.0-flash", api_key="key-1")
+
+        assert first is not second
+        assert len(llm_utils._clients_by_loop) == 2
+
+    def test_clients_are_dropped_with_their_loop(self):
+        run_on_new_loop(model="gemini-2.0-flash", api_key="key-1")
+        gc.collect()
+
+        assert len(llm_utils._clients_by_loop) == 0
+
+    def test_registry_never_holds_the_api_key(self):
+        client, loop = run_on_new_loop(model="gemini-2.0-flash", api_key="secret-key")
+
+        [key] = llm_utils._clients_by_loop[loop]
+        assert "secret-key" not in key
+        assert client.kwargs["google_api_key"] == "secret-key"
+
+    def test_outside_a_loop_clients_are_shared(self):
+        client = get_llm("gemini-2.0-flash", "key-1")
+
+        assert get_llm("gemini-2.0-flash", "key-1") is client
+        key = ("gemini-2.0-flash", 0.1, llm_utils._fingerprint("key-1"), 0)
+        assert llm_utils._loopless_clients == {key: client}
+
+    def test_clear_llm_clients(self):
+        client = get_llm("gemini-2.0-flash", "key-1")
+
+        clear_llm_clients()
+
+        assert get_llm("gemini-2.0-flash", "key-1") is not client
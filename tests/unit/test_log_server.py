@@ -0,0 +1,60 @@
+"""
+Unit tests for how browser frames are sent to dashboards.
+"""
+
+import base64
+
+import pytest
+
+from web_eval_agent.utils import log_server
+from web_eval_agent.utils.log_server import FRAME_FORMATS, FRAME_HEADER, FRAME_VERSION
+
+PNG = b"\x89PNG\r\n\x1a\nfake image"
+
+
+@pytest.fixture
+def dashboards(monkeypatch):
+    """Two connected dashboards, one binary and one legacy, recording what they receive."""
+    sent = []
+    monkeypatch.setattr(log_server, "connected_clients", {"binary", "legacy"})
+    monkeypatch.setattr(log_server, "binary_frame_clients", {"binary"})
+    monkeypatch.setattr(log_server, "frame_ack_clients", set())
+    monkeypatch.setattr(log_server.socketio, "emit",
+                        lambda event, payload, to=None, callback=None: sent.append((to, event, payload)))
+    return sent
+
+
+class TestSendBrowserFrame:
+    """Binary and data-URL frame payloads."""
+
+    @pytest.mark.asyncio
+    async def test_binary_frame_is_header_plus_image(self, dashboards):
+        await log_server.send_browser_frame(base64.b64encode(PNG).decode("ascii"), "image/png")
+
+        [(to, event, payload)] = [sent for sent in dashboards if sent[0] == "binary"]
+        assert event == "browser_frame"
+        version, image_format, _ = FRAME_HEADER.unpack_from(payload)
+        assert FRAME_HEADER.size == 6
+        assert (version, image_format) == (FRAME_VERSION, FRAME_FORMATS["image/png"])
+        assert payload[FRAME_HEADER.size:] == PNG
+
+    @pytest.mark.asyncio
+    async def test_sequence_numbers_increase(self, dashboards):
+        await log_server.send_browser_frame(PNG, "image/jpeg")
+        await log_server.send_browser_frame(PNG, "image/jpeg")
+
+        sequences = [FRAME_HEADER.unpack_from(payload)[2]
+                     for _, event, payload in dashboards if event == "browser_frame"]
+        assert sequences[1] == sequences[0] + 1
+
+    @pytest.mark.asyncio
+    async def test_legacy_dashboards_get_a_data_url(self, dashboards):
+        await log_server.send_browser_frame(PNG, "image/png")
+
+        assert ("legacy", "browser_update",
+                {"data": "data:image/png;base64," + base64.b64encode(PNG).decode("ascii")}) in dashboards
+
+    @pytest.mark.asyncio
+    async def test_unknown_format_is_not_sent(self, dashboards):
+        assert await log_server.send_browser_frame(PNG, "image/webp") is False
+        assert dashboards == []
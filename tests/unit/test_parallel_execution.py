@@ -0,0 +1,105 @@
+"""
+Unit tests for concurrent scenario execution in TestExecutor.
+"""
+
+import asyncio
+
+import pytest
+from browser_use.browser.browser import Browser, BrowserConfig
+
+from web_eval_agent.core import test_executor
+
+
+class FakePage:
+    url = "about:blank"
+
+    async def bring_to_front(self):
+        pass
+
+    async def wait_for_load_state(self, state=None):
+        pass
+
+
+class FakePlaywrightContext:
+    def __init__(self):
+        self.pages = [FakePage()]
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_scenarios(make_scenario):
+    return lambda count: [make_scenario(f"Scenario {i}") for i in range(count)]
+
+
+@pytest.fixture
+def executor_without_browser(monkeypatch, make_executor):
+    """Executor whose browser setup is a no-op and whose scenarios just sleep."""
+    def build(workers: int, running: list, peak: list):
+        executor = make_executor(workers=workers)
+
+        async def noop():
+            pass
+
+        async def run_with_retries(scenario):
+            running.append(scenario.name)
+            peak[0] = max(peak[0], len(running))
+            # Later scenarios finish first, so results complete out of order
+            await asyncio.sleep(0.01 * (10 - int(scenario.name.split()[-1])))
+            running.remove(scenario.name)
+            return test_executor.TestResult(scenario_name=scenario.name, passed=True,
+                                            duration=0.1)
+
+        monkeypatch.setattr(executor, "_setup_browser", noop)
+        monkeypatch.setattr(executor, "_cleanup_browser", noop)
+        monkeypatch.setattr(executor, "_run_with_retries", run_with_retries)
+        return executor
+
+    return build
+
+
+class TestRunTests:
+    """Worker pool in run_tests."""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_input_order(self, executor_without_browser, make_scenarios):
+        running, peak = [], [0]
+        executor = executor_without_browser(3, running, peak)
+
+        results = await executor.run_tests(make_scenarios(6))
+
+        assert [r.scenario_name for r in results.test_results] == [
+            f"Scenario {i}" for i in range(6)
+        ]
+        assert results.summary["passed"] == 6
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_by_workers(self, executor_without_browser,
+                                                     make_scenarios):
+        running, peak = [], [0]
+        executor = executor_without_browser(2, running, peak)
+
+        await executor.run_tests(make_scenarios(6))
+
+        assert peak[0] == 2
+
+
+class TestScenarioBrowserContext:
+    """browser-use wrapper around one scenario's Playwright context."""
+
+    @pytest.mark.asyncio
+    async def test_close_releases_session_and_context(self):
+        browser = Browser(config=BrowserConfig(headless=True))
+        browser.playwright_browser = object()
+        playwright_context = FakePlaywrightContext()
+        browser_context = test_executor.ScenarioBrowserContext(browser, playwright_context)
+
+        session = await browser_context.get_session()
+        assert session.context is playwright_context
+
+        await browser_context.close()
+
+        assert playwright_context.closed
+        assert browser_context.session is None
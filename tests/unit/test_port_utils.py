@@ -0,0 +1,100 @@
+"""
+Unit tests for CDP port allocation.
+"""
+
+import itertools
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from web_eval_agent.utils import port_utils
+from web_eval_agent.utils.port_utils import allocate_port, cdp_url, release_port
+
+
+@pytest.fixture(autouse=True)
+def no_reserved_ports(monkeypatch):
+    monkeypatch.setattr(port_utils, "_reserved_ports", set())
+
+
+@pytest.fixture
+def os_ports(monkeypatch):
+    """Make the OS hand out ports from a list, repeating the last one forever."""
+    ports: list[int] = []
+    lock = threading.Lock()
+
+    class FakeSocket:
+        def __init__(self, *args):
+            with lock:
+                self.port = ports.pop(0) if len(ports) > 1 else ports[0]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def bind(self, address):
+            pass
+
+        def getsockname(self):
+            return ("127.0.0.1", self.port)
+
+    monkeypatch.setattr(port_utils, "socket", SimpleNamespace(
+        socket=FakeSocket, AF_INET=socket.AF_INET, SOCK_STREAM=socket.SOCK_STREAM
+    ))
+    return ports
+
+
+class TestAllocatePort:
+
+    def test_concurrent_allocations_never_share_a_port(self, os_ports):
+        # Every thread is offered the same few ports, as an OS recycling them would
+        offered = itertools.cycle(range(9222, 9230))
+        os_ports.extend(itertools.islice(offered, 200))
+        barrier = threading.Barrier(8)
+
+        def allocate(_):
+            barrier.wait()
+            return allocate_port()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ports = list(executor.map(allocate, range(8)))
+
+        assert sorted(ports) == list(range(9222, 9230))
+        assert port_utils._reserved_ports == set(ports)
+
+    def test_port_still_reserved_is_skipped(self, os_ports):
+        os_ports.extend([9222, 9222, 9223])
+
+        assert allocate_port() == 9222
+        assert allocate_port() == 9223
+
+    def test_gives_up_when_only_reserved_ports_come_back(self, os_ports):
+        os_ports.append(9222)
+        allocate_port()
+
+        with pytest.raises(RuntimeError, match="Could not allocate"):
+            allocate_port()
+
+    def test_released_port_can_be_allocated_again(self, os_ports):
+        os_ports.append(9222)
+        port = allocate_port()
+
+        release_port(port)
+
+        assert port_utils._reserved_ports == set()
+        assert allocate_port() == 9222
+
+    def test_allocated_port_is_bindable(self):
+        port = allocate_port()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(("127.0.0.1", port))
+        finally:
+            release_port(port)
+
+    def test_cdp_url(self):
+        assert cdp_url(9222) == "http://127.0.0.1:9222"
@@ -0,0 +1,103 @@
+"""
+Unit tests for cloning and (re)building Chromium profile templates.
+"""
+
+import asyncio
+import errno
+import fcntl
+import json
+import os
+import shutil
+
+import pytest
+
+from web_eval_agent.browser import profile_template
+from web_eval_agent.browser.profile_template import (
+    TEMPLATE_INFO_FILE,
+    clone_profile,
+    ensure_profile_template,
+)
+
+
+def make_template(template_dir):
+    template_dir.mkdir()
+    (template_dir / "Default").mkdir()
+    (template_dir / "Default" / "Preferences").write_text("{}")
+    (template_dir / "SingletonLock").write_text("")
+    (template_dir / TEMPLATE_INFO_FILE).write_text(json.dumps({"state_mtime": None}))
+    return template_dir
+
+
+class TestCloneProfile:
+    """Copying a template into a per-browser user-data-dir."""
+
+    def test_clone_is_created_beside_the_template(self, tmp_path):
+        template_dir = make_template(tmp_path / "template")
+
+        profile_dir = clone_profile(str(template_dir))
+
+        assert os.path.dirname(profile_dir) == str(tmp_path)
+        with open(os.path.join(profile_dir, "Default", "Preferences")) as f:
+            assert f.read() == "{}"
+        assert not os.path.exists(os.path.join(profile_dir, "SingletonLock"))
+
+    def test_cross_device_clone_keeps_reflinks_enabled(self, tmp_path, monkeypatch):
+        template_dir = make_template(tmp_path / "template")
+
+        def cross_device(fd, request, arg):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(fcntl, "ioctl", cross_device)
+        monkeypatch.setattr(profile_template, "_reflink_supported", True)
+        profile_dir = clone_profile(str(template_dir))
+
+        assert os.path.exists(os.path.join(profile_dir, "Default", "Preferences"))
+        assert profile_template._reflink_supported
+
+    def test_missing_template_is_an_error(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            clone_profile(str(tmp_path / "missing"))
+
+
+class TestEnsureProfileTemplate:
+    """Building a missing template once, however many launches ask for it."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_build_once(self, tmp_path, monkeypatch):
+        template_dir = tmp_path / "template"
+        builds = []
+
+        async def build(playwright, directory, state_file):
+            builds.append(directory)
+            await asyncio.sleep(0.01)
+            make_template(template_dir)
+
+        monkeypatch.setattr(profile_template, "build_profile_template", build)
+        results = await asyncio.gather(*(
+            ensure_profile_template(None, str(template_dir), state_file=None) for _ in range(3)
+        ))
+
+        assert results == [str(template_dir)] * 3
+        assert len(builds) == 1
+
+    def test_builds_from_separate_event_loops(self, tmp_path, monkeypatch):
+        template_dir = tmp_path / "template"
+        builds = []
+
+        async def build(playwright, directory, state_file):
+            builds.append(directory)
+            await asyncio.sleep(0.01)
+            make_template(template_dir)
+
+        async def ensure_concurrently():
+            await asyncio.gather(*(
+                ensure_profile_template(None, str(template_dir), state_file=None) for _ in range(2)
+            ))
+
+        monkeypatch.setattr(profile_template, "build_profile_template", build)
+        # Each loop waits on the lock, which binds an asyncio.Lock to that loop
+        asyncio.run(ensure_concurrently())
+        shutil.rmtree(template_dir)
+        asyncio.run(ensure_concurrently())
+
+        assert len(builds) == 2
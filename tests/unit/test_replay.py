@@ -0,0 +1,188 @@
+"""
+Unit tests for recording and replaying agent actions without the LLM.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from web_eval_agent.core.replay import (
+    ReplayAction,
+    ReplayDivergenceError,
+    ReplayRunner,
+    ReplayStore,
+    actions_from_history,
+    final_url_from_history,
+    same_page,
+)
+
+URL = "http://localhost:5000"
+
+
+class FakeHistory:
+    """Stands in for browser-use's AgentHistoryList."""
+
+    def __init__(self, model_actions, urls=()):
+        self._model_actions = model_actions
+        self._urls = list(urls)
+
+    def model_actions(self):
+        return self._model_actions
+
+    def urls(self):
+        return self._urls
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    @property
+    def first(self):
+        return self
+
+    async def click(self, timeout=None):
+        if self.selector in self.page.missing:
+            raise TimeoutError(f"Timeout waiting for {self.selector}")
+        self.page.calls.append(("click", self.selector))
+
+    async def fill(self, text, timeout=None):
+        self.page.calls.append(("fill", self.selector, text))
+
+    async def select_option(self, label=None, timeout=None):
+        self.page.calls.append(("select", self.selector, label))
+
+
+class FakePage:
+    """Records the Playwright calls a replay makes."""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+        self.keyboard = SimpleNamespace(press=self._press)
+        self.mouse = SimpleNamespace(wheel=self._wheel)
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        self.calls.append(("goto", url))
+
+    async def _press(self, keys):
+        self.calls.append(("press", keys))
+
+    async def _wheel(self, dx, dy):
+        self.calls.append(("wheel", dy))
+
+
+class TestActionsFromHistory:
+    """Mapping browser-use model actions to replay actions."""
+
+    def test_maps_actions_and_selectors(self):
+        element = SimpleNamespace(css_selector="#submit", xpath="html/body/button")
+        history = FakeHistory([
+            {"go_to_url": {"url": f"{URL}/login"}, "interacted_element": None},
+            {"click_element": {"index": 3}, "interacted_element": element},
+            {"interacted_element": None},
+        ])
+
+        actions = actions_from_history(history)
+
+        assert actions == [
+            ReplayAction(name="go_to_url", params={"url": f"{URL}/login"}),
+            ReplayAction(name="click_element", params={"index": 3},
+                         css_selector="#submit", xpath="html/body/button"),
+        ]
+
+    def test_without_history_there_is_nothing_to_replay(self):
+        assert actions_from_history(None) == []
+
+    def test_final_url_is_the_last_known_url(self):
+        history = FakeHistory([], urls=[URL, f"{URL}/login", f"{URL}/dashboard", None])
+
+        assert final_url_from_history(history) == f"{URL}/dashboard"
+        assert final_url_from_history(FakeHistory([])) is None
+
+    def test_same_page_ignores_fragment_and_trailing_slash(self):
+        assert same_page(f"{URL}/done/#top", f"{URL}/done")
+        assert not same_page(f"{URL}/done", f"{URL}/login")
+
+
+class TestReplayRunner:
+    """Re-executing recorded actions on a page."""
+
+    @pytest.mark.asyncio
+    async def test_replays_actions_in_order(self):
+        page = FakePage()
+        steps = await ReplayRunner(page).run([
+            ReplayAction(name="go_to_url", params={"url": f"{URL}/login"}),
+            ReplayAction(name="input_text", params={"text": "alice"}, css_selector="#user"),
+            ReplayAction(name="click_element", xpath="html/body/button"),
+            ReplayAction(name="send_keys", params={"keys": "Enter"}),
+            ReplayAction(name="scroll_down", params={}),
+            ReplayAction(name="done", params={"text": "ok"}),
+        ])
+
+        assert page.calls == [
+            ("goto", f"{URL}/login"),
+            ("fill", "#user", "alice"),
+            ("click", "xpath=/html/body/button"),
+            ("press", "Enter"),
+            ("wheel", 500),
+        ]
+        # Read-only actions leave no step line
+        assert len(steps) == 5
+
+    @pytest.mark.asyncio
+    async def test_missing_target_diverges(self):
+        page = FakePage(missing={"#gone"})
+
+        with pytest.raises(ReplayDivergenceError, match="Step 1"):
+            await ReplayRunner(page).run([ReplayAction(name="click_element", css_selector="#gone")])
+
+    @pytest.mark.asyncio
+    async def test_unknown_action_diverges(self):
+        with pytest.raises(ReplayDivergenceError, match="cannot be replayed"):
+            await ReplayRunner(FakePage()).run([ReplayAction(name="upload_file")])
+
+    @pytest.mark.asyncio
+    async def test_new_tab_diverges_without_navigating(self):
+        page = FakePage()
+
+        with pytest.raises(ReplayDivergenceError, match="new tab"):
+            await ReplayRunner(page).run([ReplayAction(name="open_tab", params={"url": URL})])
+        assert page.calls == []
+
+    @pytest.mark.asyncio
+    async def test_action_without_selector_diverges(self):
+        with pytest.raises(ReplayDivergenceError, match="No selector"):
+            await ReplayRunner(FakePage()).run([ReplayAction(name="click_element")])
+
+
+class TestReplayStore:
+    """Persisting traces per scenario."""
+
+    def test_round_trips_a_trace(self, tmp_path, make_scenario):
+        store = ReplayStore(str(tmp_path))
+        actions = [ReplayAction(name="click_element", css_selector="#go")]
+        store.save(make_scenario("Login", steps=["Log in"]), URL, actions, final_url=f"{URL}/done")
+
+        trace = store.load(make_scenario("Login", steps=["Log in"]), URL)
+
+        assert trace.actions == actions
+        assert trace.final_url == f"{URL}/done"
+
+    def test_changed_scenario_invalidates_the_trace(self, tmp_path, make_scenario):
+        store = ReplayStore(str(tmp_path))
+        store.save(make_scenario("Login", steps=["Log in"]), URL, [ReplayAction(name="done")])
+
+        assert store.load(make_scenario("Login", steps=["Log in", "Log out"]), URL) is None
+        assert store.load(make_scenario("Login", steps=["Log in"]), f"{URL}/other") is None
+
+    def test_unreadable_trace_is_ignored(self, tmp_path, make_scenario):
+        store = ReplayStore(str(tmp_path))
+        store.save(make_scenario("Login", steps=["Log in"]), URL, [])
+        next(tmp_path.glob("*.json")).write_text("{broken")
+
+        assert store.load(make_scenario("Login", steps=["Log in"]), URL) is None
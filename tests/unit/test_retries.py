@@ -0,0 +1,194 @@
+"""
+Unit tests for scenario deadlines and infrastructure-failure retries in TestExecutor.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from browser_use.browser.browser import Browser, BrowserConfig
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from web_eval_agent.core import test_executor
+
+
+def failed(error_message: str, **fields):
+    return test_executor.TestResult(scenario_name="Scenario", passed=False, duration=1.0,
+                                    error_message=error_message, **fields)
+
+
+class FakePage:
+    """Page whose navigation always times out after Playwright's timeout."""
+
+    def __init__(self):
+        self.timeouts = []
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        self.timeouts.append(timeout)
+        raise PlaywrightTimeoutError(f"Timeout {timeout:.0f}ms exceeded.")
+
+
+class FakeContext:
+    """Playwright context whose page loads instantly."""
+
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = SimpleNamespace(url="http://localhost:5000/", on=lambda event, handler: None)
+
+        async def goto(url, wait_until=None, timeout=None):
+            pass
+
+        page.goto = goto
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    async def new_context(self, viewport=None):
+        return FakeContext()
+
+
+class SlowAgent:
+    """Agent that takes one step, then hangs until cancelled."""
+
+    def __init__(self, **kwargs):
+        history = SimpleNamespace(model_actions=lambda: [{"click_element": {"index": 1}}])
+        self.state = SimpleNamespace(history=history)
+
+    async def run(self):
+        await asyncio.sleep(60)
+
+
+class TestInfrastructureFailure:
+    """Which failures _is_infrastructure_failure treats as retryable."""
+
+    @pytest.mark.parametrize("message", [
+        "Test execution failed: Target closed",
+        "Test execution failed: Browser has been closed",
+        "Test execution failed: Timeout 30000ms exceeded.",
+    ])
+    def test_browser_errors_are_retryable(self, message):
+        assert test_executor.TestExecutor._is_infrastructure_failure(failed(message))
+
+    def test_app_failures_are_not_retryable(self):
+        assert not test_executor.TestExecutor._is_infrastructure_failure(failed("Validation failed"))
+        assert not test_executor.TestExecutor._is_infrastructure_failure(failed(None))
+
+    def test_timed_out_scenario_is_not_retryable(self):
+        result = failed("Timeout 4000ms exceeded.", timed_out=True)
+        assert not test_executor.TestExecutor._is_infrastructure_failure(result)
+
+    def test_fail_fast_scenario_is_not_retryable(self):
+        result = failed("Target closed", fail_fast_event={"event": "5xx", "details": ""})
+        assert not test_executor.TestExecutor._is_infrastructure_failure(result)
+
+
+class TestRunWithRetries:
+    """Retry loop around _run_single_test."""
+
+    @pytest.mark.asyncio
+    async def test_retries_infrastructure_errors_and_flags_flaky(self, make_executor,
+                                                                 make_scenario):
+        executor = make_executor(max_retries=3)
+        outcomes = [failed("Target closed"), failed("Target closed"),
+                    test_executor.TestResult(scenario_name="Scenario", passed=True, duration=2.0)]
+
+        async def run_single_test(scenario):
+            return outcomes.pop(0)
+
+        executor._run_single_test = run_single_test
+        result = await executor._run_with_retries(make_scenario())
+
+        assert result.passed and result.flaky
+        assert result.attempts == 3
+        assert result.attempt_durations == [1.0, 1.0, 2.0]
+        assert result.duration == 4.0
+
+    @pytest.mark.asyncio
+    async def test_stops_after_max_retries(self, make_executor, make_scenario):
+        executor = make_executor(max_retries=2)
+        calls = []
+
+        async def run_single_test(scenario):
+            calls.append(scenario)
+            return failed("Target closed")
+
+        executor._run_single_test = run_single_test
+        result = await executor._run_with_retries(make_scenario())
+
+        assert len(calls) == 3
+        assert not result.passed and not result.flaky
+
+    @pytest.mark.asyncio
+    async def test_timed_out_scenario_runs_once(self, make_executor, make_scenario):
+        executor = make_executor(max_retries=3)
+        calls = []
+
+        async def run_single_test(scenario):
+            calls.append(scenario)
+            return failed("Scenario timed out after 5s", timed_out=True)
+
+        executor._run_single_test = run_single_test
+        result = await executor._run_with_retries(make_scenario())
+
+        assert len(calls) == 1
+        assert result.attempts == 1
+
+
+class TestGotoStartUrl:
+    """Navigation clamped to the scenario deadline."""
+
+    @pytest.mark.asyncio
+    async def test_timeout_clamped_to_deadline_counts_as_timed_out(self, make_executor):
+        page = FakePage()
+        reached = await make_executor()._goto_start_url(page, time.time() + 2.0)
+
+        assert reached is False
+        assert page.timeouts[0] <= 2000
+
+    @pytest.mark.asyncio
+    async def test_past_deadline_does_not_navigate(self, make_executor):
+        page = FakePage()
+        reached = await make_executor()._goto_start_url(page, time.time() - 1.0)
+
+        assert reached is False
+        assert page.timeouts == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_never_reaches_past_the_deadline(self, make_executor):
+        page = FakePage()
+        await make_executor()._goto_start_url(page, time.time() + 0.2)
+
+        assert 1 <= page.timeouts[0] <= 200
+
+    @pytest.mark.asyncio
+    async def test_unclamped_timeout_is_raised_for_retry(self, make_executor):
+        with pytest.raises(PlaywrightTimeoutError):
+            await make_executor()._goto_start_url(FakePage(), time.time() + 120.0)
+
+
+class TestScenarioDeadline:
+    """The scenario timeout as a hard deadline around the agent run."""
+
+    @pytest.mark.asyncio
+    async def test_stuck_agent_times_out_with_partial_steps(self, make_executor, make_scenario,
+                                                            monkeypatch):
+        executor = make_executor()
+        executor.playwright_browser = FakeBrowser()
+        executor.agent_browser = Browser(config=BrowserConfig(headless=True))
+        monkeypatch.setattr(test_executor, "Agent", SlowAgent)
+        monkeypatch.setattr(test_executor, "get_llm", lambda *args, **kwargs: None)
+
+        start = time.time()
+        result = await executor._run_single_test(make_scenario(timeout=1))
+
+        assert time.time() - start < 2
+        assert result.timed_out and not result.passed
+        assert result.error_message == "Scenario timed out after 1s"
+        assert len(result.agent_steps) == 1 and "Click" in result.agent_steps[0]
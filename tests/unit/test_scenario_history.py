@@ -0,0 +1,86 @@
+"""
+Unit tests for recorded scenario durations and longest-first ordering.
+"""
+
+import pytest
+
+from web_eval_agent.core.scenario_history import DurationHistory
+
+
+@pytest.fixture
+def instructions(tmp_path):
+    path = tmp_path / "instructions.md"
+    path.write_text("# Scenarios")
+    return str(path)
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    return str(tmp_path / "durations.json")
+
+
+class TestDurationHistory:
+    """DurationHistory smoothing, persistence and ordering."""
+
+    def test_orders_longest_first(self, history_file, instructions, make_scenario):
+        history = DurationHistory(history_file, instructions)
+        history.record("fast", 1.0)
+        history.record("slow", 9.0)
+        history.record("medium", 4.0)
+
+        indexed = list(enumerate([make_scenario("fast"), make_scenario("slow"),
+                                  make_scenario("medium")]))
+
+        assert [s.name for _, s in history.order(indexed)] == ["slow", "medium", "fast"]
+
+    def test_ties_break_by_priority_then_file_order(self, history_file, instructions,
+                                                    make_scenario):
+        history = DurationHistory(history_file, instructions)
+        indexed = list(enumerate([make_scenario("a", priority="low"),
+                                  make_scenario("b", priority="critical"),
+                                  make_scenario("c", priority="low")]))
+
+        assert [s.name for _, s in history.order(indexed)] == ["b", "a", "c"]
+
+    def test_unknown_scenarios_get_the_mean_estimate(self, history_file, instructions,
+                                                     make_scenario):
+        history = DurationHistory(history_file, instructions)
+        history.record("a", 2.0)
+        history.record("b", 6.0)
+
+        estimates = history.estimate([make_scenario("a"), make_scenario("b"),
+                                      make_scenario("new")])
+
+        assert estimates == {"a": 2.0, "b": 6.0, "new": 4.0}
+
+    def test_record_smooths_and_ignores_non_positive(self, history_file, instructions):
+        history = DurationHistory(history_file, instructions)
+        history.record("a", 10.0)
+        history.record("a", 20.0)
+        history.record("a", 0.0)
+
+        assert history.get("a") == 15.0
+
+    def test_save_round_trips(self, history_file, instructions):
+        history = DurationHistory(history_file, instructions)
+        history.record("a", 3.0)
+        history.save()
+
+        assert DurationHistory(history_file, instructions).get("a") == 3.0
+
+    def test_durations_are_scoped_to_the_instruction_file(self, tmp_path, history_file,
+                                                           instructions):
+        history = DurationHistory(history_file, instructions)
+        history.record("a", 3.0)
+        history.save()
+
+        other = tmp_path / "other.md"
+        other.write_text("# Other scenarios")
+
+        assert DurationHistory(history_file, str(other)).get("a") is None
+
+    def test_corrupt_file_is_ignored(self, history_file, instructions):
+        with open(history_file, "w") as f:
+            f.write("{not json")
+
+        assert DurationHistory(history_file, instructions).get("a") is None
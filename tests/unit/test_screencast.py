@@ -0,0 +1,292 @@
+"""
+Unit tests for ScreencastStreamer frame acknowledgement, pacing, stats and
+pausing capture while no dashboard is connected.
+"""
+
+import asyncio
+import base64
+import time
+
+import pytest
+
+from web_eval_agent.browser import screencast
+from web_eval_agent.browser.screencast import ScreencastStreamer
+from web_eval_agent.utils import log_server
+
+FRAME = base64.b64encode(b"\xff\xd8fake jpeg" * 10).decode("ascii")
+
+
+class FakeCDPSession:
+    """CDP session recording what is sent and delivering events to listeners."""
+
+    def __init__(self):
+        self.sent: list[tuple[str, dict | None]] = []
+        self.listeners: dict[str, list] = {}
+        self.error: Exception | None = None
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    async def send(self, method, params=None):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((method, params))
+        return {}
+
+    def methods(self) -> list[str]:
+        return [method for method, _ in self.sent]
+
+    def capture_calls(self) -> list[str]:
+        return [method for method in self.methods()
+                if method in ("Page.startScreencast", "Page.stopScreencast")]
+
+    def acks(self) -> list[int]:
+        return [params["sessionId"] for method, params in self.sent
+                if method == "Page.screencastFrameAck"]
+
+    def deliver_frame(self, session_id: int) -> asyncio.Task:
+        """Send a Page.screencastFrame the way Playwright dispatches async listeners."""
+        [handler] = self.listeners["Page.screencastFrame"]
+        return asyncio.create_task(handler({"data": FRAME, "sessionId": session_id,
+                                            "metadata": {}}))
+
+
+class FakeDashboard:
+    """Stands in for log_server's Socket.IO side: connected clients and frame acks.
+
+    With ``acks`` False send_browser_frame reports every frame as unacknowledged;
+    otherwise each frame waits until ack() is called.
+    """
+
+    def __init__(self, acks: bool = True):
+        self.acks = acks
+        self.frames: list[str] = []
+        self.stats: list[dict] = []
+        self._pending: list[asyncio.Future] = []
+
+    async def send_browser_frame(self, image, mime_type="image/jpeg", ack_timeout=0.0):
+        self.frames.append(image)
+        if not self.acks:
+            return False
+        acked = asyncio.get_running_loop().create_future()
+        self._pending.append(acked)
+        return await acked
+
+    def ack(self):
+        self._pending.pop(0).set_result(True)
+
+    def connect(self, sid: str = "dashboard"):
+        # Mirrors log_server.handle_connect
+        first_viewer = not log_server.connected_clients
+        log_server.connected_clients.add(sid)
+        if first_viewer:
+            log_server._notify_viewer_listeners()
+
+    def disconnect(self, sid: str = "dashboard"):
+        # Mirrors log_server.handle_disconnect
+        log_server.connected_clients.discard(sid)
+        if not log_server.connected_clients:
+            log_server._notify_viewer_listeners()
+
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    """A FakeDashboard with no clients connected yet."""
+    fake = FakeDashboard()
+    monkeypatch.setattr(log_server, "connected_clients", set())
+    monkeypatch.setattr(log_server, "viewer_listeners", set())
+    monkeypatch.setattr(log_server.socketio, "emit", lambda *args, **kwargs: None)
+    monkeypatch.setattr(screencast, "send_browser_frame", fake.send_browser_frame)
+    monkeypatch.setattr(screencast, "send_screencast_stats", fake.stats.append)
+    return fake
+
+
+async def settle():
+    """Let queued callbacks and tasks run."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestFrameAcks:
+    """Chromium's frame ack follows the dashboard's, or min_frame_interval pacing."""
+
+    @pytest.mark.asyncio
+    async def test_frame_is_acked_once_the_dashboard_acks(self, dashboard):
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, min_frame_interval=10.0, stats_interval=3600)
+        await streamer.start()
+
+        frame = session.deliver_frame(7)
+        await settle()
+        assert dashboard.frames == [FRAME]
+        assert session.acks() == []
+
+        dashboard.ack()
+        # No pacing once the dashboard has acked, despite min_frame_interval
+        await asyncio.wait_for(frame, timeout=1)
+        assert session.acks() == [7]
+        assert streamer.frames_sent == 1
+        assert streamer.bytes_sent == len(FRAME) * 3 // 4
+        await streamer.stop()
+
+    @pytest.mark.asyncio
+    async def test_unacked_frames_are_paced(self, dashboard):
+        dashboard.acks = False
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, min_frame_interval=0.2, stats_interval=3600)
+        await streamer.start()
+
+        start = time.monotonic()
+        frame = session.deliver_frame(1)
+        await settle()
+        assert session.acks() == []
+
+        await asyncio.wait_for(frame, timeout=1)
+        assert session.acks() == [1]
+        assert time.monotonic() - start >= 0.15
+        await streamer.stop()
+
+    @pytest.mark.asyncio
+    async def test_frame_without_viewers_is_dropped_but_acked(self, dashboard):
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, min_frame_interval=0.01, stats_interval=3600)
+        await streamer.start()
+
+        await asyncio.wait_for(session.deliver_frame(3), timeout=1)
+
+        assert dashboard.frames == []
+        assert session.acks() == [3]
+        assert streamer.frames_sent == 0
+        await streamer.stop()
+
+    @pytest.mark.asyncio
+    async def test_frame_after_stop_is_not_acked(self, dashboard):
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, stats_interval=3600)
+        await streamer.start()
+
+        frame = session.deliver_frame(5)
+        await settle()
+        await streamer.stop()
+        dashboard.ack()
+        await asyncio.wait_for(frame, timeout=1)
+
+        assert session.acks() == []
+
+
+class TestStats:
+    """Stats sent to the dashboard while the screencast runs."""
+
+    @pytest.mark.asyncio
+    async def test_stats_report_frames_and_rates(self, dashboard):
+        dashboard.acks = False
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, profile="low", min_frame_interval=0.0,
+                                      stats_interval=0.05)
+        await streamer.start()
+        # Frames arrive after the first report, so the last one has a nonzero rate
+        await asyncio.sleep(0.07)
+
+        for session_id in range(3):
+            await session.deliver_frame(session_id)
+        await asyncio.sleep(0.06)
+        await streamer.stop()
+
+        assert dashboard.stats
+        stats = dashboard.stats[-1]
+        assert stats["profile"] == "low"
+        assert stats["frames"] == 3
+        assert stats["bytes"] == 3 * (len(FRAME) * 3 // 4)
+        assert stats["fps"] > 0
+        assert stats["bytes_per_sec"] > 0
+        assert stats["agent_cpu_percent"] >= 0
+        # No browser given, so its CPU use is unknown
+        assert stats["browser_cpu_percent"] is None
+
+    @pytest.mark.asyncio
+    async def test_no_stats_while_nobody_watches(self, dashboard):
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, stats_interval=0.02)
+        await streamer.start()
+
+        await asyncio.sleep(0.1)
+        await streamer.stop()
+
+        assert dashboard.stats == []
+
+
+class TestCaptureFollowsViewers:
+    """Page.startScreencast/stopScreencast as dashboards come and go."""
+
+    @pytest.mark.asyncio
+    async def test_capture_waits_for_the_first_dashboard(self, dashboard):
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, profile="high", stats_interval=3600)
+        await streamer.start()
+        assert session.capture_calls() == []
+        assert not streamer.capturing
+
+        dashboard.connect()
+        await settle()
+
+        assert session.sent == [("Page.startScreencast", screencast.SCREENCAST_PROFILES["high"])]
+        assert streamer.capturing
+        await streamer.stop()
+
+    @pytest.mark.asyncio
+    async def test_capture_pauses_and_resumes_with_dashboards(self, dashboard):
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, stats_interval=3600)
+        await streamer.start()
+        await settle()
+        assert session.capture_calls() == ["Page.startScreencast"]
+
+        dashboard.disconnect()
+        await settle()
+        assert session.capture_calls() == ["Page.startScreencast", "Page.stopScreencast"]
+        assert not streamer.capturing
+
+        dashboard.connect()
+        await settle()
+        assert session.capture_calls() == ["Page.startScreencast", "Page.stopScreencast",
+                                           "Page.startScreencast"]
+
+        await streamer.stop()
+        assert session.capture_calls()[-1] == "Page.stopScreencast"
+        assert log_server.viewer_listeners == set()
+
+    @pytest.mark.asyncio
+    async def test_second_dashboard_does_not_restart_capture(self, dashboard):
+        dashboard.connect("first")
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, stats_interval=3600)
+        await streamer.start()
+
+        dashboard.connect("second")
+        dashboard.disconnect("first")
+        await settle()
+
+        assert session.capture_calls() == ["Page.startScreencast"]
+        await streamer.stop()
+
+    @pytest.mark.asyncio
+    async def test_closed_target_ends_the_stream(self, dashboard):
+        dashboard.connect()
+        session = FakeCDPSession()
+        streamer = ScreencastStreamer(session, stats_interval=3600)
+        await streamer.start()
+
+        session.error = RuntimeError("Target closed")
+        dashboard.disconnect()
+        await settle()
+
+        assert not streamer.running
+        assert streamer._watch_task.done()
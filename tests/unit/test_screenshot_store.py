@@ -0,0 +1,96 @@
+"""
+Unit tests for the content-addressed screenshot store.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from web_eval_agent.utils.screenshot_store import ScreenshotStore, get_screenshot_store
+
+KB = 1024
+
+
+def age(ref, seconds: float):
+    """Make a stored image look ``seconds`` old."""
+    then = time.time() - seconds
+    os.utime(ref.path, (then, then))
+
+
+class TestPut:
+    """Deduplication by content."""
+
+    def test_identical_images_are_stored_once(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path))
+
+        first = store.put(b"same frame")
+        second = store.put(b"same frame")
+        other = store.put(b"other frame", "image/png")
+
+        assert first == second
+        assert other.path.endswith(".png")
+        assert first.read_bytes() == b"same frame"
+        assert store.get_stats() == {"writes": 2, "dedup_hits": 1}
+
+    def test_dedup_hit_refreshes_the_image(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path))
+        ref = store.put(b"frame")
+        age(ref, 7200)
+
+        store.put(b"frame")
+
+        assert os.path.getmtime(ref.path) > time.time() - 60
+
+    @pytest.mark.asyncio
+    async def test_concurrent_puts_from_threads(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path), evict_every=2)
+
+        refs = await asyncio.gather(*(
+            asyncio.to_thread(store.put, bytes([i % 3]) * KB) for i in range(12)
+        ))
+
+        assert len({ref.path for ref in refs}) == 3
+        # No temporary files are left behind by racing writers
+        assert len(list(tmp_path.glob("*/*"))) == 3
+
+
+class TestEvict:
+    """Trimming the store to its size budget."""
+
+    def test_oldest_images_go_first(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path), max_size_mb=0, keep_recent_s=3600)
+        store.max_bytes = 2 * KB
+        refs = [store.put(bytes([i]) * KB) for i in range(3)]
+        for ref, seconds in zip(refs, (9000, 8000, 7000), strict=True):
+            age(ref, seconds)
+
+        assert store.evict() == 1
+        assert [os.path.exists(ref.path) for ref in refs] == [False, True, True]
+
+    def test_recent_images_are_kept_over_budget(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path), max_size_mb=0, keep_recent_s=3600)
+        refs = [store.put(bytes([i]) * KB) for i in range(2)]
+        age(refs[0], 7200)
+
+        assert store.evict() == 1
+        assert os.path.exists(refs[1].path)
+
+    def test_store_is_trimmed_every_n_new_images(self, tmp_path):
+        store = ScreenshotStore(str(tmp_path), max_size_mb=0, evict_every=3, keep_recent_s=3600)
+        old = store.put(b"old" * KB)
+        age(old, 7200)
+        store.put(b"new" * KB)
+        assert os.path.exists(old.path)
+
+        store.put(b"third" * KB)
+
+        assert not os.path.exists(old.path)
+
+
+class TestGetScreenshotStore:
+    """Process-wide store per directory."""
+
+    def test_store_is_shared_per_directory(self, tmp_path):
+        assert get_screenshot_store(str(tmp_path)) is get_screenshot_store(str(tmp_path / "."))
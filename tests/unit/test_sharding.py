@@ -0,0 +1,50 @@
+"""
+Unit tests for partitioning scenarios across worker processes.
+"""
+
+import pytest
+
+from web_eval_agent.core import test_executor
+from web_eval_agent.core.scenario_history import DurationHistory
+
+
+@pytest.fixture
+def make_indexed(make_scenario):
+    return lambda count: [(i, make_scenario(f"Scenario {i}")) for i in range(count)]
+
+
+def shard_indexes(shards):
+    return [[index for index, _ in shard] for shard in shards]
+
+
+class TestPartition:
+    """TestExecutor._partition."""
+
+    def test_round_robin_without_history(self, make_indexed):
+        shards = test_executor.TestExecutor._partition(make_indexed(5), 2)
+
+        assert shard_indexes(shards) == [[0, 2, 4], [1, 3]]
+
+    def test_more_shards_than_scenarios_leaves_empty_shards(self, make_indexed):
+        shards = test_executor.TestExecutor._partition(make_indexed(2), 3)
+
+        assert shard_indexes(shards) == [[0], [1], []]
+
+    def test_history_balances_load(self, tmp_path, make_indexed):
+        instructions = tmp_path / "instructions.md"
+        instructions.write_text("# Scenarios")
+        history = DurationHistory(str(tmp_path / "durations.json"), str(instructions))
+        for name, duration in [("Scenario 0", 10.0), ("Scenario 1", 6.0),
+                               ("Scenario 2", 5.0), ("Scenario 3", 1.0)]:
+            history.record(name, duration)
+
+        indexed = history.order(make_indexed(4))
+        shards = test_executor.TestExecutor._partition(indexed, 2, history)
+
+        # 10 | 6 + 5, then the 1s scenario joins the lighter first shard
+        assert shard_indexes(shards) == [[0, 3], [1, 2]]
+
+    def test_every_scenario_lands_in_exactly_one_shard(self, make_indexed):
+        shards = test_executor.TestExecutor._partition(make_indexed(7), 3)
+
+        assert sorted(index for shard in shard_indexes(shards) for index in shard) == list(range(7))